@@ -0,0 +1,75 @@
+# ==============================================================================
+# 統計分析效能：逐筆 calculate_hexagram 迴圈 vs 欄式 gather + pandas 彙總，以及增量更新
+# ==============================================================================
+# 用法：
+#   python benchmarks/bench_analytics.py              # 100 萬張盤 (逐筆迴圈只量前 5 萬張再推估)
+#   python benchmarks/bench_analytics.py -n 200000 --delta 1000
+
+import argparse
+import collections
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from liuyao_engine import EARTHLY_BRANCHES, calculate_hexagram
+from liuyao_analytics import analyze, merge_aggregates, month_attribute_rates
+
+LOOP_LIMIT = 50000
+
+
+def loop_aggregate(values, months):
+    # 對照組：逐筆排盤後以 Counter 累計 (與 liuyao_analytics 的次數表相同內容)
+    hexagram, change, moving, shi, month = (collections.Counter() for _ in range(5))
+    for v, m in zip(values, months):
+        m_name, c_name, palace, lines, _, attrs, _, _ = calculate_hexagram(v, "甲", "子")
+        n_moving = sum(line["move"] for line in lines)
+        hexagram[m_name] += 1
+        moving[n_moving] += 1
+        if n_moving:
+            change[c_name] += 1
+        shi[(palace, next(line["main"]["rel"] for line in lines if line["main"]["shiying"] == "世"))] += 1
+        if m >= 0:
+            month[(m, "total")] += 1
+            for attr in attrs:
+                month[(m, attr)] += 1
+    return hexagram, change, moving, shi, month
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="統計分析效能量測")
+    parser.add_argument("-n", type=int, default=1_000_000, help="盤數")
+    parser.add_argument("--delta", type=int, default=500, help="增量更新的新增盤數")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    values = rng.integers(6, 10, (args.n, 6), dtype=np.int8)
+    months = rng.integers(0, len(EARTHLY_BRANCHES), args.n, dtype=np.int8)
+
+    loop_n = min(args.n, LOOP_LIMIT)
+    t = time.perf_counter()
+    loop_aggregate(values[:loop_n].tolist(), months[:loop_n].tolist())
+    loop_seconds = (time.perf_counter() - t) * args.n / loop_n
+    print(f"逐筆迴圈 ({loop_n:,} 張推估至 {args.n:,} 張)：{loop_seconds:.2f} 秒")
+
+    analyze(values[:10], months[:10])  # 暖身
+    t = time.perf_counter()
+    aggs = analyze(values, months)
+    vector_seconds = time.perf_counter() - t
+    print(f"欄式彙總 ({args.n:,} 張)：{vector_seconds:.3f} 秒 (快 {loop_seconds / vector_seconds:,.0f} 倍)")
+
+    delta_values = rng.integers(6, 10, (args.delta, 6), dtype=np.int8)
+    delta_months = rng.integers(0, len(EARTHLY_BRANCHES), args.delta, dtype=np.int8)
+    t = time.perf_counter()
+    merged = merge_aggregates(aggs, analyze(delta_values, delta_months))
+    month_attribute_rates(merged)
+    print(f"增量更新 (+{args.delta:,} 張並重算比例)：{(time.perf_counter() - t) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
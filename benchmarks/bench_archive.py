@@ -0,0 +1,121 @@
+# ==============================================================================
+# 盤面封存檔效能：欄式封存檔 (mmap) vs JSON Lines / pickle 的檔案大小、寫入與載入時間
+# ==============================================================================
+# 用法：
+#   python benchmarks/bench_archive.py                 # 100 萬張盤，暫存目錄
+#   python benchmarks/bench_archive.py -n 3000000 --dir /tmp/archive
+# JSON Lines (chart_to_dict) 與 pickle (chart_record 含 lines_data) 只量前 2 萬張再推估。
+
+import argparse
+import json
+import os
+import pickle
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from liuyao_engine import SEXAGENARY_CYCLE
+from liuyao_archive import ArchiveWriter, ChartArchive, archive_info
+from liuyao_analytics import analyze_archive
+from liuyao_export import chart_record, chart_to_dict
+
+SAMPLE = 20000
+
+
+def make_rows(n, seed):
+    # liuyao_history.COLUMNS 順序的紀錄列，created_at 遞增
+    rng = random.Random(seed)
+    start = time.time() - 365 * 86400
+    for i in range(n):
+        lines = "".join(rng.choice("6789") for _ in range(6))
+        yield (
+            start + i * 10.0, "app", f"問題 {i}", lines, "", "", "", "指定干支曆", "(手動輸入)",
+            rng.choice(SEXAGENARY_CYCLE), rng.choice(SEXAGENARY_CYCLE), rng.choice(SEXAGENARY_CYCLE), "",
+        )
+
+def row_record(row):
+    _, _, question, lines, _, _, _, date_mode, west_date, *pillars = row
+    return chart_record([int(v) for v in lines], date_mode, west_date, *pillars, question)
+
+def _mb(size):
+    return f"{size / 1e6:,.1f} MB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="盤面封存檔效能量測")
+    parser.add_argument("-n", type=int, default=1_000_000, help="盤數")
+    parser.add_argument("--dir", default=None, help="輸出目錄 (預設暫存目錄，結束後刪除)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    base = args.dir or tempfile.mkdtemp(prefix="liuyao_archive_")
+    archive_path = os.path.join(base, "archive")
+    shutil.rmtree(archive_path, ignore_errors=True)
+    try:
+        t = time.perf_counter()
+        with ArchiveWriter(archive_path) as writer:
+            for row in make_rows(args.n, args.seed):
+                writer.append_row(row)
+        write_seconds = time.perf_counter() - t
+        archive_bytes = archive_info(archive_path)["bytes"]
+        print(f"封存檔寫入 ({args.n:,} 張)：{write_seconds:.2f} 秒，{_mb(archive_bytes)} ({archive_bytes / args.n:.1f} bytes/張)")
+
+        # 對照組：前 SAMPLE 張轉成 JSON Lines 與 pickle，依比例推估
+        sample = [row_record(row) for row in make_rows(min(args.n, SAMPLE), args.seed)]
+        scale = args.n / len(sample)
+        jsonl_path = os.path.join(base, "sample.jsonl")
+        with open(jsonl_path, "w", encoding="utf-8") as fp:
+            for record in sample:
+                fp.write(json.dumps(chart_to_dict(record), ensure_ascii=False) + "\n")
+        t = time.perf_counter()
+        with open(jsonl_path, encoding="utf-8") as fp:
+            loaded = [json.loads(line) for line in fp]
+        jsonl_load = (time.perf_counter() - t) * scale
+        print(f"JSON Lines (推估)：{_mb(os.path.getsize(jsonl_path) * scale)}，載入 {jsonl_load:.2f} 秒")
+
+        pickle_path = os.path.join(base, "sample.pickle")
+        with open(pickle_path, "wb") as fp:
+            pickle.dump(sample, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        t = time.perf_counter()
+        with open(pickle_path, "rb") as fp:
+            loaded = pickle.load(fp)
+        pickle_load = (time.perf_counter() - t) * scale
+        print(f"pickle (推估)：    {_mb(os.path.getsize(pickle_path) * scale)}，載入 {pickle_load:.2f} 秒")
+        del loaded, sample
+
+        t = time.perf_counter()
+        archive = ChartArchive(archive_path)
+        lines = archive.column("lines")
+        open_ms = (time.perf_counter() - t) * 1000
+        print(f"\n封存檔開啟 (memmap lines 欄)：{open_ms:.2f} ms")
+
+        t = time.perf_counter()
+        aggs = analyze_archive(archive)
+        print(f"全量統計 (lines + pillars 兩欄)：{time.perf_counter() - t:.2f} 秒，{aggs['charts']:,} 張")
+
+        created_at = archive.column("created_at")
+        mid = float(created_at[len(archive) // 2])
+        t = time.perf_counter()
+        start, stop = archive.time_range(mid, mid + 86400)
+        np.bincount(archive.column("palace")[start:stop], minlength=8)  # 該範圍的卦宮分布
+        print(f"時間範圍掃描 (一天，{stop - start:,} 張)：{(time.perf_counter() - t) * 1000:.2f} ms")
+
+        t = time.perf_counter()
+        for i in range(start, min(stop, start + 1000)):
+            archive.record(i)
+        print(f"還原盤面 dict：{(time.perf_counter() - t) / max(1, min(stop - start, 1000)) * 1e6:.1f} µs/張")
+        del lines, created_at, archive
+    finally:
+        if args.dir is None:
+            shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# ==============================================================================
+# 占卜紀錄效能：記錄延遲 (放入佇列)、批次寫入吞吐量、keyset 分頁查詢延遲
+# ==============================================================================
+# 用法：
+#   python benchmarks/bench_history.py                 # 5 萬筆，暫存資料庫
+#   python benchmarks/bench_history.py -n 200000 --db /tmp/history.db
+# 查詢項目同時列出 OFFSET 分頁作為對照：keyset 翻到深頁的耗時應與第一頁相近。
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from liuyao_engine import SEXAGENARY_CYCLE, cast_values
+from liuyao_export import chart_record
+from liuyao_history import HistoryStore, reading_row
+
+
+def make_rows(n, seed):
+    rng = random.Random(seed)
+    start = time.time() - 365 * 86400
+    records = {}
+    rows = []
+    for i in range(n):
+        values = cast_values(rng.randrange(4096))
+        gz_day = rng.choice(SEXAGENARY_CYCLE)
+        key = (tuple(values), gz_day)
+        if key not in records:
+            records[key] = chart_record(values, "指定干支曆", "(手動輸入)", "乙巳", "己丑", gz_day, "己酉", "測試")
+        rows.append(reading_row(records[key], "bench", start + i * 365 * 86400 / n))
+    return rows
+
+
+def _ms(seconds):
+    return f"{seconds * 1000:.3f} ms"
+
+
+def time_query(store, repeat=50, **kwargs):
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        store.query(**kwargs)
+        samples.append(time.perf_counter() - t)
+    return statistics.median(samples)
+
+
+def time_offset_query(store, offset, limit, repeat=50):
+    conn = store._reader()
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        conn.execute("SELECT * FROM readings ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?", (limit, offset)).fetchall()
+        samples.append(time.perf_counter() - t)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="占卜紀錄 (SQLite) 效能量測")
+    parser.add_argument("-n", type=int, default=50000, help="紀錄筆數")
+    parser.add_argument("--db", default=None, help="資料庫路徑 (預設為暫存檔，結束後刪除)")
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    tmpdir = None
+    path = args.db
+    if path is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmpdir.name, "history.db")
+
+    try:
+        rows = make_rows(args.n, args.seed)
+        store = HistoryStore(path)
+
+        # 1. 記錄：呼叫端只付出放入佇列的成本
+        latencies = []
+        t0 = time.perf_counter()
+        for row in rows:
+            t = time.perf_counter()
+            store.record_row(row)
+            latencies.append(time.perf_counter() - t)
+        store.flush()
+        elapsed = time.perf_counter() - t0
+        q = statistics.quantiles(latencies, n=100)
+        print(f"記錄 {args.n:,} 筆：每筆 p50 {q[49] * 1e6:.1f} µs，p99 {q[98] * 1e6:.1f} µs")
+        print(f"寫入完成 {elapsed:.2f} 秒 ({args.n / elapsed:,.0f} 筆/秒)，資料庫共 {store.count():,} 筆")
+
+        # 2. 分頁查詢
+        page = args.page_size
+        print(f"\n查詢 (每頁 {page} 筆，中位數)：")
+        print(f"  第一頁                {_ms(time_query(store, limit=page))}")
+
+        cursor = None
+        deep = min(1000, args.n // page - 1)
+        for _ in range(deep):
+            _, cursor = store.query(cursor, page)
+        print(f"  第 {deep + 1} 頁 keyset       {_ms(time_query(store, cursor=cursor, limit=page))}")
+        print(f"  第 {deep + 1} 頁 OFFSET       {_ms(time_offset_query(store, deep * page, page))}")
+
+        sample = rows[len(rows) // 2]
+        main_name, gz_day, palace = sample[4], sample[11], sample[6]
+        print(f"  篩選主卦 {main_name}      {_ms(time_query(store, limit=page, main=main_name))}")
+        print(f"  篩選日柱 {gz_day}          {_ms(time_query(store, limit=page, day=gz_day))}")
+        print(f"  篩選卦宮 {palace}            {_ms(time_query(store, limit=page, palace=palace))}")
+        print(f"  主卦 + 日柱           {_ms(time_query(store, limit=page, main=main_name, day=gz_day))}")
+        store.close()
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# ==============================================================================
+# 每次重跑的下行位元組：以 websocket 模擬一個瀏覽器，逐步操作並依元件種類統計 ForwardMsg 大小
+# ==============================================================================
+# 用法：
+#   python benchmarks/bench_payload.py                      # 自動啟動 streamlit (不記錄歷史)
+#   python benchmarks/bench_payload.py --app /tmp/old_app.py  # 比較其他版本的 app
+#
+# 步驟：首次執行、整頁重跑、改一爻 (fragment 重跑)、再改同一爻、改問題。
+# 每步列出總位元組與前幾大的訊息種類 (新元件以 el:<種類> 表示)；
+# 排盤檢視元件 (liuyao_view) 另列出差異內容：基準序號、片段數與有變動的片段索引。
+# websocket 用戶端、session 模擬與伺服器啟動沿用 load_test_sessions.py。
+# 位元組預算 (空差異、改問題、改一爻) 的自動檢查在 tests/test_view_payload.py。
+
+import argparse
+import asyncio
+import collections
+import os
+import sys
+
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_test_sessions import ROOT, Session, WebSocket, _free_port, spawn_server
+from liuyao_view import decode_patch
+
+# ==============================================================================
+# 1. 計量用 websocket
+# ==============================================================================
+
+class CountingWebSocket(WebSocket):
+    def __init__(self, reader, writer):
+        super().__init__(reader, writer)
+        self.sizes = collections.Counter()  # 訊息種類 -> 位元組
+        self.patches = []                   # (元件 key, 差異 dict, payload 位元組)
+
+    async def recv(self):
+        data = await super().recv()
+        fwd = ForwardMsg()
+        fwd.ParseFromString(data)
+        kind = fwd.WhichOneof("type")
+        if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+            element = fwd.delta.new_element
+            kind = f"el:{element.WhichOneof('type')}"
+            if element.WhichOneof("type") == "bidi_component" and element.bidi_component.bytes:
+                proto = element.bidi_component
+                self.patches.append((proto.id.rsplit("-", 1)[-1], decode_patch(proto.bytes), len(proto.bytes)))
+        self.sizes[kind] += len(data)
+        return data
+
+# ==============================================================================
+# 2. 操作步驟
+# ==============================================================================
+
+async def measure(host, port, top):
+    session = Session(await CountingWebSocket.connect(host, port, "/_stcore/stream"), "seed=0")
+    ws = session.ws
+
+    async def step(label, rerun):
+        ws.sizes.clear()
+        ws.patches.clear()
+        before = ws.bytes_received
+        await rerun
+        print(f"{label}：{ws.bytes_received - before:,} bytes")
+        print("    " + "  ".join(f"{k} {v:,}" for k, v in ws.sizes.most_common(top)))
+        for key, patch, size in ws.patches:
+            changed = [i for i, _ in patch["p"]]
+            base = "完整" if patch["b"] is None else f"差異 (基準 {patch['b']})"
+            print(f"    {key}：{base}，{len(changed)}/{patch['n']} 片段 {changed}，{size:,} bytes")
+
+    try:
+        await step("首次執行", session.rerun())
+        await step("整頁重跑", session.rerun())
+        line = session.widget("number_input", "三爻")
+        if line:
+            session.states[line[0]] = ("int_value", 9)
+            await step("改一爻", session.rerun(fragment_id=line[1]))
+            session.states[line[0]] = ("int_value", 6)
+            await step("再改同一爻", session.rerun(fragment_id=line[1]))
+        question = session.widget("text_input", "輸入問題")
+        if question:
+            session.states[question[0]] = ("string_value", "問工作")
+            await step("改問題", session.rerun(fragment_id=question[1]))
+    finally:
+        ws.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="每次重跑的下行位元組")
+    parser.add_argument("--app", default=os.path.join(ROOT, "liuyao_app.py"), help="要測的 app 腳本")
+    parser.add_argument("--top", type=int, default=6, help="每步列出的訊息種類數")
+    args = parser.parse_args(argv)
+
+    port = _free_port()
+    env = dict(os.environ, LIUYAO_HISTORY_DB="")
+    proc = spawn_server(os.path.abspath(args.app), port, env)
+    try:
+        asyncio.run(measure("127.0.0.1", port, args.top))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
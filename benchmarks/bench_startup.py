@@ -0,0 +1,129 @@
+# ==============================================================================
+# 冷啟動基準：各模組匯入時間 + 首次渲染時間 (time-to-first-render)
+# ==============================================================================
+# 用法：
+#   python benchmarks/bench_startup.py                 # 只報告
+#   python benchmarks/bench_startup.py --budget-import-ms 150 --budget-render-ms 1500
+# 每次量測都開新的 Python 子行程，確保是真正的冷啟動 (不吃 sys.modules 快取)。
+# 首次渲染以 streamlit.testing.v1.AppTest 在子行程內執行一次完整腳本為準，
+# 並檢查渲染後是否誤載入了應延遲匯入的重型模組 (lunar_python / pandas / numpy)。
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "liuyao_engine",
+    "liuyao_cache",
+    "liuyao_calendar",
+    "liuyao_render",
+    "streamlit",
+    "lunar_python",
+    "pandas",
+    "numpy",
+]
+
+# 預設 (西曆) 路徑首次渲染時不應載入的模組
+LAZY_MODULES = ["lunar_python", "pandas", "numpy"]
+
+_IMPORT_SNIPPET = """
+import time
+t = time.perf_counter()
+import {module}
+print(time.perf_counter() - t)
+"""
+
+_RENDER_SNIPPET = """
+import json, sys, time
+t = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t_import = time.perf_counter() - t
+at = AppTest.from_file({app!r}, default_timeout=60)
+t = time.perf_counter()
+at.run()
+t_render = time.perf_counter() - t
+print(json.dumps({{
+    "apptest_import": t_import,
+    "first_render": t_render,
+    "exception": [str(e.value) for e in at.exception],
+    "loaded": [m for m in {lazy!r} if m in sys.modules],
+}}))
+"""
+
+
+def _run(code):
+    proc = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "子行程失敗")
+    return proc.stdout.strip().splitlines()[-1]
+
+
+def bench_import(module, repeat):
+    samples = [float(_run(_IMPORT_SNIPPET.format(module=module))) for _ in range(repeat)]
+    return statistics.median(samples) * 1000
+
+
+def bench_first_render(repeat):
+    code = _RENDER_SNIPPET.format(app=os.path.join(ROOT, "liuyao_app.py"), lazy=LAZY_MODULES)
+    runs = [json.loads(_run(code)) for _ in range(repeat)]
+    return {
+        "first_render_ms": statistics.median(r["first_render"] for r in runs) * 1000,
+        "exception": runs[0]["exception"],
+        "loaded": runs[0]["loaded"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="六爻排盤冷啟動基準")
+    parser.add_argument("--repeat", type=int, default=5, help="每項量測次數 (取中位數)")
+    parser.add_argument("--budget-import-ms", type=float, default=None,
+                        help="liuyao_* 模組匯入時間上限 (毫秒)，超過則以非零狀態結束")
+    parser.add_argument("--budget-render-ms", type=float, default=None,
+                        help="首次渲染時間上限 (毫秒)，超過則以非零狀態結束")
+    parser.add_argument("--json", action="store_true", help="以 JSON 輸出結果")
+    args = parser.parse_args(argv)
+
+    imports = {}
+    for module in MODULES:
+        try:
+            imports[module] = bench_import(module, args.repeat)
+        except RuntimeError as e:
+            imports[module] = None
+            print(f"略過 {module}：{e}", file=sys.stderr)
+    render = bench_first_render(args.repeat)
+
+    failures = []
+    if args.budget_import_ms is not None:
+        for module, ms in imports.items():
+            if module.startswith("liuyao_") and ms is not None and ms > args.budget_import_ms:
+                failures.append(f"{module} 匯入 {ms:.1f} ms > {args.budget_import_ms:.0f} ms")
+    if args.budget_render_ms is not None and render["first_render_ms"] > args.budget_render_ms:
+        failures.append(f"首次渲染 {render['first_render_ms']:.1f} ms > {args.budget_render_ms:.0f} ms")
+    if render["exception"]:
+        failures.append(f"首次渲染發生例外：{render['exception']}")
+    if render["loaded"]:
+        failures.append(f"首次渲染載入了應延遲匯入的模組：{', '.join(render['loaded'])}")
+
+    if args.json:
+        print(json.dumps({"import_ms": imports, **render, "failures": failures}, ensure_ascii=False, indent=2))
+    else:
+        print(f"{'模組':<16}{'匯入 (ms, 中位數)':>18}")
+        for module, ms in imports.items():
+            print(f"{module:<16}{'—' if ms is None else f'{ms:.1f}':>18}")
+        print(f"\n首次渲染 (AppTest.run)：{render['first_render_ms']:.1f} ms")
+        print(f"延遲匯入模組已載入：{', '.join(render['loaded']) or '無'}")
+        for failure in failures:
+            print(f"✗ {failure}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
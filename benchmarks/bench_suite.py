@@ -0,0 +1,380 @@
+# ==============================================================================
+# 效能基準套件：涵蓋排盤、卦名查詢、旬空星煞、曆法轉換、HTML / 複製文字與整頁重跑
+# ==============================================================================
+# 用法：
+#   python benchmarks/bench_suite.py                  # 量測並與 baseline.json 比較
+#   python benchmarks/bench_suite.py --save           # 量測並更新 baseline.json
+#   python benchmarks/bench_suite.py -k render        # 只跑名稱含 render 的項目
+#   python benchmarks/bench_suite.py --threshold 0.3  # 慢於基準 30% 就算退步 (預設 50%)
+#
+# 每個基準項目是一個 setup 函式，回傳 (待量測的零參數函式, 每次呼叫包含的運算次數)；
+# setup 本身不計時。量測取 repeat 次中最快的一次，換算成每次運算的秒數。
+# 任一項目比基準慢超過 threshold 時以非零狀態結束。
+# 雜訊大的項目 (整頁 AppTest、NumPy 批次、次微秒查表) 取較多樣本，門檻一律相同；
+# 超過門檻的項目在整輪跑完後最多再量 --retries 輪取最快者，一段慢速時段不會讓整組失敗。
+# 主機會在快慢兩種狀態間切換 (可差一倍、持續數分鐘)：每個項目前後各量一段固定的純 Python
+# 校準工作，比較時把基準值乘上「本次校準時間 / 存基準時的校準時間」；前後校準不一致
+# (量測途中切換了狀態) 時重量該項目。
+# 基準值與機器有關：換機器或大改環境後請先以 --save 重建，再比較之後的修改。
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+BENCHMARKS = {}
+
+def benchmark(name, repeat=5):
+    def decorator(setup):
+        BENCHMARKS[name] = (setup, repeat)
+        return setup
+    return decorator
+
+# ==============================================================================
+# 1. 基準項目
+# ==============================================================================
+
+def _all_casts():
+    from liuyao_engine import cast_values
+    return [cast_values(idx) for idx in range(4096)]
+
+@benchmark("engine.calculate_hexagram[4096 casts x 10 stems]")
+def bench_calculate_hexagram():
+    from liuyao_engine import HEAVENLY_STEMS, calculate_hexagram
+    casts = _all_casts()
+
+    def run():
+        for stem in HEAVENLY_STEMS:
+            for values in casts:
+                calculate_hexagram(values, stem, "子")
+    return run, len(casts) * len(HEAVENLY_STEMS)
+
+@benchmark("engine.get_code_from_name[short]", repeat=10)
+def bench_code_from_short_name():
+    from liuyao_engine import FULL_TO_SHORT_MAP, get_code_from_name
+    names = list(FULL_TO_SHORT_MAP.values())
+
+    def run():
+        for name in names:
+            get_code_from_name(name)
+    return run, len(names)
+
+@benchmark("engine.get_code_from_name[full]", repeat=10)
+def bench_code_from_full_name():
+    from liuyao_engine import FULL_TO_SHORT_MAP, get_code_from_name
+    names = list(FULL_TO_SHORT_MAP.keys())
+
+    def run():
+        for name in names:
+            get_code_from_name(name)
+    return run, len(names)
+
+@benchmark("engine.get_code_from_name[variants]", repeat=10)
+def bench_code_from_variant_name():
+    from liuyao_engine import NAME_INDEX, get_code_from_name
+    names = [" 恒 ", "既济", "坎離", "水火", "风天小畜", "離下坎上"] + list(NAME_INDEX)[::8]
+
+    def run():
+        for name in names:
+            get_code_from_name(name)
+    return run, len(names)
+
+@benchmark("engine.suggest_hexagram_names[prefix]")
+def bench_suggest_hexagram_names():
+    from liuyao_engine import suggest_hexagram_names
+    prefixes = ["水", "火", "山", "天", "地", "風", "雷", "澤", "既", "未", "小", "大", "坎", "离"]
+
+    def run():
+        for prefix in prefixes:
+            suggest_hexagram_names(prefix)
+    return run, len(prefixes)
+
+@benchmark("engine.get_hexagram_name_by_code", repeat=10)
+def bench_hexagram_name_by_code():
+    from liuyao_engine import TRIGRAMS, get_hexagram_name_by_code
+    pairs = [(up, lo) for up in TRIGRAMS for lo in TRIGRAMS]
+
+    def run():
+        for up, lo in pairs:
+            get_hexagram_name_by_code(up, lo)
+    return run, len(pairs)
+
+@benchmark("render.voids_and_stars[60 days x 12 months]")
+def bench_voids_and_stars():
+    from liuyao_engine import SEXAGENARY_CYCLE, EARTHLY_BRANCHES
+    from liuyao_render import format_voids, get_star_lists
+    cases = [(month_branch, day[0], day[1]) for day in SEXAGENARY_CYCLE for month_branch in EARTHLY_BRANCHES]
+
+    def run():
+        for month_branch, day_stem, day_branch in cases:
+            format_voids(day_stem, day_branch)
+            get_star_lists(month_branch, day_stem, day_branch)
+    return run, len(cases)
+
+@benchmark("render.day_context[60 days x 12 months]", repeat=10)
+def bench_day_context():
+    from liuyao_engine import SEXAGENARY_CYCLE
+    from liuyao_render import day_context
+    # 月柱天干不影響結果，取各地支任一月柱即可
+    months = {gz[1]: gz for gz in SEXAGENARY_CYCLE}
+    cases = [(gz_month, day) for day in SEXAGENARY_CYCLE for gz_month in months.values()]
+
+    def run():
+        for gz_month, gz_day in cases:
+            day_context(gz_month, gz_day)
+    return run, len(cases)
+
+def _sample_datetimes(n, seed=0):
+    import random
+    rng = random.Random(seed)
+    start = datetime.datetime(1900, 1, 1)
+    span = (datetime.datetime(2100, 12, 31) - start).total_seconds()
+    return [start + datetime.timedelta(seconds=int(rng.random() * span)) for _ in range(n)]
+
+@benchmark("calendar.Solar.fromYmdHms[lunar_python]", repeat=3)
+def bench_solar_from_ymdhms():
+    from liuyao_calendar import lunar_ganzhi
+    dates = _sample_datetimes(20)
+
+    def run():
+        for d in dates:
+            lunar_ganzhi(d.year, d.month, d.day, d.hour, d.minute, d.second)
+    return run, len(dates)
+
+@benchmark("calendar.get_ganzhi[index]")
+def bench_get_ganzhi():
+    from liuyao_calendar import get_ganzhi
+    dates = _sample_datetimes(2000)
+
+    def run():
+        for d in dates:
+            get_ganzhi(d.year, d.month, d.day, d.hour, d.minute, d.second)
+    return run, len(dates)
+
+def _charts():
+    from liuyao_engine import HEAVENLY_STEMS, calculate_hexagram
+    return [(values, HEAVENLY_STEMS[i % 10], calculate_hexagram(values, HEAVENLY_STEMS[i % 10], "子")) for i, values in enumerate(_all_casts())]
+
+@benchmark("render.build_table_html[4096 casts]")
+def bench_build_table_html():
+    from reference_render import build_table_html
+    charts = _charts()
+
+    def run():
+        for _, _, chart in charts:
+            build_table_html(chart)
+    return run, len(charts)
+
+@benchmark("render.render_table_html[4096 casts]")
+def bench_render_table_html():
+    from reference_render import render_table_html
+    charts = _charts()
+    for values, stem, _ in charts:
+        render_table_html(values, stem)
+
+    def run():
+        for values, stem, _ in charts:
+            render_table_html(values, stem)
+    return run, len(charts)
+
+@benchmark("render.build_copy_text[4096 casts]")
+def bench_build_copy_text():
+    from liuyao_render import get_star_lists, iter_copy_text
+    charts = _charts()
+    row1, row2 = get_star_lists("寅", "甲", "子")
+    stars = row1 + row2
+
+    def run():
+        for _, _, chart in charts:
+            "".join(iter_copy_text("問題", "指定西曆", "2025/01/20 10:30", "甲辰", "丁丑", "乙未", "辛巳", "辰、巳", stars, chart))
+    return run, len(charts)
+
+@benchmark("analysis.judge_chart[4096 casts]")
+def bench_judge_chart():
+    from liuyao_engine import SEXAGENARY_CYCLE
+    from liuyao_analysis import judge_chart
+    cases = [(values, SEXAGENARY_CYCLE[i % 60], SEXAGENARY_CYCLE[(i * 7) % 60]) for i, values in enumerate(_all_casts())]
+
+    def run():
+        for values, gz_month, gz_day in cases:
+            judge_chart(values, gz_month, gz_day)
+    return run, len(cases)
+
+@benchmark("batch.judge_batch[100k charts]", repeat=10)
+def bench_judge_batch():
+    import numpy as np
+    from liuyao_batch import judge_batch
+    rng = np.random.default_rng(0)
+    n = 100_000
+    values = rng.integers(6, 10, (n, 6), dtype=np.int8)
+    months = rng.integers(0, 12, n, dtype=np.int8)
+    days = rng.integers(0, 60, n, dtype=np.int8)
+    return (lambda: judge_batch(values, months, days)), n
+
+# 每次呼叫都經過 script runner 執行緒、protobuf 與整頁元件，單核主機上抖動較大，多取樣本
+@benchmark("app.AppTest.run[full script]", repeat=15)
+def bench_apptest_run():
+    from streamlit.testing.v1 import AppTest
+    app_path = os.path.join(ROOT, "liuyao_app.py")
+    # 先跑一次讓模組匯入與查表建置不計入
+    AppTest.from_file(app_path, default_timeout=60).run()
+
+    def run():
+        at = AppTest.from_file(app_path, default_timeout=60)
+        at.session_state.init_date = datetime.date(2025, 1, 20)
+        at.session_state.init_time = datetime.time(10, 30)
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    return run, 1
+
+# ==============================================================================
+# 2. 量測與比較
+# ==============================================================================
+
+def measure(setup, repeat):
+    func, ops = setup()
+    # 自動決定每輪呼叫次數，使每輪至少約 0.2 秒
+    number = 1
+    while True:
+        elapsed = timeit.timeit(func, number=number)
+        if elapsed >= 0.2 or number >= 1000:
+            break
+        number *= 2 if elapsed > 0.05 else 10
+    best = min(timeit.repeat(func, number=number, repeat=repeat))
+    return best / (number * ops)
+
+def _calibration_work():
+    d = {}
+    for i in range(20000):
+        d[str(i)] = i * 3 % 7
+    return sum(d.values())
+
+def calibrate():
+    return min(timeit.repeat(_calibration_work, number=1, repeat=7))
+
+def measure_calibrated(setup, repeat, attempts=3):
+    # 回傳 (每次運算秒數, 量測前後校準時間的平均)；前後差超過 15% 表示途中主機換了狀態，重量
+    for _ in range(attempts):
+        before = calibrate()
+        seconds = measure(setup, repeat)
+        after = calibrate()
+        if abs(after / before - 1) <= 0.15:
+            break
+    return seconds, (before + after) / 2
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def _format_time(seconds):
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    if seconds >= 1e-6:
+        return f"{seconds * 1e6:.2f} µs"
+    return f"{seconds * 1e9:.0f} ns"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="六爻排盤效能基準套件")
+    parser.add_argument("-k", "--filter", default="", help="只跑名稱含此字串的項目")
+    parser.add_argument("--save", action="store_true", help="將結果寫入基準檔")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="基準檔路徑")
+    parser.add_argument("--threshold", type=float, default=0.5, help="容許的變慢比例 (預設 0.5 = 50%%)")
+    parser.add_argument("--retries", type=int, default=3, help="超過門檻時最多重量幾次 (預設 3)")
+    parser.add_argument("--list", action="store_true", help="只列出項目名稱")
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    if args.list:
+        print("\n".join(names))
+        return
+
+    baseline = load_baseline(args.baseline)
+    base_results = baseline["results"] if baseline else {}
+    base_calibration = baseline.get("calibration", {}) if baseline else {}
+    if baseline and not args.save and baseline.get("machine") != machine_info():
+        print(f"注意：基準檔來自不同環境 {baseline.get('machine')}，比較結果僅供參考", file=sys.stderr)
+
+    def expected(name):
+        # 基準值換算到本次量測時的主機速度；舊基準檔沒有校準值時直接比較
+        base = base_results.get(name)
+        if base and base_calibration.get(name):
+            return base * results[name][1] / base_calibration[name]
+        return base
+
+    def over(name):
+        base = expected(name)
+        return bool(base) and results[name][0] / base - 1 > args.threshold
+
+    def remeasure(name):
+        # 保留校準後最快者
+        setup, repeat = BENCHMARKS[name]
+        results[name] = min(results[name], measure_calibrated(setup, repeat), key=lambda r: r[0] / r[1])
+
+    results = {}
+    for name in names:
+        setup, repeat = BENCHMARKS[name]
+        results[name] = measure_calibrated(setup, repeat)
+    if args.save:
+        # 存基準時每個項目再量一輪，與比較時的重量同樣取最快者，基準不會偏寬
+        for name in names:
+            remeasure(name)
+    # 超過門檻的項目在整輪跑完後再量 (與第一次隔開一段時間，避開主機的慢速時段)
+    for _ in range(0 if args.save else args.retries):
+        suspects = [name for name in names if over(name)]
+        if not suspects:
+            break
+        for name in suspects:
+            remeasure(name)
+
+    regressions = []
+    width = max(len(name) for name in names)
+    print(f"{'項目':<{width - 2}}  {'每次':>8}  {'基準':>8}  變化")
+    for name in names:
+        seconds = results[name][0]
+        base = expected(name)
+        if base:
+            change = seconds / base - 1
+            flag = ""
+            if over(name):
+                flag = "  ✗ 退步"
+                regressions.append(name)
+            print(f"{name:<{width}}  {_format_time(seconds):>10}  {_format_time(base):>10}  {change:+.1%}{flag}")
+        else:
+            print(f"{name:<{width}}  {_format_time(seconds):>10}  {'—':>10}")
+
+    if args.save:
+        merged = dict(base_results)
+        merged.update((name, seconds) for name, (seconds, _) in results.items())
+        calibration = dict(base_calibration)
+        calibration.update((name, cal) for name, (_, cal) in results.items())
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"machine": machine_info(), "results": merged, "calibration": calibration},
+                      f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"\n已寫入基準檔：{args.baseline}")
+    elif regressions:
+        print(f"\n{len(regressions)} 個項目慢於基準超過 {args.threshold:.0%}：{', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
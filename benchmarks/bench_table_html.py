@@ -0,0 +1,55 @@
+# ==============================================================================
+# 微基準：排盤表格 HTML，逐行 f-string 串接 (build_table_html) vs 預先編譯片段 (render_table_html)
+# ==============================================================================
+# 用法：python benchmarks/bench_table_html.py [--number 20000]
+# 三組量測皆走遍 4096 種起卦 × 10 日干的循環輸入：
+#   inline        calculate_hexagram + build_table_html (原本每次重跑的路徑)
+#   inline-render 只量 build_table_html (排盤結果已算好)
+#   precompiled   render_table_html (模板已暖機)
+# 開跑前會先逐一確認兩者輸出逐位元組相同。
+
+import argparse
+import itertools
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from liuyao_engine import HEAVENLY_STEMS, cast_values, calculate_hexagram
+from reference_render import build_table_html, render_table_html
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="排盤表格 HTML 微基準")
+    parser.add_argument("--number", type=int, default=20000, help="每組呼叫次數")
+    parser.add_argument("--repeat", type=int, default=5, help="重複次數 (取最小值)")
+    args = parser.parse_args(argv)
+
+    cases = [(cast_values(idx), stem) for idx in range(4096) for stem in HEAVENLY_STEMS]
+    charts = [calculate_hexagram(values, stem, "") for values, stem in cases]
+
+    for (values, stem), chart in zip(cases, charts):
+        if render_table_html(values, stem) != build_table_html(chart):
+            sys.exit(f"輸出不一致：{values} {stem}")
+    print(f"輸出一致：{len(cases)} 組 (起卦 × 日干)")
+
+    def timed(label, func, inputs):
+        def run():
+            it = itertools.cycle(inputs)
+            for _ in range(args.number):
+                func(next(it))
+        best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        per_call = best / args.number * 1e6
+        print(f"{label:<14}{per_call:>10.2f} µs/次")
+        return per_call
+
+    inline = timed("inline", lambda case: build_table_html(calculate_hexagram(case[0], case[1], "")), cases)
+    inline_render = timed("inline-render", build_table_html, charts)
+    precompiled = timed("precompiled", lambda case: render_table_html(*case), cases)
+    print(f"\n加速：相對 inline {inline / precompiled:.1f}x，相對 inline-render {inline_render / precompiled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
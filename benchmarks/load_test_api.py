@@ -0,0 +1,156 @@
+# ==============================================================================
+# HTTP API 壓力測試：併發 keep-alive 連線，回報 p50 / p99 延遲與每秒請求數
+# ==============================================================================
+# 用法：
+#   python benchmarks/load_test_api.py --spawn                      # 自動啟動 uvicorn 再測
+#   python benchmarks/load_test_api.py --url http://127.0.0.1:8000  # 測已啟動的服務
+#   python benchmarks/load_test_api.py --spawn --workers 4 --concurrency 64 --duration 10
+# 只用標準庫 asyncio 實作最小的 HTTP/1.1 用戶端，不需額外安裝套件。
+# 請求內容為隨機起卦 × 隨機西曆時間 (1900~2100)，混合 /chart、/copy-text、/hexagram。
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEX_NAMES = ["乾", "坤", "屯", "蒙", "需", "訟", "師", "比", "泰", "否", "既濟", "未濟"]
+
+
+def make_requests(n, seed):
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(n):
+        kind = rng.random()
+        if kind < 0.1:
+            name = urllib.parse.quote(rng.choice(HEX_NAMES))
+            requests.append(("GET", f"/hexagram/{name}", b""))
+            continue
+        body = {
+            "lines": [rng.choice((6, 7, 8, 9)) for _ in range(6)],
+            "datetime": f"{rng.randrange(1900, 2100)}-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}T{rng.randrange(24):02d}:{rng.randrange(60):02d}",
+            "question": "測試",
+        }
+        path = "/chart" if kind < 0.7 else "/copy-text"
+        requests.append(("POST", path, json.dumps(body, ensure_ascii=False).encode("utf-8")))
+    return requests
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("連線已關閉")
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def worker(host, port, requests, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            method, path, body = requests[i % len(requests)]
+            i += 1
+            head = f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+            t = time.perf_counter()
+            writer.write(head.encode("ascii") + body)
+            await writer.drain()
+            status = await _read_response(reader)
+            latencies.append(time.perf_counter() - t)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, concurrency, duration, requests):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    # 每條連線從不同位置開始輪播請求
+    chunk = max(1, len(requests) // concurrency)
+    await asyncio.gather(*(
+        worker(host, port, requests[k * chunk:] + requests[:k * chunk], deadline, latencies, errors)
+        for k in range(concurrency)
+    ))
+    return latencies, errors, time.perf_counter() - start
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(port, workers):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "liuyao_api:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT,
+    )
+    url = f"http://127.0.0.1:{port}/health"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("uvicorn 未能在 10 秒內啟動")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="六爻排盤 HTTP API 壓力測試")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--spawn", action="store_true", help="自動啟動 uvicorn (隨機埠號)")
+    parser.add_argument("--workers", type=int, default=1, help="--spawn 時的 uvicorn worker 數")
+    parser.add_argument("--concurrency", type=int, default=32, help="併發連線數")
+    parser.add_argument("--duration", type=float, default=5.0, help="測試秒數")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    proc = None
+    if args.spawn:
+        port = _free_port()
+        proc = spawn_server(port, args.workers)
+        host = "127.0.0.1"
+    else:
+        parsed = urllib.parse.urlsplit(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+
+    try:
+        requests = make_requests(4096, args.seed)
+        latencies, errors, elapsed = asyncio.run(run_load(host, port, args.concurrency, args.duration, requests))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    latencies.sort()
+    q = statistics.quantiles(latencies, n=100)
+    print(f"請求數：{len(latencies)} ({len(errors)} 個非 200)，{args.concurrency} 連線，{elapsed:.1f} 秒")
+    print(f"吞吐量：{len(latencies) / elapsed:,.0f} req/s")
+    print(f"延遲：p50 {q[49] * 1000:.2f} ms，p99 {q[98] * 1000:.2f} ms，max {latencies[-1] * 1000:.2f} ms")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+# ==============================================================================
+# 多 session 壓力測試：以 websocket 模擬 N 個同時連線的瀏覽器，回報重跑延遲與每 session 記憶體
+# ==============================================================================
+# 用法：
+#   python benchmarks/load_test_sessions.py --spawn                     # 自動啟動 streamlit 再測
+#   python benchmarks/load_test_sessions.py --spawn --sessions 50 --reruns 20
+#   python benchmarks/load_test_sessions.py --url http://127.0.0.1:8501 # 測已啟動的服務 (不量記憶體)
+#   python benchmarks/load_test_sessions.py --spawn --app /tmp/old_app.py  # 比較其他版本的 app
+#   python benchmarks/load_test_sessions.py --spawn --reconnect 5       # 每 5 次互動斷線重連
+#
+# 每個模擬 session 與瀏覽器相同：連上 /_stcore/stream，送出 rerun_script (protobuf BackMsg)，
+# 收 ForwardMsg 直到 script_finished。首次執行後依收到的元件建立 widget id 對照，
+# 之後隨機改爻、改問題、按「自動擲錢」，並依元件所在的 fragment 送出 fragment 重跑 (同前端行為)。
+# 延遲 = 送出 BackMsg 到收到 script_finished。
+# 記憶體：--spawn 時讀取伺服器行程的 VmRSS，N 個 session 完成首次執行後與只有一個暖機 session 時相減再除以 N。
+# 重連：與瀏覽器相同，依 page_info_changed 更新網址參數 (永久連結 ?r=...)，斷線後以最新網址開新 session，
+# 比對新 session 的複製文字與斷線前是否相同 (模擬被負載平衡器導到另一台伺服器、session 狀態全失)。
+# 只用標準庫 asyncio 實作最小的 websocket 用戶端 (RFC 6455)，protobuf 訊息使用 streamlit 內附的定義。
+
+import argparse
+import asyncio
+import base64
+import os
+import random
+import socket
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from liuyao_view import apply_patch, decode_patch
+
+FINISHED_OK = (ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY)
+FINISHED_ERROR = (ForwardMsg.FINISHED_WITH_COMPILE_ERROR,)
+
+# ==============================================================================
+# 1. 最小 websocket 用戶端
+# ==============================================================================
+
+class WebSocket:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.bytes_received = 0
+
+    @classmethod
+    async def connect(cls, host, port, path):
+        reader, writer = await asyncio.open_connection(host, port)
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        writer.write((
+            f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\nSec-WebSocket-Protocol: streamlit\r\n\r\n"
+        ).encode("ascii"))
+        await writer.drain()
+        status = await reader.readline()
+        if b" 101 " not in status:
+            raise ConnectionError(f"websocket 握手失敗：{status!r}")
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        return cls(reader, writer)
+
+    async def send(self, payload, opcode=0x2):
+        mask = os.urandom(4)
+        n = len(payload)
+        if n < 126:
+            head = struct.pack("!BB", 0x80 | opcode, 0x80 | n)
+        elif n < 1 << 16:
+            head = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, n)
+        else:
+            head = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, n)
+        keys = (mask * (n // 4 + 1))[:n]
+        masked = (int.from_bytes(payload, "big") ^ int.from_bytes(keys, "big")).to_bytes(n, "big") if n else b""
+        self.writer.write(head + mask + masked)
+        await self.writer.drain()
+
+    async def recv(self):
+        # 回傳一則完整的 binary 訊息；自動回應 ping、合併分段
+        chunks = []
+        while True:
+            b1, b2 = await self.reader.readexactly(2)
+            opcode = b1 & 0x0F
+            n = b2 & 0x7F
+            if n == 126:
+                n = struct.unpack("!H", await self.reader.readexactly(2))[0]
+            elif n == 127:
+                n = struct.unpack("!Q", await self.reader.readexactly(8))[0]
+            payload = await self.reader.readexactly(n)
+            self.bytes_received += n
+            if opcode == 0x9:
+                await self.send(payload, opcode=0xA)
+                continue
+            if opcode == 0x8:
+                raise ConnectionError("伺服器關閉連線")
+            if opcode == 0xA:
+                continue
+            chunks.append(payload)
+            if b1 & 0x80:
+                return b"".join(chunks)
+
+    def close(self):
+        self.writer.close()
+
+# ==============================================================================
+# 2. 模擬 session
+# ==============================================================================
+
+class Session:
+    def __init__(self, ws, query_string=""):
+        self.ws = ws
+        self.query_string = query_string
+        self.widgets = {}        # (元件種類, 標籤) -> (widget id, fragment id)
+        self.states = {}         # widget id -> WidgetState 欄位設定 (field, value)
+        self.latencies = []
+        self.copy_text = None
+        self.copy_view = {}      # 複製文字元件 (liuyao_view) 的片段，依收到的差異還原
+        self.bytes_closed = 0    # 已關閉連線的下行位元組
+        self.reconnects = 0
+        self.restored = 0        # 重連後複製文字與斷線前相同的次數
+
+    @property
+    def bytes_received(self):
+        return self.bytes_closed + self.ws.bytes_received
+
+    async def rerun(self, triggers=(), fragment_id=""):
+        msg = BackMsg()
+        client_state = msg.rerun_script
+        client_state.query_string = self.query_string
+        if fragment_id:
+            client_state.fragment_id = fragment_id
+        for widget_id, (field, value) in self.states.items():
+            state = client_state.widget_states.widgets.add()
+            state.id = widget_id
+            setattr(state, field, value)
+        for widget_id in triggers:
+            state = client_state.widget_states.widgets.add()
+            state.id = widget_id
+            state.trigger_value = True
+
+        t = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await self.ws.recv())
+            kind = fwd.WhichOneof("type")
+            if kind == "delta":
+                self._collect_widget(fwd.delta)
+            elif kind == "page_info_changed":
+                self.query_string = fwd.page_info_changed.query_string
+            elif kind == "script_finished":
+                if fwd.script_finished in FINISHED_OK:
+                    break
+                if fwd.script_finished in FINISHED_ERROR:
+                    raise RuntimeError("app 編譯失敗")
+        self.latencies.append(time.perf_counter() - t)
+
+    def _collect_widget(self, delta):
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        if kind is None:
+            return
+        proto = getattr(element, kind)
+        if kind == "code":
+            self.copy_text = proto.code_text
+        elif kind == "bidi_component" and proto.id.endswith("copy_view") and proto.bytes:
+            if apply_patch(self.copy_view, decode_patch(proto.bytes)):
+                self.copy_text = "".join(self.copy_view["parts"])
+        widget_id = getattr(proto, "id", "")
+        if widget_id:
+            self.widgets[(kind, getattr(proto, "label", ""))] = (widget_id, delta.fragment_id)
+
+    async def reconnect(self, host, port):
+        # 關閉連線後以目前網址開新 session (widget 狀態全部重來)，首次執行不計入互動延遲
+        before = self.copy_text
+        self.ws.close()
+        self.bytes_closed += self.ws.bytes_received
+        self.ws = await WebSocket.connect(host, port, "/_stcore/stream")
+        self.widgets, self.states, self.copy_text, self.copy_view = {}, {}, None, {}
+        await self.rerun()
+        self.latencies.pop()
+        self.reconnects += 1
+        self.restored += self.copy_text == before
+
+    def widget(self, kind, label):
+        return self.widgets.get((kind, label))
+
+    async def interact(self, rng):
+        # 隨機一個使用者動作：改某一爻 (50%)、改問題 (25%)、自動擲錢 (25%)
+        action = rng.random()
+        if action < 0.5:
+            target = self.widget("number_input", rng.choice(["初爻", "二爻", "三爻", "四爻", "五爻", "上爻"]))
+            if target:
+                self.states[target[0]] = ("int_value", rng.choice((6, 7, 8, 9)))
+                return await self.rerun(fragment_id=target[1])
+        elif action < 0.75:
+            target = self.widget("text_input", "輸入問題")
+            if target:
+                self.states[target[0]] = ("string_value", f"問題 {rng.randrange(1000)}")
+                return await self.rerun(fragment_id=target[1])
+        else:
+            target = self.widget("button", "🎲 自動擲錢")
+            if target:
+                return await self.rerun(triggers=(target[0],), fragment_id=target[1])
+        await self.rerun()
+
+# ==============================================================================
+# 3. 伺服器與量測
+# ==============================================================================
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def spawn_server(app, port, env):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", app, "--server.headless", "true", "--server.port", str(port),
+         "--server.address", "127.0.0.1", "--browser.gatherUsageStats", "false", "--server.fileWatcherType", "none"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}/_stcore/health"
+    for _ in range(300):
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("streamlit 未能在 30 秒內啟動")
+
+def rss_kb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+async def open_session(host, port, query_string):
+    session = Session(await WebSocket.connect(host, port, "/_stcore/stream"), query_string)
+    await session.rerun()
+    return session
+
+async def run_sessions(host, port, args, pid):
+    query_string = f"seed={args.seed}"
+    # 暖機 session：讓模組匯入、查表與快取建置不計入每 session 的記憶體
+    warm = await open_session(host, port, query_string)
+    for _ in range(3):
+        await warm.interact(random.Random(args.seed))
+    await asyncio.sleep(0.5)
+    rss_before = rss_kb(pid) if pid else None
+
+    t = time.perf_counter()
+    sessions = await asyncio.gather(*(open_session(host, port, query_string) for _ in range(args.sessions)))
+    connect_seconds = time.perf_counter() - t
+    await asyncio.sleep(0.5)
+    rss_after = rss_kb(pid) if pid else None
+
+    async def drive(session, k):
+        rng = random.Random(args.seed * 1000 + k)
+        for i in range(args.reruns):
+            if args.think_time:
+                await asyncio.sleep(rng.uniform(0, 2 * args.think_time))
+            await session.interact(rng)
+            if args.reconnect and (i + 1) % args.reconnect == 0:
+                await session.reconnect(host, port)
+
+    t = time.perf_counter()
+    await asyncio.gather(*(drive(session, k) for k, session in enumerate(sessions)))
+    drive_seconds = time.perf_counter() - t
+    rss_end = rss_kb(pid) if pid else None
+
+    for session in sessions + [warm]:
+        session.ws.close()
+    return {
+        "first_run": [s.latencies[0] for s in sessions],
+        "reruns": [lat for s in sessions for lat in s.latencies[1:]],
+        "bytes": sum(s.bytes_received for s in sessions),
+        "reconnects": sum(s.reconnects for s in sessions),
+        "restored": sum(s.restored for s in sessions),
+        "query_length": statistics.mean(len(s.query_string) for s in sessions),
+        "connect_seconds": connect_seconds,
+        "drive_seconds": drive_seconds,
+        "rss": (rss_before, rss_after, rss_end),
+    }
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    if len(samples) < 2:
+        return samples * 3 if samples else [0.0] * 3
+    q = statistics.quantiles(samples, n=100, method="inclusive")
+    return q[49], q[98], samples[-1]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="六爻排盤 Streamlit 多 session 壓力測試")
+    parser.add_argument("--url", default="http://127.0.0.1:8501")
+    parser.add_argument("--spawn", action="store_true", help="自動啟動 streamlit (隨機埠號)，並量測伺服器記憶體")
+    parser.add_argument("--app", default=os.path.join(ROOT, "liuyao_app.py"), help="--spawn 時的 app 腳本")
+    parser.add_argument("--sessions", type=int, default=20, help="同時連線的 session 數")
+    parser.add_argument("--reruns", type=int, default=10, help="每個 session 的互動次數")
+    parser.add_argument("--think-time", type=float, default=0.0, help="每次互動前平均等待秒數")
+    parser.add_argument("--reconnect", type=int, default=0, help="每 N 次互動斷線並以目前網址重連 (0 = 不重連)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    proc = None
+    tmpdir = None
+    if args.spawn:
+        # 占卜紀錄寫到暫存資料庫，不污染預設的 data/liuyao_history.db
+        tmpdir = tempfile.TemporaryDirectory()
+        env = dict(os.environ, LIUYAO_HISTORY_DB=os.path.join(tmpdir.name, "history.db"))
+        port = _free_port()
+        proc = spawn_server(os.path.abspath(args.app), port, env)
+        host = "127.0.0.1"
+    else:
+        parsed = urllib.parse.urlsplit(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+
+    try:
+        result = asyncio.run(run_sessions(host, port, args, proc.pid if proc else None))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    reruns = result["reruns"]
+    print(f"{args.sessions} 個 session，各 {args.reruns} 次互動，共 {len(reruns)} 次重跑，{result['drive_seconds']:.1f} 秒")
+    p50, p99, worst = _percentiles(result["first_run"])
+    print(f"首次執行：p50 {p50 * 1000:.1f} ms，p99 {p99 * 1000:.1f} ms，max {worst * 1000:.1f} ms (同時連線 {result['connect_seconds']:.2f} 秒)")
+    p50, p99, worst = _percentiles(reruns)
+    print(f"互動重跑：p50 {p50 * 1000:.1f} ms，p99 {p99 * 1000:.1f} ms，max {worst * 1000:.1f} ms，{len(reruns) / result['drive_seconds']:,.0f} 次/秒")
+    print(f"每 session 下行：{result['bytes'] / args.sessions / 1024:,.1f} KiB，網址參數平均 {result['query_length']:.0f} 字元")
+    if result["reconnects"]:
+        print(f"斷線重連 {result['reconnects']} 次，以網址還原出相同盤面 {result['restored']} 次")
+    rss_before, rss_after, rss_end = result["rss"]
+    if rss_before:
+        print(f"伺服器記憶體：暖機後 {rss_before / 1024:,.1f} MiB，{args.sessions} 個 session 後 {rss_after / 1024:,.1f} MiB，"
+              f"互動後 {rss_end / 1024:,.1f} MiB")
+        print(f"每 session：{(rss_after - rss_before) / args.sessions:,.0f} KiB (首次執行後)，"
+              f"{(rss_end - rss_before) / args.sessions:,.0f} KiB (互動後)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# ==============================================================================
+# 排盤表格的參考實作：逐行 f-string 串接 (改用預先編譯片段前的寫法)，只供基準測試比對與計時
+# ==============================================================================
+# 頁面實際走 liuyao_render 的預先編譯片段 (render_table_parts)；兩者輸出須逐位元組相同，
+# bench_table_html.py 開跑前會逐一確認。
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from liuyao_engine import LIU_SHEN_START
+from liuyao_render import _table_parts, make_tags_str
+
+
+def build_table_html(chart):
+    m_name, c_name, palace, lines_data, p_el, m_attrs, c_attrs, c_palace = chart
+    has_moving = any(line["move"] for line in lines_data)
+
+    m_tags_str = make_tags_str(m_attrs)
+    m_header_content = f"""<span class="hex-title-text">{palace}宮：{m_name} {m_tags_str}</span><span>【主卦】</span>"""
+
+    c_tags_str = make_tags_str(c_attrs)
+    if has_moving:
+        c_header_content = f"""<span class="hex-title-text">{c_palace}宮：{c_name} {c_tags_str}</span><span>【變卦】</span>"""
+    else:
+        c_header_content = f"""<span class="hex-title-text">&nbsp;</span><span>【變卦】</span>"""
+
+    # UI 表格
+    table_html = f"""<table class="hex-table">
+<tr class="header-row">
+<td width="6%">六神</td>
+<td width="6%">藏伏</td>
+<td width="27%" class="td-main">{m_header_content}</td>
+<td width="8%" class="td-arrow"></td>
+<td width="27%" class="td-change">{c_header_content}</td>
+<td width="13%" class="small-text">主卦納音</td>
+<td width="13%" class="small-text">變卦納音</td>
+</tr>"""
+
+    for i in range(5, -1, -1):
+        line = lines_data[i]
+        m = line["main"]
+        c = line["change"]
+
+        m_bar_cls = "bar-yang" if m["type"] == "yang" else "bar-yin"
+
+        move_indicator = ""
+        if line["move"]:
+            if m["type"] == "yang":
+                move_indicator = '<span class="move-mark">O ---&gt;</span>'
+            else:
+                move_indicator = '<span class="move-mark">X ---&gt;</span>'
+
+        m_nayin_short = m["nayin"][-3:] if m["nayin"] else ""
+        c_nayin_short = ""
+        c_cell_content = ""
+
+        if has_moving:
+            c_bar_cls = "bar-yang bar-yang-c" if c["type"] == "yang" else "bar-yin bar-yin-c"
+            c_cell_content = f"""<div class="yao-cell">
+<div class="{c_bar_cls}"></div>
+<div class="yao-change">{c['rel']}{c['branch']}{c['el']}</div>
+</div>"""
+            c_nayin_short = c["nayin"][-3:] if c["nayin"] else ""
+
+        main_cell = f"""<div class="yao-cell">
+<div class="yao-main">{m['rel']}{m['branch']}{m['el']}</div>
+<div class="{m_bar_cls}"></div>
+<div class="yao-shiying">{m['shiying']}</div>
+</div>"""
+
+        row = f"""<tr>
+<td class="small-text">{line['god']}</td>
+<td class="small-text fine-text">{line['hidden']}</td>
+<td class="td-main">{main_cell}</td>
+<td class="td-arrow">{move_indicator}</td>
+<td class="td-change">{c_cell_content}</td>
+<td class="small-text fine-text">{m_nayin_short}</td>
+<td class="small-text fine-text">{c_nayin_short}</td>
+</tr>"""
+        table_html += row
+
+    table_html += "</table>"
+    return table_html
+
+def render_table_html(values, day_stem):
+    # 預先編譯片段版 (不含判讀欄)，與 build_table_html(calculate_hexagram(values, day_stem, ...)) 輸出相同
+    return "".join(_table_parts(values, LIU_SHEN_START.get(day_stem, 0)))
@@ -0,0 +1,230 @@
+# ==============================================================================
+# 生剋沖合分析：月建、日辰對各爻的沖合刑、生剋、十二長生，旬空、暗動、回頭生剋與爻間沖合
+# ==============================================================================
+# 地支 12×12、五行 5×5 的關係於載入時建成位元遮罩表 (BRANCH_RELATIONS / ELEMENT_RELATION_MASKS)，
+# 各種判讀文字也依 (月建或日辰, 爻支) 預先組好，逐爻判斷只做幾次查表。
+# 關係一律以「a 對 b」表示：a 為月建、日辰或變爻，b 為被判斷的主卦爻。
+# 批次運算 (NumPy) 見 liuyao_batch.judge_batch。
+
+from collections import namedtuple
+
+from liuyao_engine import EARTHLY_BRANCHES, FIVE_ELEMENTS, BRANCH_ELEMENTS, SEXAGENARY_CYCLE, CAST_TABLE, cast_index
+
+# ==============================================================================
+# 1. 關係位元與查表
+# ==============================================================================
+
+# 地支關係
+SAME_BRANCH = 1 << 0   # 同支 (臨月、臨日)
+CLASH = 1 << 1         # 六沖
+HARMONY = 1 << 2       # 六合
+TRINE = 1 << 3         # 同屬一個三合局
+PUNISH = 1 << 4        # 相刑 (子卯、寅巳申、丑戌未；自刑見 SELF_PUNISH)
+SELF_PUNISH = 1 << 5   # 自刑 (辰午酉亥)
+# 五行關係
+SAME_ELEMENT = 1 << 6  # 比和
+GENERATES = 1 << 7     # a 生 b
+CONTROLS = 1 << 8      # a 剋 b
+GENERATED = 1 << 9     # b 生 a (a 洩 b 之氣)
+CONTROLLED = 1 << 10   # b 剋 a
+
+RELATION_LABELS = {
+    SAME_BRANCH: "同支", CLASH: "沖", HARMONY: "合", TRINE: "三合", PUNISH: "刑", SELF_PUNISH: "自刑",
+    SAME_ELEMENT: "比和", GENERATES: "生", CONTROLS: "剋", GENERATED: "洩", CONTROLLED: "耗",
+}
+
+GENERATION = {"木": "火", "火": "土", "土": "金", "金": "水", "水": "木"}
+CONTROL = {"木": "土", "土": "水", "水": "火", "火": "金", "金": "木"}
+
+BRANCH_IDS = {b: i for i, b in enumerate(EARTHLY_BRANCHES)}
+ELEMENT_IDS = {e: i for i, e in enumerate(FIVE_ELEMENTS)}
+BRANCH_ELEMENT_IDS = tuple(ELEMENT_IDS[BRANCH_ELEMENTS[b]] for b in EARTHLY_BRANCHES)
+
+# 三合局：地支編號 % 4 相同者同局 (申子辰、巳酉丑、寅午戌、亥卯未)
+TRINES = {0: ("申子辰", "水"), 1: ("巳酉丑", "金"), 2: ("寅午戌", "火"), 3: ("亥卯未", "木")}
+_PUNISH_GROUPS = ("子卯", "寅巳申", "丑戌未")
+_SELF_PUNISH = "辰午酉亥"
+
+def _element_mask(a, b):
+    if a == b: return SAME_ELEMENT
+    if GENERATION[a] == b: return GENERATES
+    if CONTROL[a] == b: return CONTROLS
+    if GENERATION[b] == a: return GENERATED
+    return CONTROLLED
+
+def _branch_mask(a, b):
+    i, j = BRANCH_IDS[a], BRANCH_IDS[b]
+    mask = _element_mask(BRANCH_ELEMENTS[a], BRANCH_ELEMENTS[b])
+    if i == j:
+        mask |= SAME_BRANCH
+        if a in _SELF_PUNISH: mask |= SELF_PUNISH
+        return mask
+    if (j - i) % 12 == 6: mask |= CLASH
+    if (i + j) % 12 == 1: mask |= HARMONY
+    if i % 4 == j % 4: mask |= TRINE
+    if any(a in group and b in group for group in _PUNISH_GROUPS): mask |= PUNISH
+    return mask
+
+# 五行編號 × 五行編號 -> 關係遮罩
+ELEMENT_RELATION_MASKS = tuple(tuple(_element_mask(a, b) for b in FIVE_ELEMENTS) for a in FIVE_ELEMENTS)
+
+# 地支編號 × 地支編號 -> 關係遮罩 (含兩支五行的關係)
+BRANCH_RELATIONS = tuple(tuple(_branch_mask(a, b) for b in EARTHLY_BRANCHES) for a in EARTHLY_BRANCHES)
+
+def relation(a, b):
+    # 地支 a 對地支 b 的關係遮罩，如 relation("午", "子") & CLASH
+    return BRANCH_RELATIONS[BRANCH_IDS[a]][BRANCH_IDS[b]]
+
+def relation_labels(mask):
+    return [label for bit, label in RELATION_LABELS.items() if mask & bit]
+
+# ------------------------------------------------------------------------------
+# 十二長生：五行 -> 長生之支，依地支順行 (六爻以水土同長生於申)
+# ------------------------------------------------------------------------------
+
+TWELVE_STAGES = ["長生", "沐浴", "冠帶", "臨官", "帝旺", "衰", "病", "死", "墓", "絕", "胎", "養"]
+STAGE_START = {"金": "巳", "木": "亥", "水": "申", "火": "寅", "土": "申"}
+
+# 五行編號 × 地支編號 -> 十二長生編號
+ELEMENT_STAGES = tuple(
+    tuple((j - BRANCH_IDS[STAGE_START[el]]) % 12 for j in range(12))
+    for el in FIVE_ELEMENTS
+)
+
+# 日辰上的生、旺、墓、絕另標於判讀
+DAY_STAGE_TAGS = {0: "日長生", 4: "日帝旺", 8: "入日墓", 9: "日絕"}
+
+# ------------------------------------------------------------------------------
+# 旬空：六十甲子 -> 所在旬的兩個空亡地支編號
+# ------------------------------------------------------------------------------
+
+XUN_VOIDS = {
+    gz: ((i - i % 10 + 10) % 12, (i - i % 10 + 11) % 12)
+    for i, gz in enumerate(SEXAGENARY_CYCLE)
+}
+
+# ==============================================================================
+# 2. 判讀文字表
+# ==============================================================================
+# 旺相：月建與爻同支、同五行 (旺) 或生爻 (相)。靜爻逢日沖，旺相為暗動、休囚為日破。
+
+def _is_strong(mask):
+    return bool(mask & (SAME_BRANCH | SAME_ELEMENT | GENERATES))
+
+def _element_tag(prefix, mask):
+    if mask & SAME_ELEMENT: return (f"{prefix}扶",)
+    if mask & GENERATES: return (f"{prefix}生",)
+    if mask & CONTROLS: return (f"{prefix}剋",)
+    return ()
+
+def _month_tags(mask):
+    if mask & SAME_BRANCH: return ("臨月",)
+    if mask & CLASH: return ("月破",)
+    tags = ("月合",) if mask & HARMONY else ()
+    tags += _element_tag("月", mask)
+    if mask & PUNISH: tags += ("月刑",)
+    return tags
+
+# 日辰對爻的狀態：動爻 / 旺相靜爻 / 休囚靜爻
+DAY_MOVING, DAY_STATIC_STRONG, DAY_STATIC_WEAK = range(3)
+
+def _day_tags(mask, state):
+    if mask & SAME_BRANCH: return ("臨日",)
+    if mask & CLASH:
+        return (("日沖",), ("暗動",), ("日破",))[state]
+    tags = ("日合",) if mask & HARMONY else ()
+    tags += _element_tag("日", mask)
+    if mask & PUNISH: tags += ("日刑",)
+    return tags
+
+def _back_tags(mask):
+    # 動爻化出的變爻對本爻
+    tags = ()
+    if mask & GENERATES: tags += ("回頭生",)
+    if mask & CONTROLS: tags += ("回頭剋",)
+    if mask & CLASH: tags += ("回頭沖",)
+    if mask & HARMONY: tags += ("回頭合",)
+    return tags
+
+MONTH_STRONG = tuple(tuple(_is_strong(mask) for mask in row) for row in BRANCH_RELATIONS)
+MONTH_TAGS = tuple(tuple(_month_tags(mask) for mask in row) for row in BRANCH_RELATIONS)
+DAY_TAGS = tuple(tuple(tuple(_day_tags(mask, state) for state in range(3)) for mask in row) for row in BRANCH_RELATIONS)
+BACK_TAGS = tuple(tuple(_back_tags(mask) for mask in row) for row in BRANCH_RELATIONS)
+
+# ==============================================================================
+# 3. 單張盤判讀
+# ==============================================================================
+
+# 主卦一爻的判讀：month / day / back 為月建、日辰、變爻對本爻的關係遮罩 (靜爻 back 為 0)，
+# month_stage / day_stage 為本爻五行在月建、日辰的十二長生，tags 為顯示用的判讀文字
+LineJudgement = namedtuple("LineJudgement", ["month", "day", "back", "void", "month_stage", "day_stage", "tags"])
+
+LINE_POSITIONS = ["初爻", "二爻", "三爻", "四爻", "五爻", "上爻"]
+
+# 起卦索引 -> 爻間沖合文字 (只與起卦有關，首次使用時建立)
+_CAST_LINKS = [None] * 4096
+
+def _build_links(idx):
+    lines = CAST_TABLE[idx][3]
+    branches = [BRANCH_IDS[m["branch"]] for _, m, _, _ in lines]
+    moves = [move for _, _, _, move in lines]
+    links = []
+    # 兩爻相沖、相合：至少一爻發動才成立
+    for i in range(6):
+        for j in range(i + 1, 6):
+            if not (moves[i] or moves[j]):
+                continue
+            mask = BRANCH_RELATIONS[branches[i]][branches[j]]
+            pair = f"{LINE_POSITIONS[i]}{EARTHLY_BRANCHES[branches[i]]}、{LINE_POSITIONS[j]}{EARTHLY_BRANCHES[branches[j]]}"
+            if mask & CLASH: links.append(f"{pair}相沖")
+            if mask & HARMONY: links.append(f"{pair}相合")
+    # 三合局：三支俱全且其中有動爻
+    for group, (names, element) in TRINES.items():
+        members = [i for i in range(6) if branches[i] % 4 == group]
+        if len({branches[i] for i in members}) == 3 and any(moves[i] for i in members):
+            links.append(f"{names}三合{element}局 ({'、'.join(LINE_POSITIONS[i] for i in members)})")
+    return tuple(links)
+
+def cast_links(idx):
+    links = _CAST_LINKS[idx]
+    if links is None:
+        links = _CAST_LINKS[idx] = _build_links(idx)
+    return links
+
+def judge_lines(lines, month_branch, gz_day):
+    # lines：CAST_TABLE 的爻 tuple (藏伏, 主卦爻, 變卦爻, 是否動爻)；回傳初爻至上爻的 LineJudgement
+    month = BRANCH_IDS[month_branch]
+    day = BRANCH_IDS[gz_day[1]]
+    voids = XUN_VOIDS[gz_day]
+    month_row, day_row = BRANCH_RELATIONS[month], BRANCH_RELATIONS[day]
+    month_tags, day_tags = MONTH_TAGS[month], DAY_TAGS[day]
+
+    result = []
+    for _, m, c, move in lines:
+        b = BRANCH_IDS[m["branch"]]
+        el = BRANCH_ELEMENT_IDS[b]
+        if move:
+            state = DAY_MOVING
+            back = BRANCH_RELATIONS[BRANCH_IDS[c["branch"]]][b]
+            back_tags = BACK_TAGS[BRANCH_IDS[c["branch"]]][b]
+        else:
+            state = DAY_STATIC_STRONG if MONTH_STRONG[month][b] else DAY_STATIC_WEAK
+            back, back_tags = 0, ()
+        void = b in voids
+        day_stage = ELEMENT_STAGES[el][day]
+        tags = month_tags[b] + day_tags[b][state] + (("旬空",) if void else ()) + back_tags
+        if day_stage in DAY_STAGE_TAGS:
+            tags += (DAY_STAGE_TAGS[day_stage],)
+        result.append(LineJudgement(month_row[b], day_row[b], back, void, ELEMENT_STAGES[el][month], day_stage, tags))
+    return tuple(result)
+
+def judge_chart(values, gz_month, gz_day):
+    # 回傳 (初爻至上爻的 LineJudgement, 爻間沖合文字)；月柱、日柱須為六十甲子之一
+    idx = cast_index(values)
+    return judge_lines(CAST_TABLE[idx][3], gz_month[1], gz_day), cast_links(idx)
+
+def format_stages(judgement):
+    return f"月{TWELVE_STAGES[judgement.month_stage]}、日{TWELVE_STAGES[judgement.day_stage]}"
+
+def format_tags(judgement):
+    return "、".join(judgement.tags) or "無"
@@ -0,0 +1,226 @@
+# ==============================================================================
+# 盤面統計：卦象頻率、動爻數分布、各宮世爻六親、各月建六沖/六合/遊魂/歸魂比例
+# ==============================================================================
+# 全程欄式運算，不逐筆呼叫 calculate_hexagram：
+#   1. 爻值 -> 起卦索引 (liuyao_batch.cast_index_batch)
+#   2. 以起卦索引 gather 4096 種起卦預先算好的卦級欄位 (CAST_* 陣列)，得到每盤一列的 DataFrame
+#   3. 以 pandas value_counts / groupby 交叉表彙總成「次數表」；有月建、日柱時另以
+#      liuyao_batch.judge_batch 統計月破、旬空、暗動、回頭生剋等逐爻判讀
+# 次數表可直接相加，因此新進的盤只需彙總新的部分再加到既有結果上 (增量更新)；
+# 比例等檢視由次數表即時換算。
+#
+# 占卜紀錄 (liuyao_history) 的統計由 get_analytics() 取得行程共用的 CorpusAnalytics，
+# 每次 refresh() 只讀取上次之後新增的紀錄。
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from liuyao_engine import EARTHLY_BRANCHES, HEX_NAMES, SIX_RELATIVES, TRIGRAM_NAMES
+from liuyao_batch import CAST_FIELDS, HEX_NAME_BY_CODE, cast_index_batch, judge_batch, pillars_to_ids
+from liuyao_history import get_store
+
+ATTRIBUTES = {"clash": "六沖", "harmony": "六合", "wandering": "遊魂", "returning": "歸魂"}
+
+# 逐爻判讀 (liuyao_batch.judge_batch 的旗標) -> (名稱, 比例的分母)
+JUDGEMENTS = {
+    "month_break": ("月破", "lines"),
+    "void": ("旬空", "lines"),
+    "day_clash": ("日沖 (動爻)", "moving"),
+    "hidden_move": ("暗動", "static"),
+    "day_break": ("日破", "static"),
+    "back_generate": ("回頭生", "moving"),
+    "back_control": ("回頭剋", "moving"),
+}
+
+# ==============================================================================
+# 1. 每種起卦的卦級欄位 (4096 列，由 liuyao_batch.CAST_FIELDS 整理)
+# ==============================================================================
+
+# 卦名以 HEX_INFO 順序 (八宮順序) 作為類別順序
+_HEX_POSITION = np.array([HEX_NAMES.index(name) for name in HEX_NAME_BY_CODE], dtype=np.int8)
+
+CAST_MAIN = _HEX_POSITION[CAST_FIELDS["main_code"]]
+CAST_CHANGE = _HEX_POSITION[CAST_FIELDS["change_code"]]
+CAST_PALACE = CAST_FIELDS["palace"]
+CAST_MOVING = CAST_FIELDS["moving"].sum(axis=1).astype(np.int8)
+CAST_SHI_REL = CAST_FIELDS["m_rel"][np.arange(4096), CAST_FIELDS["shi"]]
+CAST_ATTRIBUTES = {key: CAST_FIELDS[f"main_{key}"] for key in ATTRIBUTES}
+
+_BRANCH_IDS = {b: i for i, b in enumerate(EARTHLY_BRANCHES)}
+
+# ==============================================================================
+# 2. 欄式盤面資料與彙總
+# ==============================================================================
+
+def lines_to_values(lines):
+    # ["678978", ...] (占卜紀錄的 lines 欄) -> (N, 6) 爻值陣列
+    if not lines:
+        return np.zeros((0, 6), dtype=np.int8)
+    raw = np.frombuffer("".join(lines).encode("ascii"), dtype=np.uint8)
+    if raw.size != 6 * len(lines):
+        raise ValueError("每筆爻值必須為 6 碼")
+    return (raw.reshape(-1, 6) - ord("0")).astype(np.int8)
+
+def month_branch_ids(gz_months):
+    # 月柱 (如 "己丑") -> 月建地支編號，格式不符為 -1
+    return np.array([_BRANCH_IDS.get(m[1:2], -1) if isinstance(m, str) and len(m) == 2 else -1 for m in gz_months], dtype=np.int8)
+
+def chart_frame(values, month_branches=None):
+    # values: (N, 6) 爻值；month_branches: 長度 N 的月建地支編號 (-1 表示不明)，可省略
+    idx = cast_index_batch(values)
+    frame = pd.DataFrame({
+        "main": pd.Categorical.from_codes(CAST_MAIN[idx], HEX_NAMES),
+        "change": pd.Categorical.from_codes(CAST_CHANGE[idx], HEX_NAMES),
+        "palace": pd.Categorical.from_codes(CAST_PALACE[idx], TRIGRAM_NAMES),
+        "moving": CAST_MOVING[idx],
+        "shi_rel": pd.Categorical.from_codes(CAST_SHI_REL[idx], SIX_RELATIVES),
+        "month": pd.Categorical.from_codes(
+            np.full(len(idx), -1, dtype=np.int8) if month_branches is None else np.asarray(month_branches, dtype=np.int8),
+            EARTHLY_BRANCHES,
+        ),
+    })
+    for key, column in CAST_ATTRIBUTES.items():
+        frame[key] = column[idx]
+    return frame
+
+def aggregate(frame):
+    # 一批盤 -> 次數表 dict；所有表的索引都是完整的類別清單，因此不同批次可直接相加
+    month_groups = frame.groupby("month", observed=False)
+    month_counts = month_groups[list(ATTRIBUTES)].sum().astype(np.int64)
+    month_counts.insert(0, "total", month_groups.size().astype(np.int64))
+    return {
+        "charts": len(frame),
+        "hexagram": frame["main"].value_counts(sort=False),
+        # 變卦只計有動爻的盤
+        "change_hexagram": frame.loc[frame["moving"] > 0, "change"].value_counts(sort=False),
+        "moving_lines": pd.Series(np.bincount(frame["moving"], minlength=7), index=pd.RangeIndex(7, name="moving")),
+        # 交叉表以 groupby().size().unstack() 計算 (pd.crosstab 在百萬列時慢約 25 倍)
+        "shi_relative": frame.groupby(["palace", "shi_rel"], observed=False).size().unstack().astype(np.int64),
+        "month_attributes": month_counts,
+    }
+
+def judgement_counts(values, month_branches=None, day_pillars=None):
+    # 月建、日柱皆有效的盤才判讀；回傳各旗標的爻數與分母 (lines / moving / static)
+    index = ["lines", "moving", "static", *JUDGEMENTS]
+    counts = pd.Series(0, index=index, dtype=np.int64)
+    if month_branches is None or day_pillars is None:
+        return counts
+    month_branches = np.asarray(month_branches, dtype=np.int8)
+    day_pillars = np.asarray(day_pillars, dtype=np.int8)
+    valid = (month_branches >= 0) & (day_pillars >= 0)
+    flags = judge_batch(np.asarray(values)[valid], month_branches[valid], day_pillars[valid])
+    counts["lines"] = flags["moving"].size
+    counts["moving"] = flags["moving"].sum()
+    counts["static"] = counts["lines"] - counts["moving"]
+    for key in JUDGEMENTS:
+        counts[key] = flags[key].sum()
+    return counts
+
+def merge_aggregates(a, b):
+    return {key: a[key] + b[key] for key in a}
+
+def empty_aggregates():
+    return analyze(np.zeros((0, 6), dtype=np.int8))
+
+# ==============================================================================
+# 3. 檢視 (由次數表換算)
+# ==============================================================================
+
+def _with_share(counts, label):
+    total = counts.sum()
+    share = counts / total if total else counts * 0.0
+    return pd.DataFrame({"次數": counts, "比例": share}).rename_axis(label)
+
+def hexagram_frequency(aggs, change=False):
+    counts = aggs["change_hexagram" if change else "hexagram"]
+    return _with_share(counts, "變卦" if change else "主卦").sort_values("次數", ascending=False, kind="stable")
+
+def moving_line_distribution(aggs):
+    return _with_share(aggs["moving_lines"], "動爻數")
+
+def shi_relative_by_palace(aggs, normalize=False):
+    table = aggs["shi_relative"].rename_axis(index="卦宮", columns="世爻六親")
+    if normalize:
+        totals = table.sum(axis=1)
+        table = table.div(totals.where(totals > 0), axis=0).fillna(0.0)
+    return table
+
+def month_attribute_rates(aggs):
+    counts = aggs["month_attributes"]
+    total = counts["total"]
+    rates = counts[list(ATTRIBUTES)].div(total.where(total > 0), axis=0).fillna(0.0).rename(columns=ATTRIBUTES)
+    rates.insert(0, "盤數", total)
+    return rates.rename_axis("月建")
+
+def judgement_rates(aggs):
+    counts = aggs["judgements"]
+    rows = {
+        label: (counts[key], counts[base], counts[key] / counts[base] if counts[base] else 0.0)
+        for key, (label, base) in JUDGEMENTS.items()
+    }
+    return pd.DataFrame.from_dict(rows, orient="index", columns=["次數", "爻數", "比例"]).rename_axis("判讀")
+
+def analyze(values, month_branches=None, day_pillars=None):
+    # day_pillars：日柱六十甲子編號 (-1 表示不明)；月建與日柱都有時才計入逐爻判讀
+    aggs = aggregate(chart_frame(values, month_branches))
+    aggs["judgements"] = judgement_counts(values, month_branches, day_pillars)
+    return aggs
+
+def analyze_archive(archive, start=0, stop=None, chunk_size=1_000_000):
+    # archive 為 liuyao_archive.ChartArchive；只讀取 lines 與 pillars 兩欄的 [start, stop) 範圍
+    stop = len(archive) if stop is None else min(stop, len(archive))
+    lines, pillars = archive.column("lines"), archive.column("pillars")
+    aggs = empty_aggregates()
+    for a in range(start, stop, chunk_size):
+        b = min(a + chunk_size, stop)
+        chunk_pillars = np.asarray(pillars[a:b])
+        months = np.where(chunk_pillars[:, 1] >= 0, chunk_pillars[:, 1] % 12, -1)
+        aggs = merge_aggregates(aggs, analyze(np.asarray(lines[a:b]), months, chunk_pillars[:, 2]))
+    return aggs
+
+# ==============================================================================
+# 4. 占卜紀錄的增量統計
+# ==============================================================================
+
+class CorpusAnalytics:
+    def __init__(self, store, chunk_size=50000):
+        self.store = store
+        self.chunk_size = chunk_size
+        self.last_id = 0
+        self.aggregates = empty_aggregates()
+        self.updated_at = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        # 只讀取 last_id 之後的紀錄並加到既有次數表；回傳本次新增的盤數
+        with self._lock:
+            added = 0
+            for ids, (lines, gz_months, gz_days) in self.store.iter_since(self.last_id, ("lines", "gz_month", "gz_day"), self.chunk_size):
+                delta = analyze(lines_to_values(lines), month_branch_ids(gz_months), pillars_to_ids(gz_days))
+                self.aggregates = merge_aggregates(self.aggregates, delta)
+                self.last_id = ids[-1]
+                added += len(ids)
+            self.updated_at = time.time()
+            return added
+
+    def snapshot(self):
+        # 次數表在 refresh 時整份替換，不會原地修改，取出的參照可放心讀取
+        with self._lock:
+            return self.aggregates
+
+_analytics = None
+_analytics_lock = threading.Lock()
+
+def get_analytics():
+    global _analytics
+    store = get_store()
+    if store is None:
+        return None
+    if _analytics is None:
+        with _analytics_lock:
+            if _analytics is None:
+                _analytics = CorpusAnalytics(store)
+    return _analytics
@@ -0,0 +1,156 @@
+# ==============================================================================
+# HTTP API (ASGI / Starlette)：不經 Streamlit 直接以 JSON 提供排盤
+# ==============================================================================
+# 啟動：uvicorn liuyao_api:app --workers 4
+#   或：python liuyao_api.py --port 8000
+#
+# POST /chart            排盤 (JSON)
+# POST /copy-text        複製用文字；body 可加 "format": text / json / markdown / csv
+# GET  /hexagram/{name}  以卦名 (全名、簡稱、簡體/異體字、上下卦) 查卦碼
+# GET  /hexagrams?prefix= 卦名自動完成建議
+# GET  /health
+# GET  /metrics          各階段耗時直方圖 (Prometheus 文字；?format=json 為 JSON)，需設 LIUYAO_METRICS=1
+#
+# /chart 與 /copy-text 的 body：
+#   {"lines": [6, 7, 8, 9, 7, 8],                 初爻至上爻
+#    "datetime": "2025-01-20T10:30",              西曆 (UTC+8)，或
+#    "pillars": {"year": "乙巳", "month": "己丑", "day": "丁酉", "hour": "己酉"},
+#    "question": "..."}
+# datetime 與 pillars 都未給時以現在時間 (UTC+8) 排盤。
+#
+# 每張排出的盤都寫入占卜紀錄 (liuyao_history，背景批次寫入，不增加回應延遲)；
+# LIUYAO_HISTORY_DB 設為空字串可停用。
+#
+# 排盤、萬年曆查表都是微秒級的純 CPU 運算，直接在事件迴圈內執行；
+# 只有超出預建干支索引範圍 (1900~2100) 需要 lunar_python 推算時才丟到執行緒池，避免阻塞。
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from liuyao_engine import get_code_from_name, resolve_hexagram_name, suggest_hexagram_names
+from liuyao_calendar import INDEX_START, INDEX_END
+from liuyao_metrics import prometheus_text, metrics_json
+from liuyao_history import get_store
+from liuyao_export import (
+    FORMATS, MIME_TYPES, chart_record, chart_to_dict, export_chart,
+    parse_lines, parse_datetime, parse_question, pillar_date_args, west_date_args,
+)
+
+
+class RequestError(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+# ==============================================================================
+# 1. 請求解析
+# ==============================================================================
+
+async def _read_body(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise RequestError("請求內容不是合法的 JSON")
+    if not isinstance(body, dict):
+        raise RequestError("請求內容必須是 JSON 物件")
+    return body
+
+async def _chart_record(request):
+    # 解析規則同 liuyao_export.record_from_input，差別在超出索引範圍的西曆改於執行緒池推算
+    body = await _read_body(request)
+    try:
+        lines = parse_lines(body.get("lines"))
+        question = parse_question(body.get("question"))
+        if body.get("pillars") is not None:
+            date_args = pillar_date_args(body["pillars"])
+        else:
+            dt = parse_datetime(body.get("datetime"))
+            if INDEX_START <= dt < INDEX_END:
+                date_args = west_date_args(dt)
+            else:
+                date_args = await run_in_threadpool(west_date_args, dt)
+    except ValueError as e:
+        raise RequestError(str(e))
+    return body, chart_record(lines, *date_args, question)
+
+def _save_history(record):
+    # 請求全部驗證通過後才寫入占卜紀錄 (格式錯誤等 400 回應不留紀錄)
+    store = get_store()
+    if store is not None:
+        store.record(record, source="api")
+
+# ==============================================================================
+# 2. 端點
+# ==============================================================================
+
+async def chart(request):
+    _, record = await _chart_record(request)
+    _save_history(record)
+    return JSONResponse(chart_to_dict(record))
+
+async def copy_text(request):
+    body, record = await _chart_record(request)
+    fmt = body.get("format", "text")
+    if fmt not in FORMATS:
+        raise RequestError(f"不支援的格式：{fmt} (可用：{', '.join(FORMATS)})")
+    _save_history(record)
+    return PlainTextResponse(export_chart(record, fmt), media_type=MIME_TYPES[fmt])
+
+async def hexagram(request):
+    query = request.path_params["name"]
+    code = get_code_from_name(query)
+    if code is None:
+        raise RequestError(f"查無此卦：{query}", status_code=404)
+    return JSONResponse({
+        "query": query,
+        "name": resolve_hexagram_name(query),
+        "code": code,
+        # 靜爻爻值 (陽 7、陰 8)，由初爻至上爻
+        "lines": [7 if bit else 8 for bit in code],
+    })
+
+async def hexagram_suggestions(request):
+    prefix = request.query_params.get("prefix", "")
+    try:
+        limit = min(max(int(request.query_params.get("limit", 8)), 1), 64)
+    except ValueError:
+        raise RequestError("limit 必須是整數")
+    return JSONResponse({"prefix": prefix, "names": suggest_hexagram_names(prefix, limit)})
+
+async def health(request):
+    return JSONResponse({"status": "ok"})
+
+async def metrics(request):
+    if request.query_params.get("format") == "json":
+        return PlainTextResponse(metrics_json(), media_type="application/json")
+    return PlainTextResponse(prometheus_text(), media_type="text/plain; version=0.0.4")
+
+async def request_error(request, exc):
+    return JSONResponse({"error": str(exc)}, status_code=exc.status_code)
+
+app = Starlette(
+    routes=[
+        Route("/chart", chart, methods=["POST"]),
+        Route("/copy-text", copy_text, methods=["POST"]),
+        Route("/hexagram/{name}", hexagram, methods=["GET"]),
+        Route("/hexagrams", hexagram_suggestions, methods=["GET"]),
+        Route("/health", health, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"]),
+    ],
+    exception_handlers={RequestError: request_error},
+)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="六爻排盤 HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    uvicorn.run("liuyao_api:app", host=args.host, port=args.port, workers=args.workers, log_level="warning")
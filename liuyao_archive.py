@@ -0,0 +1,343 @@
+# ==============================================================================
+# 欄式盤面封存檔：固定寬度整數欄 + 字串堆積，串流追加寫入，mmap 零複製讀取
+# ==============================================================================
+# 一個封存檔是一個目錄：
+#   meta.json         格式版本、已寫入的筆數、附加資訊 (info，如已封存到的紀錄 id)
+#   <欄位>.bin         固定寬度整數欄 (little-endian)，第 i 筆位於 i × 列寬
+#   <字串欄>.offsets   uint64，共 筆數 + 1 個位移，第 i 筆為 heap[offsets[i]:offsets[i + 1]]
+#   <字串欄>.heap      UTF-8 位元組直接串接
+#
+# 寫入：ArchiveWriter 先把資料累積在記憶體，每 batch_size 筆以 NumPy 一次算出衍生欄
+#       (起卦索引、卦碼、卦宮、各爻地支 / 六親) 並追加到各檔尾，最後才更新 meta.json
+#       (os.replace 原子替換)。寫到一半中斷時，重新開啟會把超出 meta 筆數的殘餘資料截掉。
+# 讀取：ChartArchive 以 numpy.memmap 按需開啟單一欄位，切片即為檔案上的 view，
+#       統計或範圍掃描只會讀到用到的欄位與範圍。
+# 與 liuyao_export.chart_record() 的盤面 dict 可無損互轉 (年柱、時柱須為六十甲子之一或空白)。
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from liuyao_engine import SEXAGENARY_CYCLE, cast_index
+from liuyao_batch import CAST_FIELDS, cast_index_batch
+
+FORMAT = "liuyao-archive"
+VERSION = 1
+
+# 欄位 -> (dtype, 每筆的形狀)
+FIXED_COLUMNS = {
+    "created_at": ("<f8", ()),
+    "lines": ("i1", (6,)),        # 爻值 6~9 (初爻至上爻)
+    "cast": ("<u2", ()),          # 起卦索引 (liuyao_engine.cast_index)
+    "main_code": ("i1", ()),      # 主卦 6-bit 卦碼
+    "change_code": ("i1", ()),    # 變卦 6-bit 卦碼
+    "palace": ("i1", ()),         # TRIGRAM_NAMES 編號
+    "pillars": ("i1", (4,)),      # 年、月、日、時柱的六十甲子編號，-1 為空白
+    "date_mode": ("i1", ()),      # DATE_MODES 編號
+    "m_branch": ("i1", (6,)),     # 主卦各爻地支 (EARTHLY_BRANCHES 編號)
+    "m_rel": ("i1", (6,)),        # 主卦各爻六親 (SIX_RELATIVES 編號)
+}
+STRING_COLUMNS = ("question", "west_date", "source")
+
+DATE_MODES = ("指定西曆", "指定干支曆")
+PILLAR_NAMES = ("年柱", "月柱", "日柱", "時柱")
+
+_CYCLE_IDS = {gz: i for i, gz in enumerate(SEXAGENARY_CYCLE)}
+
+def _meta_path(path):
+    return os.path.join(path, "meta.json")
+
+def _read_meta(path):
+    with open(_meta_path(path), encoding="utf-8") as fp:
+        meta = json.load(fp)
+    if meta.get("format") != FORMAT or meta.get("version") != VERSION:
+        raise ValueError(f"不是可讀取的盤面封存檔：{path}")
+    return meta
+
+def _row_bytes(name):
+    dtype, shape = FIXED_COLUMNS[name]
+    return np.dtype(dtype).itemsize * int(np.prod(shape, dtype=np.int64))
+
+def pillar_id(name, pillar):
+    if pillar == "":
+        return -1
+    if pillar not in _CYCLE_IDS:
+        raise ValueError(f"{name}「{pillar}」不是六十甲子之一，無法寫入封存檔")
+    return _CYCLE_IDS[pillar]
+
+# ==============================================================================
+# 1. 寫入
+# ==============================================================================
+
+class ArchiveWriter:
+    def __init__(self, path, batch_size=65536):
+        self.path = path
+        self.batch_size = batch_size
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(_meta_path(path)):
+            meta = _read_meta(path)
+            self.rows, self.info = meta["rows"], meta.get("info", {})
+        else:
+            self.rows, self.info = 0, {}
+            self._write_meta()
+        # created_at 須遞增 (ChartArchive.time_range 以二分搜尋)，記住已寫入的最後一筆
+        if self.rows:
+            self._last_created_at = float(np.fromfile(
+                os.path.join(path, "created_at.bin"), dtype="<f8", count=1, offset=8 * (self.rows - 1))[0])
+        else:
+            self._last_created_at = float("-inf")
+        self._files = {}
+        self._heap_sizes = {}
+        for name in FIXED_COLUMNS:
+            self._files[name] = self._open(f"{name}.bin", self.rows * _row_bytes(name))
+        for name in STRING_COLUMNS:
+            offsets_file = os.path.join(path, f"{name}.offsets")
+            if self.rows:
+                heap_size = int(np.fromfile(offsets_file, dtype="<u8", count=1, offset=8 * self.rows)[0])
+            else:
+                heap_size = 0
+            self._heap_sizes[name] = heap_size
+            offsets = self._open(f"{name}.offsets", 8 * (self.rows + 1) if self.rows else 0)
+            if not self.rows:
+                offsets.write(np.zeros(1, dtype="<u8").tobytes())
+            self._files[f"{name}.offsets"] = offsets
+            self._files[f"{name}.heap"] = self._open(f"{name}.heap", heap_size)
+        self._reset_pending()
+
+    def _open(self, filename, size):
+        # 截掉上次中斷時超出 meta 筆數的部分，再以追加模式開啟
+        file_path = os.path.join(self.path, filename)
+        with open(file_path, "ab") as fp:
+            fp.truncate(size)
+        return open(file_path, "ab")
+
+    def _reset_pending(self):
+        self._lines = []
+        self._created_at = []
+        self._pillars = []
+        self._date_modes = []
+        self._strings = {name: [] for name in STRING_COLUMNS}
+
+    def _write_meta(self):
+        tmp = _meta_path(self.path) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fp:
+            json.dump({"format": FORMAT, "version": VERSION, "rows": self.rows, "info": self.info}, fp)
+        os.replace(tmp, _meta_path(self.path))
+
+    # --------------------------------------------------------------------------
+
+    def append(self, record, created_at=None, source=""):
+        # record 為 liuyao_export.chart_record() 的結果
+        self._append(
+            record["values"], time.time() if created_at is None else created_at,
+            record["date_mode"], (record["gz_year"], record["gz_month"], record["gz_day"], record["gz_hour"]),
+            record["question"], record["west_date"], source,
+        )
+
+    def append_row(self, row):
+        # row 為 liuyao_history.COLUMNS 順序的一列 (reading_row() 或 iter_since 取出的資料)
+        created_at, source, question, lines, _, _, _, date_mode, west_date, *pillars = row
+        self._append([int(v) for v in lines], created_at, date_mode, pillars, question, west_date, source)
+
+    def _append(self, values, created_at, date_mode, pillars, question, west_date, source):
+        # 先檢查完所有欄位再加入待寫資料，不合格的紀錄不會留下半筆
+        cast_index(values)  # 檢查爻值
+        if date_mode not in DATE_MODES:
+            raise ValueError(f"不支援的日期模式：{date_mode}")
+        if created_at < self._last_created_at:
+            raise ValueError(f"created_at {created_at} 早於前一筆 {self._last_created_at}，封存檔須依時間遞增寫入")
+        ids = [pillar_id(name, p) for name, p in zip(PILLAR_NAMES, pillars)]
+        self._last_created_at = created_at
+        self._pillars.append(ids)
+        self._lines.append(list(values))
+        self._created_at.append(created_at)
+        self._date_modes.append(DATE_MODES.index(date_mode))
+        self._strings["question"].append(question)
+        self._strings["west_date"].append(west_date)
+        self._strings["source"].append(source)
+        if len(self._lines) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        n = len(self._lines)
+        if n:
+            lines = np.array(self._lines, dtype=np.int8)
+            cast = cast_index_batch(lines)
+            columns = {
+                "created_at": np.array(self._created_at, dtype="<f8"),
+                "lines": lines,
+                "cast": cast,
+                "main_code": CAST_FIELDS["main_code"][cast],
+                "change_code": CAST_FIELDS["change_code"][cast],
+                "palace": CAST_FIELDS["palace"][cast],
+                "pillars": np.array(self._pillars, dtype=np.int8),
+                "date_mode": np.array(self._date_modes, dtype=np.int8),
+                "m_branch": CAST_FIELDS["m_branch"][cast],
+                "m_rel": CAST_FIELDS["m_rel"][cast],
+            }
+            for name, (dtype, _) in FIXED_COLUMNS.items():
+                self._files[name].write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+            for name in STRING_COLUMNS:
+                encoded = [s.encode("utf-8") for s in self._strings[name]]
+                offsets = np.cumsum([len(b) for b in encoded], dtype=np.uint64) + np.uint64(self._heap_sizes[name])
+                self._files[f"{name}.heap"].write(b"".join(encoded))
+                self._files[f"{name}.offsets"].write(offsets.astype("<u8").tobytes())
+                self._heap_sizes[name] = int(offsets[-1])
+            self.rows += n
+            self._reset_pending()
+        for fp in self._files.values():
+            fp.flush()
+        # 資料寫完才更新筆數，讀取端只會看到完整的紀錄
+        self._write_meta()
+
+    def close(self):
+        if self._files:
+            self.flush()
+            self._close_files()
+
+    def _close_files(self):
+        for fp in self._files.values():
+            fp.close()
+        self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # 例外中途離開時捨棄尚未 flush 的紀錄與 info 變更，meta 停在上一次 flush：
+        # 筆數與 info 只會一起前進，重跑時由同一處接續 (殘餘資料在重新開啟時截掉)
+        if exc_type is not None:
+            self._reset_pending()
+            self._close_files()
+        else:
+            self.close()
+
+# ==============================================================================
+# 2. 讀取
+# ==============================================================================
+
+class StringColumn:
+    def __init__(self, offsets, heap):
+        self.offsets = offsets
+        self.heap = heap
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.heap[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+
+class ChartArchive:
+    def __init__(self, path):
+        self.path = path
+        self.rows = _read_meta(path)["rows"]
+        self._columns = {}
+
+    def __len__(self):
+        return self.rows
+
+    def _memmap(self, filename, dtype, shape):
+        # 空檔案無法 mmap，直接回傳空陣列
+        if not shape[0] or not os.path.getsize(os.path.join(self.path, filename)):
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.path, filename), dtype=dtype, mode="r", shape=shape)
+
+    def column(self, name):
+        # 固定寬度欄位的 memmap，形狀為 (筆數,) 或 (筆數, 6) 等
+        if name not in self._columns:
+            if name not in FIXED_COLUMNS:
+                raise ValueError(f"不支援的欄位：{name}")
+            dtype, shape = FIXED_COLUMNS[name]
+            self._columns[name] = self._memmap(f"{name}.bin", dtype, (self.rows, *shape))
+        return self._columns[name]
+
+    def strings(self, name):
+        if name not in self._columns:
+            if name not in STRING_COLUMNS:
+                raise ValueError(f"不支援的字串欄位：{name}")
+            offsets = self._memmap(f"{name}.offsets", "<u8", (self.rows + 1,))
+            heap_size = int(offsets[-1]) if self.rows else 0
+            self._columns[name] = StringColumn(offsets, self._memmap(f"{name}.heap", "u1", (heap_size,)))
+        return self._columns[name]
+
+    def time_range(self, since=None, until=None):
+        # 寫入端保證 created_at 遞增，以二分搜尋找出 [since, until) 的列範圍
+        created_at = self.column("created_at")
+        start = 0 if since is None else int(np.searchsorted(created_at, since, side="left"))
+        stop = self.rows if until is None else int(np.searchsorted(created_at, until, side="left"))
+        return start, max(start, stop)
+
+    def record(self, i):
+        # 還原為 liuyao_export.chart_record() 的盤面 dict
+        from liuyao_export import chart_record
+        pillars = ["" if p < 0 else SEXAGENARY_CYCLE[p] for p in self.column("pillars")[i].tolist()]
+        return chart_record(
+            self.column("lines")[i].tolist(), DATE_MODES[int(self.column("date_mode")[i])],
+            self.strings("west_date")[i], *pillars, self.strings("question")[i],
+        )
+
+    def iter_records(self, start=0, stop=None):
+        for i in range(start, self.rows if stop is None else min(stop, self.rows)):
+            yield self.record(i)
+
+# ==============================================================================
+# 3. 命令列：由占卜紀錄建立封存檔 / 顯示封存檔資訊
+# ==============================================================================
+# 用法：
+#   python liuyao_archive.py from-history data/archive [--db data/liuyao_history.db]
+#   python liuyao_archive.py info data/archive
+
+def archive_history(store, path, chunk_size=50000):
+    # 只追加上次封存後新增的紀錄 (info["history_id"] 為已封存的最大 id)，回傳 (新增筆數, 略過筆數)。
+    # 每段寫完連同 history_id 一起 flush，中斷時未 flush 的部分整段捨棄，重跑不會重複或遺漏。
+    # 無法封存的紀錄 (年柱、時柱不是六十甲子、時間早於前一筆等) 略過並計數，不中止整批。
+    from liuyao_history import COLUMNS
+    skipped = 0
+    with ArchiveWriter(path, batch_size=chunk_size + 1) as writer:
+        start = writer.rows
+        for ids, columns in store.iter_since(writer.info.get("history_id", 0), COLUMNS, chunk_size):
+            for row in zip(*columns):
+                try:
+                    writer.append_row(row)
+                except ValueError:
+                    skipped += 1
+            writer.info["history_id"] = ids[-1]
+            writer.flush()
+        return writer.rows - start, skipped
+
+def archive_info(path):
+    archive = ChartArchive(path)
+    files = sorted(os.listdir(path))
+    sizes = {name: os.path.getsize(os.path.join(path, name)) for name in files}
+    return {"rows": len(archive), "bytes": sum(sizes.values()), "files": sizes}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="六爻盤面欄式封存檔")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("from-history", help="由占卜紀錄 (SQLite) 建立或追加封存檔")
+    build.add_argument("archive")
+    build.add_argument("--db", default=None, help="紀錄庫路徑 (預設同 LIUYAO_HISTORY_DB)")
+    info = sub.add_parser("info", help="顯示筆數與各欄檔案大小")
+    info.add_argument("archive")
+    args = parser.parse_args(argv)
+
+    if args.command == "from-history":
+        from liuyao_history import HistoryStore, get_store
+        store = HistoryStore(args.db) if args.db else get_store()
+        if store is None:
+            parser.error("未啟用占卜紀錄，請以 --db 指定紀錄庫")
+        t = time.perf_counter()
+        added, skipped = archive_history(store, args.archive)
+        print(f"新增 {added:,} 筆，略過 {skipped:,} 筆，{time.perf_counter() - t:.2f} 秒")
+    else:
+        json.dump(archive_info(args.archive), sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
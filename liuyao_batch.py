@@ -0,0 +1,243 @@
+# ==============================================================================
+# NumPy 批次排盤：一次處理 (N, 6) 個爻值，全程以陣列查表 (gather) 運算
+# ==============================================================================
+# 卦以 6-bit 卦碼表示 (bit i = 第 i+1 爻，1 為陽)，與 liuyao_compact 一致。
+# 所有編號對應 liuyao_engine 的編號表：
+#   branch -> EARTHLY_BRANCHES、stem -> HEAVENLY_STEMS、el -> FIVE_ELEMENTS、
+#   rel -> SIX_RELATIVES、god -> LIU_SHEN_ORDER、nayin -> NAYIN_NAMES、
+#   palace -> TRIGRAM_NAMES，-1 表示無。
+
+import numpy as np
+
+from liuyao_engine import (
+    HEAVENLY_STEMS, EARTHLY_BRANCHES, TRIGRAMS, HEX_INFO, ELEMENT_RELATIONS,
+    BRANCH_ELEMENTS, NAYIN_TABLE, LIU_SHEN_START, SIX_CLASH_HEX, SIX_HARMONY_HEX,
+    TRIGRAM_NAMES, FIVE_ELEMENTS, SIX_RELATIVES, NAYIN_NAMES,
+    SEXAGENARY_CYCLE, get_hexagram_name_by_code,
+)
+from liuyao_analysis import (
+    BRANCH_RELATIONS, ELEMENT_STAGES, MONTH_STRONG, XUN_VOIDS, CLASH, GENERATES, CONTROLS,
+)
+
+# ==============================================================================
+# 1. 查表陣列 (由 TRIGRAMS / HEX_INFO / ELEMENT_RELATIONS 建立)
+# ==============================================================================
+
+def _trigram_code(name):
+    bits = TRIGRAMS[name]["code"]
+    return bits[0] | (bits[1] << 1) | (bits[2] << 2)
+
+# 3-bit 卦碼 -> 八卦編號
+TRIGRAM_BY_BITS = np.zeros(8, dtype=np.int8)
+for _t, _name in enumerate(TRIGRAM_NAMES):
+    TRIGRAM_BY_BITS[_trigram_code(_name)] = _t
+
+# 八卦編號 × 六爻位 -> 納甲地支 / 天干 (內卦用前三支與第一干，外卦用後三支與第二干)
+TRIGRAM_BRANCH = np.array(
+    [[EARTHLY_BRANCHES.index(b) for b in TRIGRAMS[name]["branches"]] for name in TRIGRAM_NAMES],
+    dtype=np.int8,
+)
+TRIGRAM_STEM = np.array(
+    [[HEAVENLY_STEMS.index(TRIGRAMS[name]["stems"][i >= 3]) for i in range(6)] for name in TRIGRAM_NAMES],
+    dtype=np.int8,
+)
+TRIGRAM_ELEMENT = np.array([FIVE_ELEMENTS.index(TRIGRAMS[name]["element"]) for name in TRIGRAM_NAMES], dtype=np.int8)
+
+BRANCH_ELEMENT = np.array([FIVE_ELEMENTS.index(BRANCH_ELEMENTS[b]) for b in EARTHLY_BRANCHES], dtype=np.int8)
+
+# 宮五行 × 爻五行 -> 六親
+RELATION = np.zeros((5, 5), dtype=np.int8)
+for (_a, _b), _rel in ELEMENT_RELATIONS.items():
+    RELATION[FIVE_ELEMENTS.index(_a), FIVE_ELEMENTS.index(_b)] = SIX_RELATIVES.index(_rel)
+
+# 天干 × 地支 -> 納音 (非六十甲子組合為 -1)
+NAYIN = np.full((10, 12), -1, dtype=np.int8)
+for _gz, _ny in NAYIN_TABLE.items():
+    NAYIN[HEAVENLY_STEMS.index(_gz[0]), EARTHLY_BRANCHES.index(_gz[1])] = NAYIN_NAMES.index(_ny)
+
+GOD_START = np.array([LIU_SHEN_START[s] for s in HEAVENLY_STEMS], dtype=np.int8)
+
+# 6-bit 卦碼 -> 卦名 / 宮 / 世爻位置 / 應爻位置 / 卦屬性
+HEX_NAME_BY_CODE = []
+HEX_PALACE = np.zeros(64, dtype=np.int8)
+HEX_SHI = np.zeros(64, dtype=np.int8)
+HEX_YING = np.zeros(64, dtype=np.int8)
+HEX_CLASH = np.zeros(64, dtype=bool)
+HEX_HARMONY = np.zeros(64, dtype=bool)
+HEX_WANDERING = np.zeros(64, dtype=bool)
+HEX_RETURNING = np.zeros(64, dtype=bool)
+
+for _code in range(64):
+    _lower = TRIGRAM_NAMES[TRIGRAM_BY_BITS[_code & 7]]
+    _upper = TRIGRAM_NAMES[TRIGRAM_BY_BITS[_code >> 3]]
+    _name = get_hexagram_name_by_code(_upper, _lower)
+    _palace, _shift = HEX_INFO[_name]
+    _shi = {7: 4, 8: 3}.get(_shift, _shift)
+    HEX_NAME_BY_CODE.append(_name)
+    HEX_PALACE[_code] = TRIGRAM_NAMES.index(_palace)
+    HEX_SHI[_code] = _shi - 1
+    HEX_YING[_code] = (_shi + 2) % 6
+    HEX_CLASH[_code] = _name in SIX_CLASH_HEX
+    HEX_HARMONY[_code] = _name in SIX_HARMONY_HEX
+    HEX_WANDERING[_code] = _shift == 7
+    HEX_RETURNING[_code] = _shift == 8
+
+# 八卦編號 -> 該卦重卦 (八純卦) 的 6-bit 卦碼
+PURE_HEX_CODE = np.array([_trigram_code(name) * 9 for name in TRIGRAM_NAMES], dtype=np.int16)
+
+_LINE_POS = np.arange(6, dtype=np.int8)
+_BIT_WEIGHTS = (1 << np.arange(6)).astype(np.int16)
+
+# ==============================================================================
+# 2. 批次運算
+# ==============================================================================
+
+def stems_to_ids(day_stems):
+    day_stems = np.asarray(day_stems)
+    if day_stems.dtype.kind in "iu":
+        # 超出 0~9 的整數轉成 int8 後會對應到別的天干，先擋下
+        if day_stems.size and (day_stems.min() < 0 or day_stems.max() >= len(HEAVENLY_STEMS)):
+            bad = day_stems[(day_stems < 0) | (day_stems >= len(HEAVENLY_STEMS))].flat[0]
+            raise ValueError(f"日干編號必須為 0~9，收到 {int(bad)}")
+        return day_stems.astype(np.int8)
+    lookup = {s: i for i, s in enumerate(HEAVENLY_STEMS)}
+    try:
+        return np.array([lookup[s] for s in day_stems.tolist()], dtype=np.int8)
+    except KeyError as e:
+        raise ValueError(f"日干必須為甲至癸，收到 {e.args[0]!r}")
+
+def _line_fields(codes, palace_el):
+    lower = TRIGRAM_BY_BITS[codes & 7]
+    upper = TRIGRAM_BY_BITS[codes >> 3]
+    tri = np.where(_LINE_POS < 3, lower[:, None], upper[:, None])
+    branch = TRIGRAM_BRANCH[tri, _LINE_POS]
+    stem = TRIGRAM_STEM[tri, _LINE_POS]
+    el = BRANCH_ELEMENT[branch]
+    rel = RELATION[palace_el[:, None], el]
+    return stem, branch, el, rel, NAYIN[stem, branch]
+
+# 依爻值算出與日干無關的所有欄位 (不含六神)
+def _cast_fields(values):
+    main_bits = (values == 7) | (values == 9)
+    change_bits = (values == 6) | (values == 7)
+    main_code = main_bits @ _BIT_WEIGHTS
+    change_code = change_bits @ _BIT_WEIGHTS
+
+    palace = HEX_PALACE[main_code]
+    palace_el = TRIGRAM_ELEMENT[palace]
+
+    m_stem, m_branch, m_el, m_rel, m_nayin = _line_fields(main_code, palace_el)
+    c_stem, c_branch, c_el, c_rel, c_nayin = _line_fields(change_code, palace_el)
+
+    # 藏伏：本宮首卦 (八純卦) 該爻與主卦不同時才有
+    h_stem, h_branch, h_el, h_rel, _ = _line_fields(PURE_HEX_CODE[palace], palace_el)
+    has_hidden = (h_branch != m_branch) | (h_rel != m_rel)
+
+    return {
+        "main_code": main_code.astype(np.int8),
+        "change_code": change_code.astype(np.int8),
+        "palace": palace,
+        "change_palace": HEX_PALACE[change_code],
+        "shi": HEX_SHI[main_code],
+        "ying": HEX_YING[main_code],
+        "main_clash": HEX_CLASH[main_code],
+        "main_harmony": HEX_HARMONY[main_code],
+        "main_wandering": HEX_WANDERING[main_code],
+        "main_returning": HEX_RETURNING[main_code],
+        "change_clash": HEX_CLASH[change_code],
+        "change_harmony": HEX_HARMONY[change_code],
+        "change_wandering": HEX_WANDERING[change_code],
+        "change_returning": HEX_RETURNING[change_code],
+        "moving": (values == 6) | (values == 9),
+        "main_yang": main_bits,
+        "change_yang": change_bits,
+        "m_stem": m_stem, "m_branch": m_branch, "m_el": m_el, "m_rel": m_rel, "m_nayin": m_nayin,
+        "c_stem": c_stem, "c_branch": c_branch, "c_el": c_el, "c_rel": c_rel, "c_nayin": c_nayin,
+        "h_branch": np.where(has_hidden, h_branch, -1).astype(np.int8),
+        "h_rel": np.where(has_hidden, h_rel, -1).astype(np.int8),
+    }
+
+# 4096 種起卦一次算好 (索引同 liuyao_engine.cast_index)，批次運算時只需 gather
+_CAST_POWERS = (4 ** np.arange(6)).astype(np.int16)
+ALL_CASTS = 6 + (np.arange(4096)[:, None] >> (2 * _LINE_POS)) % 4
+CAST_FIELDS = _cast_fields(ALL_CASTS)
+
+def cast_index_batch(values):
+    values = np.asarray(values)
+    if values.ndim != 2 or values.shape[1] != 6:
+        raise ValueError(f"values 形狀必須為 (N, 6)，收到 {values.shape}")
+    if values.size and (values.min() < 6 or values.max() > 9):
+        raise ValueError("爻值必須為 6、7、8、9")
+    return (values.astype(np.int16) - 6) @ _CAST_POWERS
+
+# values: (N, 6) 爻值 6/7/8/9 (初爻至上爻)；day_stems: 長度 N 的日干 (字元或 0~9 編號)
+# 回傳 dict：卦級欄位形狀為 (N,)，爻級欄位形狀為 (N, 6)
+def calculate_hexagram_batch(values, day_stems):
+    idx = cast_index_batch(values)
+    stems = stems_to_ids(day_stems)
+    if stems.shape != idx.shape:
+        raise ValueError(f"day_stems 長度必須為 {idx.shape[0]}，收到 {stems.shape}")
+
+    result = {"cast_index": idx}
+    for key, column in CAST_FIELDS.items():
+        result[key] = column[idx]
+    result["god"] = ((GOD_START[stems][:, None] + _LINE_POS) % 6).astype(np.int8)
+    return result
+
+# ==============================================================================
+# 3. 批次生剋沖合判讀 (查表同 liuyao_analysis)
+# ==============================================================================
+
+BRANCH_RELATION = np.array(BRANCH_RELATIONS, dtype=np.uint16)
+ELEMENT_STAGE = np.array(ELEMENT_STAGES, dtype=np.int8)
+MONTH_STRONG_MASK = np.array(MONTH_STRONG, dtype=bool)
+
+# 六十甲子編號 -> 地支編號 / 旬空兩支
+CYCLE_BRANCH = (np.arange(60) % 12).astype(np.int8)
+CYCLE_VOIDS = np.array([XUN_VOIDS[gz] for gz in SEXAGENARY_CYCLE], dtype=np.int8)
+
+_CYCLE_IDS = {gz: i for i, gz in enumerate(SEXAGENARY_CYCLE)}
+
+def pillars_to_ids(pillars):
+    # 干支字串 (如 "丁酉") -> 六十甲子編號，不是六十甲子之一為 -1
+    return np.array([_CYCLE_IDS.get(p, -1) for p in pillars], dtype=np.int8)
+
+# values: (N, 6) 爻值；month_branches: 長度 N 的月建地支編號；day_pillars: 長度 N 的日柱六十甲子編號
+# 回傳 dict，欄位形狀皆為 (N, 6)：*_rel 為關係遮罩 (靜爻 back_rel 為 0)，*_stage 為十二長生編號，其餘為判讀旗標
+def judge_batch(values, month_branches, day_pillars):
+    idx = cast_index_batch(values)
+    month = np.asarray(month_branches)
+    pillar = np.asarray(day_pillars)
+    if month.shape != idx.shape or pillar.shape != idx.shape:
+        raise ValueError(f"month_branches、day_pillars 長度必須為 {idx.shape[0]}")
+    # 先檢查範圍再轉 int8 (同 stems_to_ids)：超出範圍的大整數轉型後會繞回有效編號
+    if idx.size and (month.min() < 0 or month.max() > 11 or pillar.min() < 0 or pillar.max() > 59):
+        raise ValueError("月建須為 0~11、日柱須為 0~59")
+    month = month.astype(np.int8)[:, None]
+    pillar = pillar.astype(np.int8)
+    day = CYCLE_BRANCH[pillar][:, None]
+
+    branch = CAST_FIELDS["m_branch"][idx]
+    moving = CAST_FIELDS["moving"][idx]
+    el = BRANCH_ELEMENT[branch]
+    month_rel = BRANCH_RELATION[month, branch]
+    day_rel = BRANCH_RELATION[day, branch]
+    back_rel = np.where(moving, BRANCH_RELATION[CAST_FIELDS["c_branch"][idx], branch], 0).astype(np.uint16)
+    voids = CYCLE_VOIDS[pillar]
+    day_clash = (day_rel & CLASH) > 0
+    strong = MONTH_STRONG_MASK[month, branch]
+    return {
+        "month_rel": month_rel,
+        "day_rel": day_rel,
+        "back_rel": back_rel,
+        "month_stage": ELEMENT_STAGE[el, month],
+        "day_stage": ELEMENT_STAGE[el, day],
+        "moving": moving,
+        "month_break": (month_rel & CLASH) > 0,
+        "day_clash": day_clash & moving,
+        "hidden_move": day_clash & ~moving & strong,
+        "day_break": day_clash & ~moving & ~strong,
+        "void": (branch == voids[:, :1]) | (branch == voids[:, 1:]),
+        "back_generate": (back_rel & GENERATES) > 0,
+        "back_control": (back_rel & CONTROLS) > 0,
+    }
@@ -0,0 +1,85 @@
+# ==============================================================================
+# 有上限的快取：LRU + TTL，附命中統計 (執行緒安全，可跨 Streamlit session 共用)
+# ==============================================================================
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, maxsize=256, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.evictions += 1
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            # 計算時不持鎖；同一 key 併發時可能重算一次，結果相同無妨
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+def memoize(maxsize=256, ttl=None):
+    # 以位置參數為 key (list 轉 tuple)，被快取的回傳值請視為唯讀
+    def decorator(func):
+        cache = LRUCache(maxsize, ttl)
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            key = tuple(tuple(a) if isinstance(a, list) else a for a in args)
+            return cache.get_or_compute(key, lambda: func(*args))
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
@@ -0,0 +1,310 @@
+# ==============================================================================
+# 干支曆查表：西曆時刻 -> 年/月/日/時柱，不需每次做完整農曆換算
+# ==============================================================================
+# - 日柱：由日期序數直接取 60 餘數 (與 lunar_python getDayInGanZhi 相同，以 00:00 換日)
+# - 時柱：地支由小時決定，天干由日干推算 (23 時以後用次日日干，同 getTimeInGanZhi)
+# - 年柱 / 月柱：以「節」交接時刻為界 (同 get*InGanZhiExact)，
+#   1900~2100 年間所有節的時刻預先存成 data/ganzhi_calendar.bin，查詢時二分搜尋。
+# 範圍外或索引檔不存在時，退回 lunar_python 完整換算。
+#
+# 重建索引檔：python liuyao_calendar.py build
+# 與 lunar_python 比對：python liuyao_calendar.py verify
+
+import bisect
+import datetime
+import mmap
+import os
+import struct
+import sys
+
+from liuyao_engine import SEXAGENARY_CYCLE
+
+CALENDAR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "ganzhi_calendar.bin")
+
+# 檔頭：magic(4) + version(uint32) + count(uint32) + padding(4)，
+# 之後依序為 int64[count] 節交接秒數、uint8[count] 月柱索引、uint8[count] 年柱索引 (little-endian)
+CALENDAR_MAGIC = b"LYGZ"
+CALENDAR_VERSION = 1
+HEADER = struct.Struct("<4sII4x")
+
+INDEX_START = datetime.datetime(1900, 1, 1)
+INDEX_END = datetime.datetime(2101, 1, 1)
+_EPOCH_ORDINAL = INDEX_START.toordinal()
+_INDEX_END_SECONDS = (INDEX_END.toordinal() - _EPOCH_ORDINAL) * 86400
+
+# lunar_python 以儒略日正午 - 11 取日干支，換算成 date.toordinal() 的偏移量
+_DAY_CYCLE_OFFSET = 1721414
+
+# lunar_python 的節 (JIE_QI_IN_USE 中偶數位的名稱，含跨年的英文別名)
+JIE_NAMES = ("DA_XUE", "小寒", "立春", "惊蛰", "清明", "立夏", "芒种", "小暑", "立秋", "白露", "寒露", "立冬", "大雪", "XIAO_HAN", "LI_CHUN", "JING_ZHE")
+
+# ==============================================================================
+# 1. 索引檔讀取 (mmap，零複製)
+# ==============================================================================
+
+class CalendarIndex:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != CALENDAR_MAGIC or version != CALENDAR_VERSION:
+            raise ValueError(f"干支曆索引檔格式不符：{path}")
+        view = memoryview(self._mmap)
+        offset = HEADER.size
+        self.boundaries = view[offset:offset + 8 * count].cast("q")
+        offset += 8 * count
+        self.month_idx = view[offset:offset + count]
+        offset += count
+        self.year_idx = view[offset:offset + count]
+        self.count = count
+
+    def covers(self, seconds):
+        return self.boundaries[0] <= seconds < _INDEX_END_SECONDS
+
+    def lookup(self, seconds):
+        k = bisect.bisect_right(self.boundaries, seconds) - 1
+        return self.year_idx[k], self.month_idx[k]
+
+
+_INDEX = None
+_INDEX_LOADED = False
+
+def get_calendar_index():
+    global _INDEX, _INDEX_LOADED
+    if not _INDEX_LOADED:
+        _INDEX_LOADED = True
+        if os.path.exists(CALENDAR_PATH) and sys.byteorder == "little":
+            _INDEX = CalendarIndex(CALENDAR_PATH)
+    return _INDEX
+
+# ==============================================================================
+# 2. 查詢
+# ==============================================================================
+
+def _to_seconds(ordinal, hour, minute, second):
+    return (ordinal - _EPOCH_ORDINAL) * 86400 + hour * 3600 + minute * 60 + second
+
+def day_cycle_index(date):
+    return (date.toordinal() + _DAY_CYCLE_OFFSET) % 60
+
+def hour_cycle_index(date, hour):
+    day_stem = (date.toordinal() + _DAY_CYCLE_OFFSET + (hour == 23)) % 10
+    zhi = ((hour + 1) // 2) % 12
+    gan = (day_stem % 5 * 2 + zhi) % 10
+    # 由天干、地支索引反推六十甲子索引
+    return (6 * gan - 5 * zhi) % 60
+
+def lunar_ganzhi(year, month, day, hour, minute, second=0):
+    from lunar_python import Solar
+    lunar = Solar.fromYmdHms(year, month, day, hour, minute, second).getLunar()
+    return (
+        lunar.getYearInGanZhiExact(),
+        lunar.getMonthInGanZhiExact(),
+        lunar.getDayInGanZhi(),
+        lunar.getTimeInGanZhi(),
+    )
+
+def get_ganzhi(year, month, day, hour, minute, second=0):
+    # 回傳 (年柱, 月柱, 日柱, 時柱)，與 lunar_python 的 Exact 年月柱、日柱、時柱一致
+    date = datetime.date(year, month, day)
+    seconds = _to_seconds(date.toordinal(), hour, minute, second)
+    index = get_calendar_index()
+    if index is None or not index.covers(seconds):
+        return lunar_ganzhi(year, month, day, hour, minute, second)
+    year_i, month_i = index.lookup(seconds)
+    return (
+        SEXAGENARY_CYCLE[year_i],
+        SEXAGENARY_CYCLE[month_i],
+        SEXAGENARY_CYCLE[day_cycle_index(date)],
+        SEXAGENARY_CYCLE[hour_cycle_index(date, hour)],
+    )
+
+# ==============================================================================
+# 3. 反查：干支 -> 西曆時段
+# ==============================================================================
+# 年柱、月柱由節交接區段決定 (以倒排索引直接取出符合的區段)，
+# 日柱每 60 日循環，時柱由時辰與日干決定；依序交集後回傳 [起, 迄) 時段。
+
+_SEGMENTS_BY_YEAR = None
+_SEGMENTS_BY_MONTH = None
+
+def _segment_index(index):
+    global _SEGMENTS_BY_YEAR, _SEGMENTS_BY_MONTH
+    if _SEGMENTS_BY_YEAR is None:
+        by_year = [[] for _ in range(60)]
+        by_month = [[] for _ in range(60)]
+        for k in range(index.count - 1):
+            by_year[index.year_idx[k]].append(k)
+            by_month[index.month_idx[k]].append(k)
+        _SEGMENTS_BY_YEAR, _SEGMENTS_BY_MONTH = by_year, by_month
+    return _SEGMENTS_BY_YEAR, _SEGMENTS_BY_MONTH
+
+def _pillar_index(pillar, label):
+    if not pillar:
+        return None
+    pillar = pillar.strip()
+    if pillar not in SEXAGENARY_CYCLE:
+        raise ValueError(f"{label}「{pillar}」不是六十甲子之一")
+    return SEXAGENARY_CYCLE.index(pillar)
+
+def _clip(intervals, lo, hi):
+    return [(max(a, lo), min(b, hi)) for a, b in intervals if a < hi and b > lo]
+
+def _filter_day(intervals, day_i):
+    result = []
+    for a, b in intervals:
+        first = a // 86400
+        first += (day_i - (first + _EPOCH_ORDINAL + _DAY_CYCLE_OFFSET)) % 60
+        for d in range(first, (b - 1) // 86400 + 1, 60):
+            result.extend(_clip([(d * 86400, (d + 1) * 86400)], a, b))
+    return result
+
+def _hour_windows(d, hour_i):
+    # 第 d 日 (相對 1900-01-01) 內符合時柱的時段；23 時的子時用次日日干
+    gan, zhi = hour_i % 10, hour_i % 12
+    base = d * 86400
+    windows = []
+    if zhi == 0:
+        hours = ((0, 1, 0), (23, 24, 1))
+    else:
+        hours = ((2 * zhi - 1, 2 * zhi + 1, 0),)
+    for h_start, h_end, next_day in hours:
+        day_stem = (d + next_day + _EPOCH_ORDINAL + _DAY_CYCLE_OFFSET) % 10
+        if (day_stem % 5 * 2 + zhi) % 10 == gan:
+            windows.append((base + h_start * 3600, base + h_end * 3600))
+    return windows
+
+def _filter_hour(intervals, hour_i):
+    result = []
+    for a, b in intervals:
+        for d in range(a // 86400, (b - 1) // 86400 + 1):
+            result.extend(_clip(_hour_windows(d, hour_i), a, b))
+    return result
+
+def _merge(intervals):
+    merged = []
+    for a, b in sorted(intervals):
+        if merged and a <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+        else:
+            merged.append((a, b))
+    return merged
+
+def find_dates(year=None, month=None, day=None, hour=None, start=INDEX_START, end=INDEX_END):
+    # 任意指定年/月/日/時柱 (空白表示不限)，回傳 [(起, 迄), ...] 西曆時段 (迄為不含)
+    # 搜尋範圍限於索引涵蓋的 1900~2100 年
+    year_i = _pillar_index(year, "年柱")
+    month_i = _pillar_index(month, "月柱")
+    day_i = _pillar_index(day, "日柱")
+    hour_i = _pillar_index(hour, "時柱")
+
+    index = get_calendar_index()
+    if index is None:
+        raise FileNotFoundError(CALENDAR_PATH)
+
+    lo = max(_to_seconds(start.toordinal(), start.hour, start.minute, start.second), 0)
+    hi = min(_to_seconds(end.toordinal(), end.hour, end.minute, end.second), _INDEX_END_SECONDS)
+    if lo >= hi:
+        return []
+
+    if year_i is None and month_i is None:
+        intervals = [(lo, hi)]
+    else:
+        by_year, by_month = _segment_index(index)
+        if year_i is not None and month_i is not None:
+            segments = sorted(set(by_year[year_i]) & set(by_month[month_i]))
+        else:
+            segments = by_year[year_i] if year_i is not None else by_month[month_i]
+        intervals = _clip([(index.boundaries[k], index.boundaries[k + 1]) for k in segments], lo, hi)
+
+    if day_i is not None:
+        intervals = _filter_day(intervals, day_i)
+    if hour_i is not None:
+        intervals = _filter_hour(intervals, hour_i)
+
+    return [
+        (INDEX_START + datetime.timedelta(seconds=a), INDEX_START + datetime.timedelta(seconds=b))
+        for a, b in _merge(intervals)
+    ]
+
+# ==============================================================================
+# 4. 建檔與驗證 (需要 lunar_python)
+# ==============================================================================
+
+def _collect_jie_boundaries():
+    from lunar_python import Solar
+    boundaries = {}
+    for y in range(INDEX_START.year - 1, INDEX_END.year + 1):
+        table = Solar.fromYmd(y, 6, 1).getLunar().getJieQiTable()
+        for name in JIE_NAMES:
+            s = table[name]
+            ordinal = datetime.date(s.getYear(), s.getMonth(), s.getDay()).toordinal()
+            seconds = _to_seconds(ordinal, s.getHour(), s.getMinute(), s.getSecond())
+            boundaries[seconds] = s
+    return [boundaries[k] for k in sorted(boundaries)]
+
+def build_calendar(path=CALENDAR_PATH):
+    boundaries = []
+    month_idx = bytearray()
+    year_idx = bytearray()
+    for s in _collect_jie_boundaries():
+        ordinal = datetime.date(s.getYear(), s.getMonth(), s.getDay()).toordinal()
+        seconds = _to_seconds(ordinal, s.getHour(), s.getMinute(), s.getSecond())
+        gz_year, gz_month, _, _ = lunar_ganzhi(s.getYear(), s.getMonth(), s.getDay(), s.getHour(), s.getMinute(), s.getSecond())
+        boundaries.append(seconds)
+        month_idx.append(SEXAGENARY_CYCLE.index(gz_month))
+        year_idx.append(SEXAGENARY_CYCLE.index(gz_year))
+    if not (boundaries[0] <= 0 and boundaries[-1] >= _INDEX_END_SECONDS):
+        raise ValueError("節氣資料未完整涵蓋索引範圍")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(CALENDAR_MAGIC, CALENDAR_VERSION, len(boundaries)))
+        f.write(struct.pack(f"<{len(boundaries)}q", *boundaries))
+        f.write(bytes(month_idx))
+        f.write(bytes(year_idx))
+    return len(boundaries)
+
+def verify_calendar(samples=5000, seed=0):
+    # 比對每個節交接前後一秒，以及範圍內隨機時刻；回傳不一致清單
+    import random
+    rng = random.Random(seed)
+    index = get_calendar_index()
+    if index is None:
+        raise FileNotFoundError(CALENDAR_PATH)
+
+    moments = []
+    for k in range(index.count):
+        for delta in (-1, 0):
+            t = INDEX_START + datetime.timedelta(seconds=index.boundaries[k] + delta)
+            if INDEX_START <= t < INDEX_END:
+                moments.append(t)
+    span = int((INDEX_END - INDEX_START).total_seconds())
+    for _ in range(samples):
+        moments.append(INDEX_START + datetime.timedelta(seconds=rng.randrange(span)))
+    for d in range(0, 24):
+        moments.append(datetime.datetime(2024, 1, 1, d, 30))
+
+    mismatches = []
+    for t in moments:
+        args = (t.year, t.month, t.day, t.hour, t.minute, t.second)
+        expected = lunar_ganzhi(*args)
+        actual = get_ganzhi(*args)
+        if actual != expected:
+            mismatches.append((t, expected, actual))
+    return len(moments), mismatches
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    if command == "build":
+        print(f"已寫入 {build_calendar()} 筆節交接時刻：{CALENDAR_PATH}")
+    elif command == "verify":
+        total, mismatches = verify_calendar()
+        for t, expected, actual in mismatches[:20]:
+            print(f"{t}：lunar_python={expected} 索引={actual}")
+        print(f"比對 {total} 個時刻，不一致 {len(mismatches)} 個")
+        sys.exit(1 if mismatches else 0)
+    else:
+        print("用法：python liuyao_calendar.py [build|verify]")
+        sys.exit(2)
@@ -0,0 +1,49 @@
+# ==============================================================================
+# 起卦亂數：可指定種子的擲錢引擎 (每個 session 各自一個亂數產生器)
+# ==============================================================================
+# 兩種模型：
+#   three_coin  三錢法：三枚錢幣各自正反 (正 2 分、反 3 分)，合計 6~9，
+#               機率 6、9 各 1/8，7、8 各 3/8 (與側邊欄起卦指南一致)
+#   uniform     6、7、8、9 各 1/4 (舊版 random.choice 的行為)
+# 只用標準庫 random，不載入 NumPy；大量模擬請用 liuyao_simulate。
+
+import random
+
+CAST_MODELS = ("three_coin", "uniform")
+
+CAST_MODEL_LABELS = {"three_coin": "三錢法 (6、9 各 1/8，7、8 各 3/8)", "uniform": "均勻 (各 1/4)"}
+
+DEFAULT_CAST_MODEL = "three_coin"
+
+LINE_PROBABILITIES = {
+    "three_coin": {6: 1 / 8, 7: 3 / 8, 8: 3 / 8, 9: 1 / 8},
+    "uniform": {6: 1 / 4, 7: 1 / 4, 8: 1 / 4, 9: 1 / 4},
+}
+
+# 3 個位元 (每枚錢幣一個，1 為反) -> 爻值：反面數 0~3 對應 6~9
+THREE_COIN_VALUES = tuple(6 + bin(bits).count("1") for bits in range(8))
+
+
+def new_rng(seed=None):
+    # seed 為 None 時由系統亂數決定種子，並回傳實際使用的種子以便重現
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 32)
+    return random.Random(seed), seed
+
+def parse_seed(raw):
+    # 網址參數 ?seed=... -> int，空白或格式不符時回傳 None
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return None
+
+def cast_line(rng, model=DEFAULT_CAST_MODEL):
+    if model == "three_coin":
+        return THREE_COIN_VALUES[rng.getrandbits(3)]
+    if model == "uniform":
+        return rng.choice((6, 7, 8, 9))
+    raise ValueError(f"不支援的起卦模型：{model}")
+
+def cast_lines(rng, model=DEFAULT_CAST_MODEL):
+    # 由初爻至上爻擲六次
+    return [cast_line(rng, model) for _ in range(6)]
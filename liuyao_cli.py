@@ -0,0 +1,198 @@
+# ==============================================================================
+# 批次排盤 CLI：JSONL / CSV 起卦檔 -> 任一匯出格式，以多行程平行處理
+# ==============================================================================
+# 用法：
+#   python liuyao_cli.py casts.jsonl -o charts.csv --format csv
+#   python liuyao_cli.py casts.csv -o - --format json --workers 8 --chunk-size 1000
+#
+# JSONL 每行一筆 (欄位同 HTTP API)：
+#   {"lines": [6, 7, 8, 9, 7, 8], "datetime": "2025-01-20T10:30", "question": "..."}
+#   {"lines": "678978", "pillars": {"month": "己丑", "day": "丁酉"}}
+# CSV 需有表頭，欄位：lines, datetime, year, month, day, hour, question
+#   (有 month / day 時以干支排盤，否則以 datetime 排盤)
+#
+# 輸入逐行讀取、依 chunk 切段送進 ProcessPoolExecutor，同時在途的 chunk 數有上限，
+# 結果依輸入順序寫出，因此記憶體用量只與 workers × chunk-size 有關，與檔案大小無關。
+# 格式錯誤的資料列會略過並輸出到 stderr (含行號)，結束碼為 1。
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from liuyao_export import (
+    FORMATS, ENTRY_SEPARATORS, export_prologue, export_epilogue, iter_chart_entry, record_from_input,
+)
+
+# ==============================================================================
+# 1. 讀取輸入 (產生 (行號, 原始資料) )
+# ==============================================================================
+
+def iter_jsonl(fp):
+    for line_no, line in enumerate(fp, 1):
+        if line.strip():
+            yield line_no, line
+
+def _csv_row_to_input(row):
+    data = {"lines": row.get("lines", ""), "question": row.get("question") or ""}
+    if (row.get("month") or "").strip() or (row.get("day") or "").strip():
+        data["pillars"] = {key: row.get(key) or "" for key in ("year", "month", "day", "hour")}
+    elif (row.get("datetime") or "").strip():
+        data["datetime"] = row["datetime"].strip()
+    else:
+        raise ValueError("需要 datetime 或 month / day 欄位")
+    return data
+
+def iter_csv_rows(fp):
+    # 表頭為第 1 行，資料列由第 2 行起算
+    for line_no, row in enumerate(csv.DictReader(fp), 2):
+        yield line_no, row
+
+def _parse_item(kind, raw):
+    if kind == "jsonl":
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            raise ValueError("不是合法的 JSON")
+        if not isinstance(data, dict):
+            raise ValueError("起卦輸入必須是 JSON 物件")
+        # 批次模式不允許「未給日期 = 現在時間」，避免結果隨執行時間改變
+        if data.get("pillars") is None and data.get("datetime") is None:
+            raise ValueError("需要 datetime 或 pillars 欄位")
+        return data
+    return _csv_row_to_input(raw)
+
+# ==============================================================================
+# 2. 工作行程：一個 chunk -> 一段輸出字串
+# ==============================================================================
+
+def render_chunk(kind, items, fmt):
+    # items: [(行號, 原始資料)]。每張盤都以「非第一張」的形式輸出 (含前置分隔)，
+    # 序號 (CSV 的 chart 欄) 用輸入行號，因此各段可獨立平行處理；
+    # 整份輸出的第一張盤由主行程去掉前置分隔。
+    parts = []
+    errors = []
+    for line_no, raw in items:
+        try:
+            record = record_from_input(_parse_item(kind, raw))
+        except ValueError as e:
+            errors.append((line_no, str(e)))
+            continue
+        parts.extend(iter_chart_entry(record, fmt, line_no))
+    return "".join(parts), len(items) - len(errors), errors
+
+# ==============================================================================
+# 3. 主流程
+# ==============================================================================
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+class Progress:
+    def __init__(self, stream, interval=1.0):
+        self.stream = stream
+        self.interval = interval
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.charts = 0
+        self.errors = 0
+
+    def update(self, charts, errors, force=False):
+        self.charts += charts
+        self.errors += errors
+        now = time.perf_counter()
+        if self.stream is not None and (force or now - self.last >= self.interval):
+            self.last = now
+            elapsed = now - self.start
+            rate = self.charts / elapsed if elapsed else 0.0
+            self.stream.write(f"\r已處理 {self.charts:,} 張盤 ({self.errors:,} 筆錯誤)，{rate:,.0f} 張/秒")
+            self.stream.flush()
+
+    def finish(self):
+        if self.stream is not None:
+            self.stream.write("\n")
+
+def run(items, kind, out, fmt, workers, chunk_size, progress):
+    # 回傳 (寫出的盤數, 錯誤筆數)；錯誤內容隨即寫到 stderr，不累積在記憶體
+    separator = ENTRY_SEPARATORS[fmt]
+    written = 0
+    error_count = 0
+
+    def handle(result):
+        nonlocal written, error_count
+        chunk_text, count, chunk_errors = result
+        if count and not written:
+            chunk_text = chunk_text[len(separator):]
+        out.write(chunk_text)
+        written += count
+        error_count += len(chunk_errors)
+        for line_no, message in chunk_errors:
+            sys.stderr.write(f"\n第 {line_no} 行：{message}\n")
+        progress.update(count, len(chunk_errors))
+
+    out.write(export_prologue(fmt))
+    if workers <= 1:
+        for chunk in _chunks(items, chunk_size):
+            handle(render_chunk(kind, chunk, fmt))
+    else:
+        # 在途的 chunk 最多 workers × 2 個，依送出順序收回以維持輸出順序
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for chunk in _chunks(items, chunk_size):
+                pending.append(pool.submit(render_chunk, kind, chunk, fmt))
+                if len(pending) >= workers * 2:
+                    handle(pending.popleft().result())
+            while pending:
+                handle(pending.popleft().result())
+    out.write(export_epilogue(fmt))
+
+    progress.update(0, 0, force=True)
+    progress.finish()
+    return written, error_count
+
+def _detect_kind(path, kind):
+    if kind:
+        return kind
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="六爻批次排盤：JSONL / CSV 起卦檔 -> text / json / markdown / csv")
+    parser.add_argument("input", help="起卦檔路徑，- 表示 stdin")
+    parser.add_argument("-o", "--output", default="-", help="輸出路徑，- 表示 stdout (預設)")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="json", help="輸出格式 (預設 json)")
+    parser.add_argument("--input-format", choices=("jsonl", "csv"), default=None, help="輸入格式 (預設依副檔名)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="工作行程數 (1 = 不開行程池)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="每個工作單位的筆數")
+    parser.add_argument("-q", "--quiet", action="store_true", help="不顯示進度")
+    args = parser.parse_args(argv)
+
+    kind = _detect_kind(args.input, args.input_format)
+    progress = Progress(None if args.quiet else sys.stderr)
+
+    fin = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    fout = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        items = iter_csv_rows(fin) if kind == "csv" else iter_jsonl(fin)
+        written, error_count = run(items, kind, fout, args.format, args.workers, args.chunk_size, progress)
+    finally:
+        if fin is not sys.stdin: fin.close()
+        if fout is not sys.stdout: fout.close()
+
+    elapsed = time.perf_counter() - progress.start
+    rate = written / elapsed if elapsed else 0.0
+    sys.stderr.write(f"完成：{written:,} 張盤，{error_count:,} 筆錯誤，{elapsed:.2f} 秒，{rate:,.0f} 張/秒\n")
+    sys.exit(1 if error_count else 0)
+
+
+if __name__ == "__main__":
+    main()
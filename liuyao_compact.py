@@ -0,0 +1,221 @@
+# ==============================================================================
+# 壓縮盤面格式：一張盤 = 15 bits 整數，爻資料以小整數編號存於 array
+# ==============================================================================
+# 位元配置 (低位在前)：
+#   bits 0-5   主卦 6-bit 卦碼 (bit i = 第 i+1 爻，1 為陽)
+#   bits 6-11  變卦 6-bit 卦碼
+#   bits 12-14 六神起點 (0~5，由日干決定)
+# 其餘欄位 (納甲、六親、世應、藏伏、納音) 皆可由卦碼查表還原，
+# 因此與 calculate_hexagram 的 lines_data 可無損互轉。
+
+from array import array
+
+from liuyao_engine import (
+    HEAVENLY_STEMS, EARTHLY_BRANCHES, BRANCH_ELEMENTS, NAYIN_TABLE,
+    LIU_SHEN_ORDER, LIU_SHEN_START, CAST_TABLE,
+    FIVE_ELEMENTS, SIX_RELATIVES, SHIYING_MARKS,
+    cast_index,
+)
+
+CHART_BITS = 15
+
+# 每爻紀錄欄位 (array 內的偏移量)
+F_M_STEM, F_M_BRANCH, F_M_REL, F_SHIYING, F_C_STEM, F_C_BRANCH, F_C_REL, F_H_BRANCH, F_H_REL = range(9)
+LINE_FIELDS = 9
+
+BRANCH_ELEMENT_IDS = [FIVE_ELEMENTS.index(BRANCH_ELEMENTS[b]) for b in EARTHLY_BRANCHES]
+
+# ==============================================================================
+# 1. 卦碼 <-> 起卦索引 對照表
+# ==============================================================================
+# 每爻 (本, 變) 二位元與爻值 6/7/8/9 一一對應，故 (主卦碼, 變卦碼) 的 12 bits
+# 與 liuyao_engine.cast_index 的 4096 種組合等價。
+
+_VALUE_BITS = {0: (0, 1), 1: (1, 1), 2: (0, 0), 3: (1, 0)}  # 爻值 - 6 -> (本, 變)
+
+CAST_TO_CODES = array("H", bytes(2 * 4096))
+CODES_TO_CAST = array("H", bytes(2 * 4096))
+
+for _idx in range(4096):
+    _m = _c = 0
+    for _i in range(6):
+        _mb, _cb = _VALUE_BITS[(_idx >> (2 * _i)) & 3]
+        _m |= _mb << _i
+        _c |= _cb << _i
+    CAST_TO_CODES[_idx] = _m | (_c << 6)
+    CODES_TO_CAST[_m | (_c << 6)] = _idx
+
+# ==============================================================================
+# 2. 爻紀錄表：4096 種起卦 × 6 爻 × 9 欄，以 signed byte 儲存 (-1 表示無)
+# ==============================================================================
+
+def _line_record(hidden, main, change):
+    h_branch, h_rel = -1, -1
+    if hidden:
+        h_rel = SIX_RELATIVES.index(hidden[:2])
+        h_branch = EARTHLY_BRANCHES.index(hidden[2])
+    return (
+        HEAVENLY_STEMS.index(main["stem"]), EARTHLY_BRANCHES.index(main["branch"]),
+        SIX_RELATIVES.index(main["rel"]), SHIYING_MARKS.index(main["shiying"]),
+        HEAVENLY_STEMS.index(change["stem"]), EARTHLY_BRANCHES.index(change["branch"]),
+        SIX_RELATIVES.index(change["rel"]), h_branch, h_rel,
+    )
+
+LINE_RECORDS = array("b")
+for _entry in CAST_TABLE:
+    for _hidden, _main, _change, _move in _entry[3]:
+        LINE_RECORDS.extend(_line_record(_hidden, _main, _change))
+
+del _idx, _m, _c, _i, _mb, _cb, _entry, _hidden, _main, _change, _move
+
+# ==============================================================================
+# 3. 壓縮物件
+# ==============================================================================
+
+class CompactLine:
+    __slots__ = (
+        "god", "yang", "move", "shiying",
+        "m_stem", "m_branch", "m_rel", "c_yang", "c_stem", "c_branch", "c_rel",
+        "h_branch", "h_rel",
+    )
+
+    def __init__(self, god, yang, c_yang, record):
+        self.god = god
+        self.yang = yang
+        self.c_yang = c_yang
+        self.move = yang != c_yang
+        (self.m_stem, self.m_branch, self.m_rel, self.shiying,
+         self.c_stem, self.c_branch, self.c_rel, self.h_branch, self.h_rel) = record
+
+    @property
+    def m_el(self):
+        return BRANCH_ELEMENT_IDS[self.m_branch]
+
+    @property
+    def c_el(self):
+        return BRANCH_ELEMENT_IDS[self.c_branch]
+
+    def to_dict(self):
+        m_branch = EARTHLY_BRANCHES[self.m_branch]
+        c_branch = EARTHLY_BRANCHES[self.c_branch]
+        m_stem = HEAVENLY_STEMS[self.m_stem]
+        c_stem = HEAVENLY_STEMS[self.c_stem]
+        hidden = ""
+        if self.h_branch >= 0:
+            h_branch = EARTHLY_BRANCHES[self.h_branch]
+            hidden = f"{SIX_RELATIVES[self.h_rel]}{h_branch}{BRANCH_ELEMENTS[h_branch]}"
+        return {
+            "god": LIU_SHEN_ORDER[self.god],
+            "hidden": hidden,
+            "main": {"stem": m_stem, "branch": m_branch, "el": BRANCH_ELEMENTS[m_branch], "nayin": NAYIN_TABLE.get(m_stem + m_branch, ""), "rel": SIX_RELATIVES[self.m_rel], "shiying": SHIYING_MARKS[self.shiying], "type": "yang" if self.yang else "yin"},
+            "change": {"stem": c_stem, "branch": c_branch, "el": BRANCH_ELEMENTS[c_branch], "nayin": NAYIN_TABLE.get(c_stem + c_branch, ""), "rel": SIX_RELATIVES[self.c_rel], "type": "yang" if self.c_yang else "yin"},
+            "move": self.move,
+        }
+
+    def __repr__(self):
+        return f"CompactLine({self.to_dict()!r})"
+
+
+class CompactChart:
+    __slots__ = ("packed",)
+
+    def __init__(self, main_code, change_code, god_start=0):
+        if not (0 <= main_code < 64 and 0 <= change_code < 64 and 0 <= god_start < 6):
+            raise ValueError(f"卦碼或六神起點超出範圍：{main_code}, {change_code}, {god_start}")
+        self.packed = main_code | (change_code << 6) | (god_start << 12)
+
+    @classmethod
+    def from_int(cls, packed):
+        return cls(packed & 0x3F, (packed >> 6) & 0x3F, packed >> 12)
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls.from_int(int.from_bytes(data, "little"))
+
+    @classmethod
+    def from_values(cls, numbers, day_stem):
+        codes = CAST_TO_CODES[cast_index(numbers)]
+        return cls(codes & 0x3F, codes >> 6, LIU_SHEN_START.get(day_stem, 0))
+
+    @classmethod
+    def from_lines_data(cls, lines_data):
+        if len(lines_data) != 6:
+            raise ValueError(f"需要六爻資料，收到 {len(lines_data)} 爻")
+        main_code = change_code = 0
+        for i, line in enumerate(lines_data):
+            main_code |= (line["main"]["type"] == "yang") << i
+            change_code |= (line["change"]["type"] == "yang") << i
+        god_start = LIU_SHEN_ORDER.index(lines_data[0]["god"])
+        chart = cls(main_code, change_code, god_start)
+        if chart.to_lines_data() != list(lines_data):
+            raise ValueError("lines_data 與卦碼推算結果不一致，無法無損壓縮")
+        return chart
+
+    @property
+    def main_code(self):
+        return self.packed & 0x3F
+
+    @property
+    def change_code(self):
+        return (self.packed >> 6) & 0x3F
+
+    @property
+    def god_start(self):
+        return self.packed >> 12
+
+    @property
+    def cast_index(self):
+        return CODES_TO_CAST[self.packed & 0xFFF]
+
+    @property
+    def values(self):
+        idx = self.cast_index
+        return [6 + ((idx >> (2 * i)) & 3) for i in range(6)]
+
+    @property
+    def lines(self):
+        base = self.cast_index * 6 * LINE_FIELDS
+        main_code, change_code = self.main_code, self.change_code
+        god_start = self.god_start
+        return tuple(
+            CompactLine(
+                (god_start + i) % 6, (main_code >> i) & 1, (change_code >> i) & 1,
+                LINE_RECORDS[base + i * LINE_FIELDS: base + (i + 1) * LINE_FIELDS],
+            )
+            for i in range(6)
+        )
+
+    def to_int(self):
+        return self.packed
+
+    def to_bytes(self):
+        return self.packed.to_bytes(2, "little")
+
+    def to_lines_data(self):
+        return [line.to_dict() for line in self.lines]
+
+    def to_result(self):
+        # 還原為 calculate_hexagram 的 8-tuple 回傳格式
+        m_name, c_name, palace_name, _, palace_element, attributes, c_attributes, c_palace_name = CAST_TABLE[self.cast_index]
+        return m_name, c_name, palace_name, self.to_lines_data(), palace_element, list(attributes), list(c_attributes), c_palace_name
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactChart):
+            return NotImplemented
+        return self.packed == other.packed
+
+    def __hash__(self):
+        return self.packed
+
+    def __repr__(self):
+        return f"CompactChart(main_code={self.main_code:#08b}, change_code={self.change_code:#08b}, god_start={self.god_start})"
+
+# ==============================================================================
+# 4. 批次壓縮 (每盤 2 bytes)
+# ==============================================================================
+
+def encode_charts(charts):
+    return array("H", (chart.packed for chart in charts))
+
+def decode_charts(packed_array):
+    return [CompactChart.from_int(p) for p in packed_array]
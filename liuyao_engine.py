@@ -0,0 +1,350 @@
+# ==============================================================================
+# 六爻裝卦引擎：純資料與運算，不依賴 Streamlit，可供 UI / 批次作業共用
+# ==============================================================================
+
+# ==============================================================================
+# 1. 核心資料庫
+# ==============================================================================
+
+HEAVENLY_STEMS = ["甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸"]
+EARTHLY_BRANCHES = ["子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥"]
+
+LIU_SHEN_ORDER = ["青龍", "朱雀", "勾陳", "騰蛇", "白虎", "玄武"]
+LIU_SHEN_START = {
+    "甲": 0, "乙": 0, "丙": 1, "丁": 1, "戊": 2, 
+    "己": 3, "庚": 4, "辛": 4, "壬": 5, "癸": 5
+}
+
+NAYIN_TABLE = {
+    "甲子": "海中金", "乙丑": "海中金", "丙寅": "爐中火", "丁卯": "爐中火", "戊辰": "大林木", "己巳": "大林木", 
+    "庚午": "路旁土", "辛未": "路旁土", "壬申": "劍鋒金", "癸酉": "劍鋒金", "甲戌": "山頭火", "乙亥": "山頭火",
+    "丙子": "澗下水", "丁丑": "澗下水", "戊寅": "城頭土", "己卯": "城頭土", "庚辰": "白蠟金", "辛巳": "白蠟金", 
+    "壬午": "楊柳木", "癸未": "楊柳木", "甲申": "井泉水", "乙酉": "井泉水", "丙戌": "屋上土", "丁亥": "屋上土",
+    "戊子": "霹靂火", "己丑": "霹靂火", "庚寅": "松柏木", "辛卯": "松柏木", "壬辰": "長流水", "癸巳": "長流水", 
+    "甲午": "沙中金", "乙未": "沙中金", "丙申": "山下火", "丁酉": "山下火", "戊戌": "平地木", "己亥": "平地木",
+    "庚子": "壁上土", "辛丑": "壁上土", "壬寅": "金箔金", "癸卯": "金箔金", "甲辰": "佛燈火", "乙巳": "佛燈火", 
+    "丙午": "天河水", "丁未": "天河水", "戊申": "大驛土", "己酉": "大驛土", "庚戌": "釵釧金", "辛亥": "釵釧金",
+    "壬子": "桑柘木", "癸丑": "桑柘木", "甲寅": "大溪水", "乙卯": "大溪水", "丙辰": "沙中土", "丁巳": "沙中土", 
+    "戊午": "天上火", "己未": "天上火", "庚申": "石榴木", "辛酉": "石榴木", "壬戌": "大海水", "癸亥": "大海水"
+}
+
+TRIGRAMS = {
+    "乾": {"code": [1, 1, 1], "element": "金", "stems": ["甲", "壬"], "branches": ["子", "寅", "辰", "午", "申", "戌"]},
+    "兌": {"code": [1, 1, 0], "element": "金", "stems": ["丁", "丁"], "branches": ["巳", "卯", "丑", "亥", "酉", "未"]}, 
+    "離": {"code": [1, 0, 1], "element": "火", "stems": ["己", "己"], "branches": ["卯", "丑", "亥", "酉", "未", "巳"]},
+    "震": {"code": [1, 0, 0], "element": "木", "stems": ["庚", "庚"], "branches": ["子", "寅", "辰", "午", "申", "戌"]}, 
+    "巽": {"code": [0, 1, 1], "element": "木", "stems": ["辛", "辛"], "branches": ["丑", "亥", "酉", "未", "巳", "卯"]}, 
+    "坎": {"code": [0, 1, 0], "element": "水", "stems": ["戊", "戊"], "branches": ["寅", "辰", "午", "申", "戌", "子"]},
+    "艮": {"code": [0, 0, 1], "element": "土", "stems": ["丙", "丙"], "branches": ["辰", "午", "申", "戌", "子", "寅"]}, 
+    "坤": {"code": [0, 0, 0], "element": "土", "stems": ["乙", "癸"], "branches": ["未", "巳", "卯", "丑", "亥", "酉"]},
+}
+
+HEX_INFO = {
+    "乾為天": ("乾", 6), "天風姤": ("乾", 1), "天山遯": ("乾", 2), "天地否": ("乾", 3), "風地觀": ("乾", 4), "山地剝": ("乾", 5), "火地晉": ("乾", 7), "火天大有": ("乾", 8),
+    "坎為水": ("坎", 6), "水澤節": ("坎", 1), "水雷屯": ("坎", 2), "水火既濟": ("坎", 3), "澤火革": ("坎", 4), "雷火豐": ("坎", 5), "地火明夷": ("坎", 7), "地水師": ("坎", 8),
+    "艮為山": ("艮", 6), "山火賁": ("艮", 1), "山天大畜": ("艮", 2), "山澤損": ("艮", 3), "火澤睽": ("艮", 4), "天澤履": ("艮", 5), "風澤中孚": ("艮", 7), "風山漸": ("艮", 8),
+    "震為雷": ("震", 6), "雷地豫": ("震", 1), "雷水解": ("震", 2), "雷風恆": ("震", 3), "地風升": ("震", 4), "水風井": ("震", 5), "澤風大過": ("震", 7), "澤雷隨": ("震", 8),
+    "巽為風": ("巽", 6), "風天小畜": ("巽", 1), "風火家人": ("巽", 2), "風雷益": ("巽", 3), "天雷無妄": ("巽", 4), "火雷噬嗑": ("巽", 5), "山雷頤": ("巽", 7), "山風蠱": ("巽", 8),
+    "離為火": ("離", 6), "火山旅": ("離", 1), "火風鼎": ("離", 2), "火水未濟": ("離", 3), "山水蒙": ("離", 4), "風水渙": ("離", 5), "天水訟": ("離", 7), "天火同人": ("離", 8),
+    "坤為地": ("坤", 6), "地雷復": ("坤", 1), "地澤臨": ("坤", 2), "地天泰": ("坤", 3), "雷天大壯": ("坤", 4), "澤天夬": ("坤", 5), "水天需": ("坤", 7), "水地比": ("坤", 8),
+    "兌為澤": ("兌", 6), "澤水困": ("兌", 1), "澤地萃": ("兌", 2), "澤山咸": ("兌", 3), "水山蹇": ("兌", 4), "地山謙": ("兌", 5), "雷山小過": ("兌", 7), "雷澤歸妹": ("兌", 8),
+}
+
+SHORT_NAME_MAP = {}
+FULL_TO_SHORT_MAP = {}
+
+for full_name in HEX_INFO.keys():
+    if "為" in full_name:
+        short_name = full_name[0]
+    elif len(full_name) == 4:
+        short_name = full_name[-2:]
+    else:
+        short_name = full_name[-1]
+    
+    SHORT_NAME_MAP[short_name] = full_name
+    SHORT_NAME_MAP[full_name] = full_name
+    FULL_TO_SHORT_MAP[full_name] = short_name
+
+STAR_A_TABLE = {"子": ("未", "亥"), "丑": ("未", "子"), "寅": ("戌", "丑"), "卯": ("戌", "寅"), "辰": ("戌", "卯"), "巳": ("丑", "辰"), "午": ("丑", "巳"), "未": ("丑", "午"), "申": ("辰", "未"), "酉": ("辰", "申"), "戌": ("辰", "酉"), "亥": ("未", "戌")}
+STAR_B_TABLE = {"甲": ("寅", "卯", "巳", "丑、未"), "乙": ("卯", "寅", "午", "申、子"), "丙": ("巳", "午", "申", "酉、亥"), "丁": ("午", "巳", "酉", "酉、亥"), "戊": ("巳", "午", "申", "丑、未"), "己": ("午", "巳", "酉", "申、子"), "庚": ("申", "酉", "亥", "寅、午"), "辛": ("酉", "申", "子", "寅、午"), "壬": ("亥", "子", "寅", "卯、巳"), "癸": ("子", "亥", "卯", "卯、巳")}
+STAR_C_TABLE = {"子": ("酉", "戌", "子", "寅", "辰", "巳", "午"), "丑": ("午", "未", "酉", "亥", "丑", "寅", "卯"), "寅": ("卯", "辰", "午", "申", "戌", "亥", "子"), "卯": ("子", "丑", "卯", "巳", "未", "申", "酉"), "辰": ("酉", "戌", "子", "寅", "辰", "巳", "午"), "巳": ("午", "未", "酉", "亥", "丑", "寅", "卯"), "午": ("卯", "辰", "午", "申", "戌", "亥", "子"), "未": ("子", "丑", "卯", "巳", "未", "申", "酉"), "申": ("酉", "戌", "子", "寅", "辰", "巳", "午"), "酉": ("午", "未", "酉", "亥", "丑", "寅", "卯"), "戌": ("卯", "辰", "午", "申", "戌", "亥", "子"), "亥": ("子", "丑", "卯", "巳", "未", "申", "酉")}
+
+SIX_CLASH_HEX = ["乾為天", "坎為水", "艮為山", "震為雷", "巽為風", "離為火", "坤為地", "兌為澤", "天雷無妄", "雷天大壯"]
+SIX_HARMONY_HEX = ["天地否", "地天泰", "地雷復", "雷地豫", "水澤節", "澤水困", "山火賁", "火山旅"]
+
+ELEMENT_RELATIONS = {
+    ("金", "金"): "兄弟", ("金", "木"): "妻財", ("金", "水"): "子孫", ("金", "火"): "官鬼", ("金", "土"): "父母",
+    ("木", "金"): "官鬼", ("木", "木"): "兄弟", ("木", "水"): "父母", ("木", "火"): "子孫", ("木", "土"): "妻財",
+    ("水", "金"): "父母", ("水", "木"): "子孫", ("水", "水"): "兄弟", ("水", "火"): "妻財", ("水", "土"): "官鬼",
+    ("火", "金"): "妻財", ("火", "木"): "父母", ("火", "水"): "官鬼", ("火", "火"): "兄弟", ("火", "土"): "子孫",
+    ("土", "金"): "子孫", ("土", "木"): "官鬼", ("土", "水"): "妻財", ("土", "火"): "父母", ("土", "土"): "兄弟",
+}
+BRANCH_ELEMENTS = {
+    "子": "水", "丑": "土", "寅": "木", "卯": "木", "辰": "土", "巳": "火",
+    "午": "火", "未": "土", "申": "金", "酉": "金", "戌": "土", "亥": "水"
+}
+
+# 上卦、下卦 -> 卦名 (原本每次呼叫都重建，改為載入時建立一次)
+HEX_NAME_TABLE = {
+    ("乾", "乾"): "乾為天", ("乾", "巽"): "天風姤", ("乾", "艮"): "天山遯", ("乾", "坤"): "天地否",
+    ("巽", "坤"): "風地觀", ("艮", "坤"): "山地剝", ("離", "坤"): "火地晉", ("離", "乾"): "火天大有",
+    ("坎", "坎"): "坎為水", ("坎", "兌"): "水澤節", ("坎", "震"): "水雷屯", ("坎", "離"): "水火既濟",
+    ("兌", "離"): "澤火革", ("震", "離"): "雷火豐", ("坤", "離"): "地火明夷", ("坤", "坎"): "地水師",
+    ("艮", "艮"): "艮為山", ("艮", "離"): "山火賁", ("艮", "乾"): "山天大畜", ("艮", "兌"): "山澤損",
+    ("離", "兌"): "火澤睽", ("乾", "兌"): "天澤履", ("巽", "兌"): "風澤中孚", ("巽", "艮"): "風山漸",
+    ("震", "震"): "震為雷", ("震", "坤"): "雷地豫", ("震", "坎"): "雷水解", ("震", "巽"): "雷風恆",
+    ("坤", "巽"): "地風升", ("坎", "巽"): "水風井", ("兌", "巽"): "澤風大過", ("兌", "震"): "澤雷隨",
+    ("巽", "巽"): "巽為風", ("巽", "乾"): "風天小畜", ("巽", "離"): "風火家人", ("巽", "震"): "風雷益",
+    ("乾", "震"): "天雷無妄", ("離", "震"): "火雷噬嗑", ("艮", "震"): "山雷頤", ("艮", "巽"): "山風蠱",
+    ("離", "離"): "離為火", ("離", "艮"): "火山旅", ("離", "巽"): "火風鼎", ("離", "坎"): "火水未濟",
+    ("艮", "坎"): "山水蒙", ("巽", "坎"): "風水渙", ("乾", "坎"): "天水訟", ("乾", "離"): "天火同人",
+    ("坤", "坤"): "坤為地", ("坤", "震"): "地雷復", ("坤", "兌"): "地澤臨", ("坤", "乾"): "地天泰",
+    ("震", "乾"): "雷天大壯", ("兌", "乾"): "澤天夬", ("坎", "乾"): "水天需", ("坎", "坤"): "水地比",
+    ("兌", "兌"): "兌為澤", ("兌", "坎"): "澤水困", ("兌", "坤"): "澤地萃", ("兌", "艮"): "澤山咸",
+    ("坎", "艮"): "水山蹇", ("坤", "艮"): "地山謙", ("震", "艮"): "雷山小過", ("震", "兌"): "雷澤歸妹",
+}
+
+TRIGRAM_BY_CODE = {tuple(v["code"]): k for k, v in TRIGRAMS.items()}
+
+# 爻值 -> (本爻, 變爻, 是否動爻)
+LINE_VALUE_MAP = {6: (0, 1, True), 7: (1, 1, False), 8: (0, 0, False), 9: (1, 0, True)}
+
+# 小整數編號表 (壓縮格式、批次運算共用)
+TRIGRAM_NAMES = list(TRIGRAMS.keys())
+HEX_NAMES = list(HEX_INFO.keys())
+FIVE_ELEMENTS = ["金", "木", "水", "火", "土"]
+SIX_RELATIVES = ["兄弟", "子孫", "妻財", "官鬼", "父母"]
+NAYIN_NAMES = list(dict.fromkeys(NAYIN_TABLE.values()))
+SHIYING_MARKS = ["", "世", "應"]
+
+# 六十甲子 (索引 i 的天干為 i % 10、地支為 i % 12)
+SEXAGENARY_CYCLE = [HEAVENLY_STEMS[i % 10] + EARTHLY_BRANCHES[i % 12] for i in range(60)]
+
+# ==============================================================================
+# 2. 邏輯運算
+# ==============================================================================
+
+def get_hexagram_name_by_code(upper, lower):
+    return HEX_NAME_TABLE.get((upper, lower), "未知")
+
+def get_code_from_name(name):
+    # 卦名 (全名、簡稱、異體/簡體字、上下卦組合) -> 6-bit 卦碼 list (初爻至上爻)，查無回傳 None
+    code = NAME_INDEX.get(normalize_hexagram_name(name))
+    return list(code[1]) if code else None
+
+def get_line_details(tri_name, line_idx, is_outer):
+    branches = TRIGRAMS[tri_name]["branches"]
+    stems = TRIGRAMS[tri_name]["stems"]
+    branch_list = branches[3:] if is_outer else branches[:3]
+    branch = branch_list[line_idx]
+    stem = stems[1] if is_outer else stems[0]
+    gz = stem + branch
+    nayin = NAYIN_TABLE.get(gz, "")
+    element = BRANCH_ELEMENTS[branch]
+    return stem, branch, element, nayin
+
+def get_hex_attributes(name, shift):
+    attributes = []
+    if name in SIX_CLASH_HEX: attributes.append("六沖")
+    if name in SIX_HARMONY_HEX: attributes.append("六合")
+    if shift == 7: attributes.append("遊魂")
+    if shift == 8: attributes.append("歸魂")
+    return attributes
+
+# ==============================================================================
+# 3. 4096 種起卦預先排盤
+# ==============================================================================
+# 爻值 6/7/8/9 依序對應 0~3，由初爻(低位)至上爻(高位)每爻佔 2 bits，
+# 共 4^6 = 4096 種組合。除六神外，排盤結果與日干無關，故載入時全部算好，
+# 查表後只需依日干旋轉六神即可。
+
+def cast_index(numbers):
+    if len(numbers) != 6:
+        raise ValueError(f"需要六個爻值，收到 {len(numbers)} 個")
+    idx = 0
+    for i, n in enumerate(numbers):
+        if n not in LINE_VALUE_MAP:
+            raise ValueError(f"爻值必須為 6、7、8、9，收到 {n!r}")
+        idx |= (int(n) - 6) << (2 * i)
+    return idx
+
+def cast_values(idx):
+    return [6 + ((idx >> (2 * i)) & 3) for i in range(6)]
+
+# 主卦部分 (宮、世應、藏伏、主卦爻) 只有 64 種，變卦爻只依變卦與宮五行而定，
+# 分開建表後再組合，4096 種起卦共用同一批爻字典。
+_MAIN_PARTS = {}
+_CHANGE_PARTS = {}
+
+def _main_part(main_code):
+    m_lower = TRIGRAM_BY_CODE[main_code[:3]]
+    m_upper = TRIGRAM_BY_CODE[main_code[3:]]
+    m_name = get_hexagram_name_by_code(m_upper, m_lower)
+
+    palace_name, shift = HEX_INFO[m_name]
+    palace_element = TRIGRAMS[palace_name]["element"]
+
+    true_shift_pos = shift
+    if shift == 7: true_shift_pos = 4
+    if shift == 8: true_shift_pos = 3
+    ying_pos = (true_shift_pos + 3) % 6
+    if ying_pos == 0: ying_pos = 6
+
+    lines = []
+    for i in range(6):
+        is_outer = i >= 3
+        local_idx = i - 3 if is_outer else i
+
+        b_stem, b_branch, b_el, b_nayin = get_line_details(palace_name, local_idx, is_outer)
+        b_rel = ELEMENT_RELATIONS.get((palace_element, b_el), "")
+
+        m_stem, m_branch, m_el, m_nayin = get_line_details(m_upper if is_outer else m_lower, local_idx, is_outer)
+        m_rel = ELEMENT_RELATIONS.get((palace_element, m_el), "")
+
+        shiying = ""
+        if (i + 1) == true_shift_pos: shiying = "世"
+        elif (i + 1) == ying_pos: shiying = "應"
+
+        # 藏伏：本宮首卦該爻與主卦不同時才顯示
+        hidden_str = ""
+        if (b_rel, b_branch, b_el) != (m_rel, m_branch, m_el):
+            hidden_str = f"{b_rel}{b_branch}{b_el}"
+
+        main = {"stem": m_stem, "branch": m_branch, "el": m_el, "nayin": m_nayin, "rel": m_rel, "shiying": shiying, "type": "yang" if main_code[i] else "yin"}
+        lines.append((hidden_str, main))
+
+    return m_name, palace_name, palace_element, tuple(get_hex_attributes(m_name, shift)), tuple(lines)
+
+def _change_part(change_code, palace_element):
+    c_lower = TRIGRAM_BY_CODE[change_code[:3]]
+    c_upper = TRIGRAM_BY_CODE[change_code[3:]]
+    c_name = get_hexagram_name_by_code(c_upper, c_lower)
+    c_palace_name, c_shift = HEX_INFO[c_name]
+
+    lines = []
+    for i in range(6):
+        is_outer = i >= 3
+        local_idx = i - 3 if is_outer else i
+        c_stem, c_branch, c_el, c_nayin = get_line_details(c_upper if is_outer else c_lower, local_idx, is_outer)
+        c_rel = ELEMENT_RELATIONS.get((palace_element, c_el), "")
+        lines.append({"stem": c_stem, "branch": c_branch, "el": c_el, "nayin": c_nayin, "rel": c_rel, "type": "yang" if change_code[i] else "yin"})
+
+    return c_name, c_palace_name, tuple(get_hex_attributes(c_name, c_shift)), tuple(lines)
+
+def _build_cast(numbers):
+    main_code = tuple(LINE_VALUE_MAP[n][0] for n in numbers)
+    change_code = tuple(LINE_VALUE_MAP[n][1] for n in numbers)
+
+    if main_code not in _MAIN_PARTS:
+        _MAIN_PARTS[main_code] = _main_part(main_code)
+    m_name, palace_name, palace_element, attributes, main_lines = _MAIN_PARTS[main_code]
+
+    change_key = (change_code, palace_element)
+    if change_key not in _CHANGE_PARTS:
+        _CHANGE_PARTS[change_key] = _change_part(change_code, palace_element)
+    c_name, c_palace_name, c_attributes, change_lines = _CHANGE_PARTS[change_key]
+
+    lines = tuple(
+        (hidden, main, change, LINE_VALUE_MAP[n][2])
+        for (hidden, main), change, n in zip(main_lines, change_lines, numbers)
+    )
+    return m_name, c_name, palace_name, lines, palace_element, attributes, c_attributes, c_palace_name
+
+CAST_TABLE = tuple(_build_cast(cast_values(idx)) for idx in range(4096))
+
+# 六神起點 (0~5) -> 初爻至上爻的六神
+LIU_SHEN_ROTATIONS = tuple(tuple(LIU_SHEN_ORDER[(s + i) % 6] for i in range(6)) for s in range(6))
+
+def get_hexagram_names(numbers):
+    # 只需要主卦、變卦名稱時使用，不必組出整張盤
+    entry = CAST_TABLE[cast_index(numbers)]
+    return entry[0], entry[1]
+
+def calculate_hexagram(numbers, day_stem, day_branch):
+    # 注意：main / change 子字典為查表共用物件，呼叫端請視為唯讀
+    m_name, c_name, palace_name, lines, palace_element, attributes, c_attributes, c_palace_name = CAST_TABLE[cast_index(numbers)]
+    gods = LIU_SHEN_ROTATIONS[LIU_SHEN_START.get(day_stem, 0)]
+
+    lines_data = [
+        {"god": god, "hidden": hidden, "main": main, "change": change, "move": move}
+        for god, (hidden, main, change, move) in zip(gods, lines)
+    ]
+    return m_name, c_name, palace_name, lines_data, palace_element, list(attributes), list(c_attributes), c_palace_name
+
+# ==============================================================================
+# 4. 卦名索引與自動完成
+# ==============================================================================
+# NAME_INDEX：正規化後的名稱 -> (全名, 卦碼)，一次 dict 查詢即可取得卦碼。收錄：
+#   全名 (水火既濟)、簡稱 (既濟)、上下卦組合 (坎離、水火、坎上離下、上坎下離)；
+#   異體字 / 簡體字 (恒、为、济…) 在查詢前先轉成 HEX_INFO 使用的字形。
+# NAME_TRIE：全名與簡稱的字首樹，每個節點預存其下所有卦名，字首查詢只需走過字首長度。
+
+VARIANT_CHARS = str.maketrans({
+    "恒": "恆", "为": "為", "无": "無", "济": "濟", "贲": "賁", "剥": "剝", "复": "復",
+    "颐": "頤", "过": "過", "离": "離", "遁": "遯", "晋": "晉", "损": "損", "渐": "漸",
+    "归": "歸", "丰": "豐", "兑": "兌", "涣": "渙", "节": "節", "讼": "訟", "师": "師",
+    "谦": "謙", "随": "隨", "蛊": "蠱", "临": "臨", "观": "觀", "风": "風", "泽": "澤",
+    "壮": "壯", "盍": "嗑", "乹": "乾", "巛": "坤",
+})
+
+# 八卦 -> 卦象 (由八純卦名取得：乾為天 -> 天)
+TRIGRAM_IMAGES = {name[0]: name[2] for name in HEX_INFO if "為" in name}
+
+def normalize_hexagram_name(name):
+    return "".join(name.split()).translate(VARIANT_CHARS)
+
+def _build_name_index():
+    index = {}
+    for (upper, lower), full_name in HEX_NAME_TABLE.items():
+        entry = (full_name, tuple(TRIGRAMS[lower]["code"] + TRIGRAMS[upper]["code"]))
+        short_name = FULL_TO_SHORT_MAP[full_name]
+        up_img, lo_img = TRIGRAM_IMAGES[upper], TRIGRAM_IMAGES[lower]
+        for key in (
+            full_name, short_name,
+            upper + lower, up_img + lo_img,
+            f"{upper}上{lower}下", f"上{upper}下{lower}",
+            f"{up_img}上{lo_img}下", f"上{up_img}下{lo_img}",
+        ):
+            # 全名與簡稱優先，組合寫法不覆蓋既有的名稱
+            index.setdefault(key, entry)
+    return index
+
+NAME_INDEX = _build_name_index()
+
+def resolve_hexagram_name(name):
+    # 任意寫法 -> 全名，查無回傳 None
+    entry = NAME_INDEX.get(normalize_hexagram_name(name))
+    return entry[0] if entry else None
+
+def _build_name_trie():
+    root = {"names": [], "children": {}}
+    for full_name, short_name in FULL_TO_SHORT_MAP.items():
+        for key in (short_name, full_name):
+            node = root
+            node["names"].append(full_name)
+            for ch in key:
+                node = node["children"].setdefault(ch, {"names": [], "children": {}})
+                node["names"].append(full_name)
+    # 每個節點的卦名去重並依 HEX_INFO 順序排列 (查詢時再把簡稱完全相符者提到最前)
+    order = {name: i for i, name in enumerate(HEX_INFO)}
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        node["names"] = sorted(set(node["names"]), key=order.get)
+        stack.extend(node["children"].values())
+    return root
+
+NAME_TRIE = _build_name_trie()
+
+def suggest_hexagram_names(prefix, limit=8):
+    key = normalize_hexagram_name(prefix)
+    node = NAME_TRIE
+    for ch in key:
+        node = node["children"].get(ch)
+        if node is None:
+            return []
+    names = node["names"]
+    exact = SHORT_NAME_MAP.get(key)
+    if exact in names:
+        names = [exact] + [n for n in names if n != exact]
+    return names[:limit]
@@ -0,0 +1,326 @@
+# ==============================================================================
+# 盤面匯出：純文字 (複製用格式) / JSON / Markdown / CSV，全部以產生器逐段輸出
+# ==============================================================================
+# 單張盤：  "".join(iter_chart(record, "json"))
+# 大量輸出：write_charts(records, fp, "csv")，records 可為產生器，
+#           每張盤寫完即丟棄，記憶體用量與盤數無關。
+# 分段平行輸出 (liuyao_cli)：export_prologue + 各段 iter_chart_entry + export_epilogue。
+
+import csv
+import datetime
+import io
+import json
+
+from liuyao_engine import SEXAGENARY_CYCLE
+from liuyao_analysis import TWELVE_STAGES, judge_chart
+from liuyao_calendar import get_ganzhi
+from liuyao_metrics import span
+from liuyao_render import (
+    LINE_LABELS, COPY_TEXT_HEADER, day_context, calculate_chart,
+    format_copy_date, iter_copy_text,
+)
+
+FORMATS = ("text", "json", "markdown", "csv")
+
+FORMAT_LABELS = {"text": "純文字", "json": "JSON", "markdown": "Markdown", "csv": "CSV"}
+
+MIME_TYPES = {
+    "text": "text/plain",
+    "json": "application/json",
+    "markdown": "text/markdown",
+    "csv": "text/csv",
+}
+
+FILE_EXTENSIONS = {"text": "txt", "json": "json", "markdown": "md", "csv": "csv"}
+
+CSV_COLUMNS = [
+    "chart", "question", "date", "voids", "main_hexagram", "change_hexagram",
+    "position", "god", "hidden",
+    "main_rel", "main_branch", "main_element", "main_type", "shiying", "main_nayin",
+    "move", "change_rel", "change_branch", "change_element", "change_type", "change_nayin",
+]
+
+# ==============================================================================
+# 1. 匯出紀錄：一張盤的問題、日期資訊與排盤結果
+# ==============================================================================
+
+def chart_record(values, date_mode, west_date_str, gz_year, gz_month, gz_day, gz_hour, question_input=""):
+    # 月柱、日柱不是六十甲子之一時拋 ValueError
+    with span("voids_stars"):
+        ctx = day_context(gz_month, gz_day)
+    with span("hexagram"):
+        chart = calculate_chart(values, ctx.day_stem, ctx.day_branch)
+    with span("analysis"):
+        judgements, links = judge_chart(values, gz_month, gz_day)
+    return {
+        "values": list(values),
+        "question": question_input,
+        "date_mode": date_mode,
+        "west_date": west_date_str,
+        "gz_year": gz_year,
+        "gz_month": gz_month,
+        "gz_day": gz_day,
+        "gz_hour": gz_hour,
+        "voids": ctx.voids,
+        "stars": list(ctx.all_stars),
+        "chart": chart,
+        "judgements": judgements,
+        "links": links,
+    }
+
+def _record_date(record):
+    return format_copy_date(record["date_mode"], record["west_date"], record["gz_year"], record["gz_month"], record["gz_day"], record["gz_hour"])
+
+def _hexagram_label(palace, name, attrs):
+    label = f"{palace}宮-{name}"
+    if attrs: label += f" ({','.join(attrs)})"
+    return label
+
+# ==============================================================================
+# 2. 各格式的單張盤產生器
+# ==============================================================================
+
+def iter_text(record, header=True):
+    return iter_copy_text(
+        record["question"], record["date_mode"], record["west_date"], record["gz_year"], record["gz_month"],
+        record["gz_day"], record["gz_hour"], record["voids"], record["stars"], record["chart"], header,
+        judgements=record["judgements"], links=record["links"],
+    )
+
+def chart_to_dict(record):
+    m_name, c_name, palace, lines_data, p_el, m_attrs, c_attrs, c_palace = record["chart"]
+    has_moving = any(line["move"] for line in lines_data)
+    return {
+        "question": record["question"],
+        "values": record["values"],
+        "date": {
+            "mode": record["date_mode"],
+            "west_date": record["west_date"],
+            "year": record["gz_year"],
+            "month": record["gz_month"],
+            "day": record["gz_day"],
+            "hour": record["gz_hour"],
+        },
+        "voids": record["voids"],
+        "stars": record["stars"],
+        "main": {"name": m_name, "palace": palace, "element": p_el, "attributes": list(m_attrs)},
+        "change": {"name": c_name, "palace": c_palace, "attributes": list(c_attrs)} if has_moving else None,
+        # 由初爻至上爻
+        "lines": [
+            {"position": LINE_LABELS[i], "god": line["god"], "hidden": line["hidden"],
+             "main": line["main"], "change": line["change"], "move": line["move"],
+             "judgement": {
+                 "tags": list(judgement.tags),
+                 "month_stage": TWELVE_STAGES[judgement.month_stage],
+                 "day_stage": TWELVE_STAGES[judgement.day_stage],
+                 "void": judgement.void,
+             }}
+            for i, (line, judgement) in enumerate(zip(lines_data, record["judgements"]))
+        ],
+        "links": list(record["links"]),
+    }
+
+def iter_json(record):
+    yield json.dumps(chart_to_dict(record), ensure_ascii=False)
+
+def iter_markdown(record):
+    m_name, c_name, palace, lines_data, p_el, m_attrs, c_attrs, c_palace = record["chart"]
+    has_moving = any(line["move"] for line in lines_data)
+
+    yield f"## 問題：{record['question'] if record['question'] else '未輸入'}\n\n"
+    yield f"- 日期：{_record_date(record)}\n"
+    yield f"- 旬空：{record['voids']}\n"
+    yield f"- 星煞：{'，'.join(record['stars'])}\n"
+    yield f"- 主卦：{_hexagram_label(palace, m_name, m_attrs)}\n"
+    if has_moving:
+        yield f"- 變卦：{_hexagram_label(c_palace, c_name, c_attrs)}\n"
+    yield "\n| 爻位 | 六神 | 藏伏 | 主卦 | 世應 | 動變 | 變卦 | 納音 |\n"
+    yield "|---|---|---|---|---|---|---|---|\n"
+    for i in range(5, -1, -1):
+        line = lines_data[i]
+        m, c = line["main"], line["change"]
+        m_yy = "陽" if m["type"] == "yang" else "陰"
+        m_ny = m["nayin"][-3:] if m["nayin"] else "無"
+        change_cell = nayin_cell = ""
+        if has_moving:
+            c_yy = "陽" if c["type"] == "yang" else "陰"
+            change_cell = f"{c['rel']}{c['branch']}{c['el']} ({c_yy})"
+            nayin_cell = f"{m_ny} -> {c['nayin'][-3:] if c['nayin'] else '無'}"
+        else:
+            nayin_cell = m_ny
+        move_cell = ("O" if m["type"] == "yang" else "X") if line["move"] else ""
+        yield (
+            f"| {LINE_LABELS[i]} | {line['god']} | {line['hidden'] or '無'} | "
+            f"{m['rel']}{m['branch']}{m['el']} ({m_yy}) | {m['shiying']} | {move_cell} | {change_cell} | {nayin_cell} |\n"
+        )
+
+def _csv_rows(record, chart_id):
+    m_name, c_name, palace, lines_data, p_el, m_attrs, c_attrs, c_palace = record["chart"]
+    has_moving = any(line["move"] for line in lines_data)
+    date_str = _record_date(record)
+    main_label = _hexagram_label(palace, m_name, m_attrs)
+    change_label = _hexagram_label(c_palace, c_name, c_attrs) if has_moving else ""
+    for i, line in enumerate(lines_data):
+        m, c = line["main"], line["change"]
+        yield [
+            chart_id, record["question"], date_str, record["voids"], main_label, change_label,
+            LINE_LABELS[i], line["god"], line["hidden"],
+            m["rel"], m["branch"], m["el"], m["type"], m["shiying"], m["nayin"],
+            int(line["move"]), c["rel"], c["branch"], c["el"], c["type"], c["nayin"],
+        ]
+
+def iter_csv(record, chart_id=0, header=True):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(CSV_COLUMNS)
+    writer.writerows(_csv_rows(record, chart_id))
+    yield buffer.getvalue()
+
+def iter_chart(record, fmt="text"):
+    if fmt == "text":
+        return iter_text(record)
+    if fmt == "json":
+        return iter_json(record)
+    if fmt == "markdown":
+        return iter_markdown(record)
+    if fmt == "csv":
+        return iter_csv(record)
+    raise ValueError(f"不支援的匯出格式：{fmt} (可用：{', '.join(FORMATS)})")
+
+def export_chart(record, fmt="text"):
+    return "".join(iter_chart(record, fmt))
+
+# ==============================================================================
+# 3. 大量輸出：逐張串流，整份檔案仍為合法的單一文件
+# ==============================================================================
+# text     提示詞表頭只輸出一次，各盤之間以分隔線隔開
+# json     單一 JSON 陣列 (逐筆寫入，不先組成 list)
+# markdown 各盤為一個 ## 區塊
+# csv      表頭一次，每爻一列，chart 欄為盤序號 (liuyao_cli 為輸入行號)
+
+TEXT_SEPARATOR = "\n" + "=" * 40 + "\n\n"
+
+def _check_format(fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"不支援的匯出格式：{fmt} (可用：{', '.join(FORMATS)})")
+
+# 第 2 張起每張盤前的分隔字串
+ENTRY_SEPARATORS = {"text": TEXT_SEPARATOR, "json": ",\n", "markdown": "\n", "csv": ""}
+
+def export_prologue(fmt):
+    _check_format(fmt)
+    if fmt == "text":
+        return COPY_TEXT_HEADER
+    if fmt == "json":
+        return "[\n"
+    if fmt == "csv":
+        return ",".join(CSV_COLUMNS) + "\n"
+    return ""
+
+def export_epilogue(fmt):
+    return "\n]\n" if fmt == "json" else ""
+
+def iter_chart_entry(record, fmt, n):
+    # 第 n 張盤 (由 0 起算，CSV 的 chart 欄即為 n) 在整份輸出中的片段，n > 0 時含前置分隔
+    if n: yield ENTRY_SEPARATORS[fmt]
+    if fmt == "text":
+        yield from iter_text(record, header=False)
+    elif fmt == "json":
+        yield from iter_json(record)
+    elif fmt == "markdown":
+        yield from iter_markdown(record)
+    else:
+        yield from iter_csv(record, chart_id=n, header=False)
+
+def iter_charts(records, fmt="text"):
+    yield export_prologue(fmt)
+    for n, record in enumerate(records):
+        yield from iter_chart_entry(record, fmt, n)
+    yield export_epilogue(fmt)
+
+def write_charts(records, fp, fmt="text"):
+    # 回傳寫入的盤數
+    count = 0
+
+    def counted():
+        nonlocal count
+        for record in records:
+            count += 1
+            yield record
+
+    for chunk in iter_charts(counted(), fmt):
+        fp.write(chunk)
+    return count
+
+# ==============================================================================
+# 4. 輸入解析 (HTTP API 與批次 CLI 共用)：格式錯誤一律拋 ValueError
+# ==============================================================================
+# 一筆起卦輸入：
+#   {"lines": [6, 7, 8, 9, 7, 8] 或 "678978" / "6,7,8,9,7,8",   初爻至上爻
+#    "datetime": "2025-01-20T10:30",                            西曆 (UTC+8)，或
+#    "pillars": {"year": ..., "month": ..., "day": ..., "hour": ...},
+#    "question": "..."}
+
+TZ_TAIPEI = datetime.timezone(datetime.timedelta(hours=8))
+
+def parse_lines(lines):
+    if isinstance(lines, str):
+        lines = [int(ch) for ch in lines if ch.isdigit()]
+    if not isinstance(lines, list) or len(lines) != 6 or any(type(n) is not int or n not in (6, 7, 8, 9) for n in lines):
+        raise ValueError("lines 必須是 6 個爻值 (6/7/8/9)，由初爻至上爻")
+    return lines
+
+def parse_pillars(pillars):
+    if not isinstance(pillars, dict):
+        raise ValueError("pillars 必須是 {year, month, day, hour} 物件")
+    values = []
+    for key, label, required in (("year", "年柱", False), ("month", "月柱", True), ("day", "日柱", True), ("hour", "時柱", False)):
+        pillar = pillars.get(key) or ""
+        if not isinstance(pillar, str):
+            raise ValueError(f"{label}必須是字串")
+        pillar = pillar.strip()
+        if required and not pillar:
+            raise ValueError("月柱與日柱為必填項目")
+        if pillar and pillar not in SEXAGENARY_CYCLE:
+            raise ValueError(f"{label}「{pillar}」不是六十甲子之一")
+        values.append(pillar)
+    return values
+
+def parse_datetime(raw):
+    # 回傳不含時區的 UTC+8 時間；未給時為現在時間
+    if raw is None:
+        return datetime.datetime.now(TZ_TAIPEI).replace(tzinfo=None)
+    try:
+        dt = datetime.datetime.fromisoformat(raw)
+    except (TypeError, ValueError):
+        raise ValueError("datetime 必須是 ISO 8601 格式，例如 2025-01-20T10:30")
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(TZ_TAIPEI).replace(tzinfo=None)
+    return dt
+
+def parse_question(question):
+    question = question or ""
+    if not isinstance(question, str):
+        raise ValueError("question 必須是字串")
+    return question
+
+def pillar_date_args(pillars):
+    # 回傳 (date_mode, west_date_str, gz_year, gz_month, gz_day, gz_hour)，與頁面 date_ctx 相同
+    return ("指定干支曆", "(手動輸入)", *parse_pillars(pillars))
+
+def west_date_args(dt):
+    with span("calendar"):
+        pillars = get_ganzhi(dt.year, dt.month, dt.day, dt.hour, dt.minute, 0)
+    return ("指定西曆", dt.strftime("%Y/%m/%d %H:%M"), *pillars)
+
+def record_from_input(data):
+    if not isinstance(data, dict):
+        raise ValueError("起卦輸入必須是 JSON 物件")
+    lines = parse_lines(data.get("lines"))
+    question = parse_question(data.get("question"))
+    if data.get("pillars") is not None:
+        date_args = pillar_date_args(data["pillars"])
+    else:
+        date_args = west_date_args(parse_datetime(data.get("datetime")))
+    return chart_record(lines, *date_args, question)
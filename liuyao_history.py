@@ -0,0 +1,248 @@
+# ==============================================================================
+# 占卜紀錄：SQLite (WAL) 持久保存，背景執行緒批次寫入，keyset 分頁查詢
+# ==============================================================================
+# 資料庫路徑由環境變數 LIUYAO_HISTORY_DB 指定 (預設 data/liuyao_history.db)，
+# 設為空字串則停用紀錄，get_store() 回傳 None。
+#
+# 寫入：record() 只把一列資料放進佇列就返回 (微秒級)，背景執行緒每累積 batch_size 筆
+#       或距第一筆滿 flush_interval 秒即以單一交易 executemany 寫入，不會拖慢重跑。
+#       因此剛記錄的盤約在 flush_interval 秒內才查得到；flush() 可強制寫入並等待完成。
+# 查詢：依 (created_at, id) 由新到舊排序，以上一頁最後一筆為游標 (keyset pagination)，
+#       不用 OFFSET，翻到第幾頁都只掃描一頁的資料。
+#       主卦、變卦、卦宮、日柱各有 (欄位, created_at) 複合索引，篩選後仍可直接依時間取頁。
+# WAL 模式下讀取不會被寫入擋住，多個 uvicorn worker / Streamlit 行程可共用同一個檔案。
+
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "liuyao_history.db")
+
+COLUMNS = (
+    "created_at", "source", "question", "lines", "main_name", "change_name", "palace",
+    "date_mode", "west_date", "gz_year", "gz_month", "gz_day", "gz_hour",
+)
+
+# 篩選參數 -> 欄位
+FILTER_COLUMNS = {"main": "main_name", "change": "change_name", "palace": "palace", "day": "gz_day"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    source TEXT NOT NULL,
+    question TEXT NOT NULL,
+    lines TEXT NOT NULL,
+    main_name TEXT NOT NULL,
+    change_name TEXT NOT NULL,
+    palace TEXT NOT NULL,
+    date_mode TEXT NOT NULL,
+    west_date TEXT NOT NULL,
+    gz_year TEXT NOT NULL,
+    gz_month TEXT NOT NULL,
+    gz_day TEXT NOT NULL,
+    gz_hour TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_readings_created ON readings (created_at);
+CREATE INDEX IF NOT EXISTS idx_readings_main ON readings (main_name, created_at);
+CREATE INDEX IF NOT EXISTS idx_readings_change ON readings (change_name, created_at);
+CREATE INDEX IF NOT EXISTS idx_readings_palace ON readings (palace, created_at);
+CREATE INDEX IF NOT EXISTS idx_readings_day ON readings (gz_day, created_at);
+"""
+
+_INSERT = f"INSERT INTO readings ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+_STOP = object()
+
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL 下 NORMAL 只在 checkpoint 時 fsync，斷電最多遺失最後幾筆交易，不會損壞資料庫
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def reading_row(record, source, created_at=None):
+    # record 為 liuyao_export.chart_record() 的結果
+    m_name, c_name, palace_name = record["chart"][:3]
+    return (
+        time.time() if created_at is None else created_at,
+        source,
+        record["question"],
+        "".join(str(v) for v in record["values"]),
+        m_name, c_name, palace_name,
+        record["date_mode"], record["west_date"],
+        record["gz_year"], record["gz_month"], record["gz_day"], record["gz_hour"],
+    )
+
+# ==============================================================================
+# 1. 紀錄庫
+# ==============================================================================
+
+class HistoryStore:
+    def __init__(self, path, batch_size=200, flush_interval=0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with connect(path) as conn:
+            conn.executescript(SCHEMA)
+        self._queue = queue.SimpleQueue()
+        self._local = threading.local()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self.written = 0
+
+    # --------------------------------------------------------------------------
+    # 寫入
+    # --------------------------------------------------------------------------
+
+    def record(self, record, source="app"):
+        self.record_row(reading_row(record, source))
+
+    def record_row(self, row):
+        self._queue.put(row)
+        if self._writer is None:
+            self._start_writer()
+
+    def flush(self, timeout=None):
+        # 等背景執行緒把目前佇列中的資料寫完
+        if self._writer is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(_STOP)
+            writer.join()
+
+    def _start_writer(self):
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="liuyao-history-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        conn = connect(self.path)
+        try:
+            while True:
+                item = self._queue.get()
+                rows, events, stop = [], [], False
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if item is _STOP:
+                        stop = True
+                        break
+                    if isinstance(item, threading.Event):
+                        # flush()：寫入目前累積的資料後即通知，不再等滿一批
+                        events.append(item)
+                        break
+                    rows.append(item)
+                    if len(rows) >= self.batch_size:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                if rows:
+                    with conn:
+                        conn.executemany(_INSERT, rows)
+                    self.written += len(rows)
+                for event in events:
+                    event.set()
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    # --------------------------------------------------------------------------
+    # 查詢 (每個執行緒一條唯讀用連線)
+    # --------------------------------------------------------------------------
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path)
+        return conn
+
+    def query(self, cursor=None, limit=20, since=None, until=None, **filters):
+        # 由新到舊取一頁；cursor 為上一頁回傳的 next_cursor。
+        # filters：main / change / palace / day，值為 None 或空字串表示不篩選。
+        # 回傳 (list of dict, next_cursor)，已是最後一頁時 next_cursor 為 None。
+        where, params = [], []
+        for key, value in filters.items():
+            if key not in FILTER_COLUMNS:
+                raise ValueError(f"不支援的篩選條件：{key}")
+            if value:
+                where.append(f"{FILTER_COLUMNS[key]} = ?")
+                params.append(value)
+        if since is not None:
+            where.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("created_at < ?")
+            params.append(until)
+        if cursor is not None:
+            where.append("(created_at, id) < (?, ?)")
+            params.extend(cursor)
+        sql = "SELECT id, " + ", ".join(COLUMNS) + " FROM readings"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        # 多取一筆判斷是否還有下一頁
+        rows = self._reader().execute(sql, params + [limit + 1]).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1]["created_at"], rows[-1]["id"])
+        return [dict(row) for row in rows], next_cursor
+
+    def iter_since(self, after_id, columns=("lines", "gz_month"), chunk_size=50000):
+        # 依 id 遞增逐段取出 id > after_id 的紀錄，每段為 (ids, 各欄位 list) 的欄式資料；
+        # 供統計分析增量讀取新紀錄 (走主鍵範圍掃描，不需額外索引)
+        for column in columns:
+            if column not in COLUMNS:
+                raise ValueError(f"不支援的欄位：{column}")
+        sql = f"SELECT id, {', '.join(columns)} FROM readings WHERE id > ? ORDER BY id LIMIT ?"
+        conn = self._reader()
+        while True:
+            rows = conn.execute(sql, (after_id, chunk_size)).fetchall()
+            if not rows:
+                return
+            data = list(zip(*rows))
+            yield list(data[0]), [list(col) for col in data[1:]]
+            after_id = rows[-1][0]
+
+    def count(self):
+        return self._reader().execute("SELECT COUNT(*) FROM readings").fetchone()[0]
+
+# ==============================================================================
+# 2. 行程共用的紀錄庫
+# ==============================================================================
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    global _store
+    path = os.environ.get("LIUYAO_HISTORY_DB", DEFAULT_PATH)
+    if not path:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = HistoryStore(path)
+                # 結束時把佇列中尚未寫入的紀錄寫完
+                atexit.register(_store.close)
+    return _store
@@ -0,0 +1,171 @@
+# ==============================================================================
+# 重跑計時：各階段 span、跨 session 彙總直方圖、Prometheus / JSON 匯出
+# ==============================================================================
+# 用法：
+#   with span("html"):
+#       ...
+# 兩種收集方式，皆關閉時 span() 回傳共用的空 context manager，幾乎沒有額外成本：
+#   - 彙總：環境變數 LIUYAO_METRICS=1 (或呼叫 enable())，所有 session 的 span
+#     累計到同一組直方圖，供 prometheus_text() / metrics_json() 匯出。
+#   - 單次追蹤：start_trace() 後，目前執行緒 (即目前這個 session 的重跑) 的 span
+#     依序記錄，end_trace() 取回；頁面的除錯面板用這個顯示本次重跑的耗時。
+# 設定 LIUYAO_METRICS_FILE 時，app 每次重跑結束會把 Prometheus 文字寫到該檔
+# (node_exporter textfile collector 格式)。
+
+import bisect
+import json
+import os
+import threading
+import time
+
+METRIC_NAME = "liuyao_stage_seconds"
+
+# 直方圖上界 (秒)，最後一格為 +Inf
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_enabled = os.environ.get("LIUYAO_METRICS", "") not in ("", "0")
+
+
+class _TraceLocal(threading.local):
+    # 類別屬性作為預設值，未開始追蹤的執行緒讀取時不必走 AttributeError 路徑
+    trace = None
+
+
+_local = _TraceLocal()
+
+# ==============================================================================
+# 1. 彙總直方圖 (執行緒安全)
+# ==============================================================================
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def cumulative(self):
+        total = 0
+        result = []
+        for c in self.counts:
+            total += c
+            result.append(total)
+        return result
+
+
+_HISTOGRAMS = {}
+_LOCK = threading.Lock()
+
+def observe(name, seconds):
+    with _LOCK:
+        hist = _HISTOGRAMS.get(name)
+        if hist is None:
+            hist = _HISTOGRAMS[name] = Histogram()
+        hist.observe(seconds)
+
+def reset():
+    with _LOCK:
+        _HISTOGRAMS.clear()
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+def is_enabled():
+    return _enabled
+
+# ==============================================================================
+# 2. Span 與單次追蹤
+# ==============================================================================
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        if _enabled:
+            observe(self.name, seconds)
+        trace = _local.trace
+        if trace is not None:
+            trace.append((self.name, seconds))
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+def span(name):
+    if _enabled or _local.trace is not None:
+        return _Span(name)
+    return _NOOP
+
+def start_trace():
+    _local.trace = []
+
+def end_trace():
+    trace = _local.trace
+    _local.trace = None
+    return trace or []
+
+# ==============================================================================
+# 3. 匯出
+# ==============================================================================
+
+def _snapshot():
+    with _LOCK:
+        return {name: (hist.cumulative(), hist.count, hist.sum) for name, hist in sorted(_HISTOGRAMS.items())}
+
+def _le(bound):
+    return repr(bound) if bound is not None else "+Inf"
+
+def prometheus_text():
+    lines = [
+        f"# HELP {METRIC_NAME} Time spent in each rerun stage.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    for name, (cumulative, count, total) in _snapshot().items():
+        for bound, value in zip(BUCKETS + (None,), cumulative):
+            lines.append(f'{METRIC_NAME}_bucket{{stage="{name}",le="{_le(bound)}"}} {value}')
+        lines.append(f'{METRIC_NAME}_sum{{stage="{name}"}} {total!r}')
+        lines.append(f'{METRIC_NAME}_count{{stage="{name}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+def metrics_json():
+    stages = {}
+    for name, (cumulative, count, total) in _snapshot().items():
+        stages[name] = {
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else 0.0,
+            "buckets": {_le(bound): value for bound, value in zip(BUCKETS + (None,), cumulative)},
+        }
+    return json.dumps({"metric": METRIC_NAME, "stages": stages}, indent=2)
+
+def write_prometheus_file(path):
+    # 先寫暫存檔再改名，避免收集端讀到寫一半的檔案
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
@@ -0,0 +1,123 @@
+# ==============================================================================
+# 永久連結：整張盤 (爻值、日期、問題) 編成網址參數 ?r=<token>，不依賴伺服器端 session
+# ==============================================================================
+# 任何一台伺服器 (不需 sticky session) 都能只憑網址還原頁面，token 同時可當分享連結。
+#
+# token = base64url (無補位) 的位元組：
+#   byte 0     高 4 bits 版本 (目前 1)；bit 0 = 1 為指定干支曆；bit 1 = 1 為干支以文字儲存
+#   byte 1-2   起卦索引 liuyao_engine.cast_index (0~4095，big-endian)
+#   指定西曆   4 bytes 有號整數：2000/01/01 00:00 (UTC+8) 起算的分鐘數
+#   指定干支曆 4 bytes 年月日時柱的六十甲子序號 (60 = 空白)；
+#              干支不在六十甲子內時改存 1 byte 長度 + UTF-8「年\n月\n日\n時」 (輸入框不會有換行)
+#   其餘       問題 (UTF-8，最多 MAX_QUESTION_LENGTH 字；頁面輸入框同此上限)
+# 不含問題時只有 7 bytes (10 字元)；問題每個中文字約再加 4 字元。
+# 連結可由任何人產生，解碼出的問題一律視為不可信的使用者輸入 (輸出 HTML 時須跳脫)。
+
+import base64
+import datetime
+import struct
+from collections import namedtuple
+
+from liuyao_engine import SEXAGENARY_CYCLE, cast_index, cast_values
+
+TOKEN_PARAM = "r"
+TOKEN_VERSION = 1
+MAX_QUESTION_LENGTH = 200
+
+FLAG_GANZHI = 0x01
+FLAG_TEXT_PILLARS = 0x02
+
+BLANK_PILLAR = len(SEXAGENARY_CYCLE)
+EPOCH = datetime.datetime(2000, 1, 1)
+WEST_DATE_FORMAT = "%Y/%m/%d %H:%M"
+
+_CYCLE = {gz: i for i, gz in enumerate(SEXAGENARY_CYCLE)}
+_HEAD = struct.Struct(">BH")
+_MINUTES = struct.Struct(">i")
+
+Permalink = namedtuple("Permalink", [
+    "values",        # 六個爻值，初爻至上爻
+    "date_mode",     # "指定西曆" / "指定干支曆"
+    "when",          # 指定西曆的時間 (不含時區，UTC+8)；干支盤為 None
+    "pillars",       # 指定干支曆的 (年, 月, 日, 時)；西曆盤為 None (由曆法換算)
+    "question",
+])
+
+# ==============================================================================
+# 1. 編碼
+# ==============================================================================
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def _b64decode(token):
+    try:
+        return base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except ValueError:
+        raise ValueError("連結參數格式錯誤")
+
+def encode_token(values, date_mode, west_date_str, gz_year, gz_month, gz_day, gz_hour, question_input=""):
+    # 參數順序與 liuyao_export.chart_record 相同 (即頁面的 input_vals, *date_ctx, 問題)
+    flags = TOKEN_VERSION << 4
+    if date_mode == "指定西曆":
+        when = datetime.datetime.strptime(west_date_str, WEST_DATE_FORMAT)
+        body = _MINUTES.pack((when - EPOCH) // datetime.timedelta(minutes=1))
+    else:
+        flags |= FLAG_GANZHI
+        pillars = (gz_year, gz_month, gz_day, gz_hour)
+        if all(not gz or gz in _CYCLE for gz in pillars):
+            body = bytes(_CYCLE[gz] if gz else BLANK_PILLAR for gz in pillars)
+        else:
+            flags |= FLAG_TEXT_PILLARS
+            text = "\n".join(pillars).encode("utf-8")
+            if len(text) > 255:
+                raise ValueError("干支文字過長")
+            body = bytes((len(text),)) + text
+    if len(question_input) > MAX_QUESTION_LENGTH:
+        raise ValueError(f"問題超過 {MAX_QUESTION_LENGTH} 字")
+    return _b64encode(_HEAD.pack(flags, cast_index(values)) + body + question_input.encode("utf-8"))
+
+# ==============================================================================
+# 2. 解碼
+# ==============================================================================
+
+def decode_token(token):
+    # 先以字元數擋下過長的 token (每字最多 4 bytes，base64 再放大 4/3)，不解碼整段
+    if len(token or "") > (_HEAD.size + 256 + MAX_QUESTION_LENGTH * 4) * 4 // 3 + 4:
+        raise ValueError("連結參數過長")
+    data = _b64decode(token or "")
+    if len(data) < _HEAD.size:
+        raise ValueError("連結參數格式錯誤")
+    flags, idx = _HEAD.unpack_from(data)
+    if flags >> 4 != TOKEN_VERSION:
+        raise ValueError(f"不支援的連結版本：{flags >> 4}")
+    if idx >= 4096:
+        raise ValueError("連結中的爻值有誤")
+    pos = _HEAD.size
+    when = pillars = None
+    if not flags & FLAG_GANZHI:
+        date_mode = "指定西曆"
+        if len(data) < pos + 4:
+            raise ValueError("連結參數格式錯誤")
+        try:
+            when = EPOCH + datetime.timedelta(minutes=_MINUTES.unpack_from(data, pos)[0])
+        except OverflowError:
+            raise ValueError("連結中的日期超出範圍")
+        pos += 4
+    elif not flags & FLAG_TEXT_PILLARS:
+        date_mode = "指定干支曆"
+        if len(data) < pos + 4 or any(n > BLANK_PILLAR for n in data[pos:pos + 4]):
+            raise ValueError("連結參數格式錯誤")
+        pillars = tuple(SEXAGENARY_CYCLE[n] if n < BLANK_PILLAR else "" for n in data[pos:pos + 4])
+        pos += 4
+    else:
+        date_mode = "指定干支曆"
+        size = data[pos] if len(data) > pos else 0
+        pillars = tuple(data[pos + 1:pos + 1 + size].decode("utf-8", "replace").split("\n"))
+        if len(pillars) != 4:
+            raise ValueError("連結參數格式錯誤")
+        pos += 1 + size
+    question = data[pos:].decode("utf-8", "replace")
+    if len(question) > MAX_QUESTION_LENGTH:
+        raise ValueError(f"連結中的問題超過 {MAX_QUESTION_LENGTH} 字")
+    return Permalink(cast_values(idx), date_mode, when, pillars, question)
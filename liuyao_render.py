@@ -0,0 +1,432 @@
+# ==============================================================================
+# 盤面輸出：問題 / 日期資訊 / 排盤表格 HTML 與 AI 判讀用複製文字 (不依賴 Streamlit)
+# ==============================================================================
+
+import html
+import sys
+from collections import namedtuple
+
+from liuyao_engine import (
+    HEAVENLY_STEMS, EARTHLY_BRANCHES, SEXAGENARY_CYCLE, STAR_A_TABLE, STAR_B_TABLE, STAR_C_TABLE,
+    LIU_SHEN_ORDER, LIU_SHEN_START, LIU_SHEN_ROTATIONS, CAST_TABLE,
+    calculate_hexagram, cast_index,
+)
+from liuyao_analysis import judge_chart, format_stages, format_tags
+from liuyao_cache import memoize
+from liuyao_metrics import span
+
+COPY_TEXT_HEADER = """
+你是承繼京房納甲系之正統易學解卦宗師，融會易理、象數與術數之學，
+以《周易》為理，以京房納甲為法，專以六爻占驗立論，
+重視干支納甲、六親生剋、世應主客、月建日辰與動變制化，
+進行嚴謹而可回溯的占斷分析。
+
+若存在使用者自訂的系統層級指令（例如自訂角色、解卦規則或行為約束），
+且其優先權高於本指令，則應完全遵循該使用者自訂系統指令，
+本指令自動退居次位。
+
+請直接依據以下完整排盤資料進行解卦，
+解卦流程固定依序為：
+【對軌、定位、定性、應期、細節、兼象、化解】七段，
+一切判斷須以京房納甲體系為準，    
+判斷以六爻用神、世應、生剋制化、旺衰強弱與動變為準，
+重點檢核用神取象、世應關係、六親生剋、旺衰休囚、
+月建日辰之扶抑、動爻變化及回頭生剋，
+不得以抽象象意、心理推測或其他占法取代納甲實斷。
+《周易》卦辭、彖傳、象傳與動爻爻辭，
+僅限於佐證京房納甲所示之結果，用於校驗與補述，
+不得凌駕或改寫六爻占驗之結論。
+最後請以單一句話給出【最終結論】。
+以下為問題及排盤資料：
+\n"""
+
+LINE_LABELS = ["初爻", "二爻", "三爻", "四爻", "五爻", "上爻"]
+
+# ==============================================================================
+# 1. 日辰資訊：旬空、星煞
+# ==============================================================================
+
+def get_voids(stem, branch):
+    s_idx = HEAVENLY_STEMS.index(stem)
+    b_idx = EARTHLY_BRANCHES.index(branch)
+    diff = (b_idx - s_idx) % 12
+    return f"{EARTHLY_BRANCHES[(diff - 2) % 12]}{EARTHLY_BRANCHES[(diff - 1) % 12]}"
+
+def format_voids(day_stem, day_branch):
+    voids = get_voids(day_stem, day_branch) if day_stem and day_branch else "??"
+    # [修正] 旬空格式：寅、卯
+    if len(voids) == 2:
+        return f"{voids[0]}、{voids[1]}"
+    return voids
+
+def get_star_lists(month_branch, day_stem, day_branch):
+    s_a = STAR_A_TABLE.get(month_branch, ("-", "-"))
+    s_b = STAR_B_TABLE.get(day_stem, ("-", "-", "-", "-"))
+    s_c = STAR_C_TABLE.get(day_branch, ("-", "-", "-", "-", "-", "-", "-"))
+
+    star_list_row1 = [f"天喜-{s_a[0]}", f"天醫-{s_a[1]}", f"祿神-{s_b[0]}", f"羊刃-{s_b[1]}", f"文昌-{s_b[2]}", f"貴人-{s_b[3]}"]
+    star_list_row2 = [f"桃花-{s_c[0]}", f"謀星-{s_c[1]}", f"將星-{s_c[2]}", f"驛馬-{s_c[3]}", f"華蓋-{s_c[4]}", f"劫煞-{s_c[5]}", f"災煞-{s_c[6]}"]
+    return star_list_row1, star_list_row2
+
+# ------------------------------------------------------------------------------
+# 日辰表：旬空、星煞 (含 HTML / 文字格式)、六神起點只由日柱 (60 種) 與月建 (12 種) 決定，
+# 載入時把 720 種組合全部算好，查詢時只做一次 dict 查表。
+# 干支須為六十甲子之一，否則拋 ValueError (不再因 gz_day[1] 之類的索引錯誤而中斷)。
+# ------------------------------------------------------------------------------
+
+STARS_HTML_SEPARATOR = "&nbsp;&nbsp;&nbsp;"
+
+DayContext = namedtuple("DayContext", [
+    "month_branch", "day_stem", "day_branch",
+    "voids",                                   # 旬空 (如 "寅、卯")
+    "star_row1", "star_row2", "all_stars",     # 星煞 (tuple)
+    "stars_row1_html", "stars_row2_html",      # 資訊框的兩列星煞 HTML
+    "stars_text",                              # 複製文字的星煞 (以「，」連接)
+    "god_start", "gods",                       # 六神起點 (0~5) 與初爻至上爻的六神
+])
+
+def _build_day_context(month_branch, gz_day):
+    day_stem, day_branch = gz_day
+    row1, row2 = get_star_lists(month_branch, day_stem, day_branch)
+    god_start = LIU_SHEN_START[day_stem]
+    return DayContext(
+        month_branch, day_stem, day_branch,
+        format_voids(day_stem, day_branch),
+        tuple(row1), tuple(row2), tuple(row1 + row2),
+        STARS_HTML_SEPARATOR.join(row1), STARS_HTML_SEPARATOR.join(row2),
+        "，".join(row1 + row2),
+        god_start, LIU_SHEN_ROTATIONS[god_start],
+    )
+
+DAY_CONTEXTS = {
+    (month_branch, gz_day): _build_day_context(month_branch, gz_day)
+    for month_branch in EARTHLY_BRANCHES for gz_day in SEXAGENARY_CYCLE
+}
+
+_CYCLE = frozenset(SEXAGENARY_CYCLE)
+
+def day_context(gz_month, gz_day):
+    if gz_month not in _CYCLE:
+        raise ValueError(f"月柱「{gz_month}」不是六十甲子之一")
+    if gz_day not in _CYCLE:
+        raise ValueError(f"日柱「{gz_day}」不是六十甲子之一")
+    return DAY_CONTEXTS[gz_month[1], gz_day]
+
+# ==============================================================================
+# 2. HTML 區塊
+# ==============================================================================
+
+# 問題、西曆字串與干支都是使用者輸入 (也可能來自他人給的永久連結)，
+# 頁面以 innerHTML 顯示 (liuyao_view)，組 HTML 前一律以 html.escape 跳脫。
+
+def build_question_html(question_input):
+    return f"""<div class="question-title">問題：{html.escape(question_input) if question_input else "（未輸入）"}</div>"""
+
+def _info_html(date_mode, west_date_str, gz_year, gz_month, gz_day, gz_hour, voids_formatted, stars_row1_html, stars_row2_html):
+    west_date_str, gz_year, gz_day, gz_hour = (html.escape(text) for text in (west_date_str, gz_year, gz_day, gz_hour))
+    # [修正] 顯示日期字串建構：利用 HTML 進行紅字標示
+    # 格式：西曆。年(黑) 月日(紅) 時(黑)
+    html_date_parts = []
+    if date_mode == "指定西曆":
+        html_date_parts.append(f"{west_date_str}。")
+
+    # 年 (若有輸入則顯示)
+    if gz_year.strip():
+        html_date_parts.append(f"{gz_year} 年")
+
+    # [修正 1] 月柱：天干黑、地支紅 (e.g. 庚(黑)寅(紅))
+    # 日柱：全紅 (e.g. 庚戌(紅))
+    m_stem = html.escape(gz_month[0]) if len(gz_month) > 0 else ""
+    m_branch = html.escape(gz_month[1]) if len(gz_month) > 1 else ""
+
+    # 組合紅色區塊: "寅 月 庚戌 日" (根據新指示：『月』與『日』字也改回紅色)
+    red_segment = f"{m_branch} 月 {gz_day} 日"
+
+    # 最終組合: "庚" + <red>...</red>
+    html_date_parts.append(f"{m_stem}<span style='color:#d32f2f; font-weight:bold;'>{red_segment}</span>")
+
+    # 時 (若有輸入則顯示)
+    if gz_hour.strip():
+        html_date_parts.append(f"{gz_hour} 時")
+
+    final_date_html = " ".join(html_date_parts)
+
+    return f"""<div class="info-box">
+<div style="text-align:center; font-size:1.1em; font-weight:bold; margin-bottom:10px;">
+{final_date_html} &nbsp;&nbsp; <span style='color:#d32f2f;'>【旬空】：{voids_formatted}</span>
+</div>
+<div style="display:flex; justify-content:center;">
+    <div style="text-align:left; font-size:0.95em; line-height:1.7;">
+        {stars_row1_html}<br>
+        {stars_row2_html}
+    </div>
+</div>
+</div>"""
+
+def make_tags_str(attr_list):
+    if not attr_list: return ""
+    tags = ""
+    for a in attr_list:
+        tags += f'<span class="attr-tag">{a}</span>'
+    return tags
+
+# ==============================================================================
+# 3. 預先編譯的排盤表格：由共用的 HTML 片段組合
+# ==============================================================================
+# 輸出與逐行串接的參考實作 (benchmarks/reference_render.py 的 build_table_html) 逐位元組相同。
+# 表格拆成以下片段，各自以內容為 key 只建一次 (4096 種起卦共用)：
+#   表頭主卦 / 表頭變卦、六神格、藏伏 + 主卦爻 (卦畫、六親地支、世應)、動爻標示、變卦爻、納音格。
+# 每種起卦的片段清單 (模板) 於首次使用時組好，六神格位置留空；
+# 渲染時只需填入六神 (唯一與日干有關的欄位) 再 join 一次。
+
+_FRAGMENTS = {}
+
+def _fragment(kind, key, build):
+    cache_key = (kind, key)
+    fragment = _FRAGMENTS.get(cache_key)
+    if fragment is None:
+        fragment = _FRAGMENTS[cache_key] = build()
+    return fragment
+
+def _head_main_html(palace, m_name, m_attrs):
+    m_header_content = f"""<span class="hex-title-text">{palace}宮：{m_name} {make_tags_str(m_attrs)}</span><span>【主卦】</span>"""
+    return f"""<table class="hex-table">
+<tr class="header-row">
+<td width="6%">六神</td>
+<td width="6%">藏伏</td>
+<td width="27%" class="td-main">{m_header_content}</td>
+<td width="8%" class="td-arrow"></td>
+<td width="27%" class="td-change">"""
+
+def _head_change_html(c_palace, c_name, c_attrs, has_moving):
+    if has_moving:
+        c_header_content = f"""<span class="hex-title-text">{c_palace}宮：{c_name} {make_tags_str(c_attrs)}</span><span>【變卦】</span>"""
+    else:
+        c_header_content = f"""<span class="hex-title-text">&nbsp;</span><span>【變卦】</span>"""
+    return f"""{c_header_content}</td>
+<td width="13%" class="small-text">主卦納音</td>
+<td width="13%" class="small-text">變卦納音</td>
+"""
+
+def _god_cell_html(god):
+    return f"""<tr>
+<td class="small-text">{god}</td>
+"""
+
+def _main_cells_html(hidden, m):
+    m_bar_cls = "bar-yang" if m["type"] == "yang" else "bar-yin"
+    return f"""<td class="small-text fine-text">{hidden}</td>
+<td class="td-main"><div class="yao-cell">
+<div class="yao-main">{m['rel']}{m['branch']}{m['el']}</div>
+<div class="{m_bar_cls}"></div>
+<div class="yao-shiying">{m['shiying']}</div>
+</div></td>
+"""
+
+def _move_cell_html(move, yang):
+    move_indicator = ""
+    if move:
+        move_indicator = f'<span class="move-mark">{"O" if yang else "X"} ---&gt;</span>'
+    return f"""<td class="td-arrow">{move_indicator}</td>
+"""
+
+def _change_cell_html(c):
+    c_cell_content = ""
+    if c is not None:
+        c_bar_cls = "bar-yang bar-yang-c" if c["type"] == "yang" else "bar-yin bar-yin-c"
+        c_cell_content = f"""<div class="yao-cell">
+<div class="{c_bar_cls}"></div>
+<div class="yao-change">{c['rel']}{c['branch']}{c['el']}</div>
+</div>"""
+    return f"""<td class="td-change">{c_cell_content}</td>
+"""
+
+def _nayin_cells_html(m_nayin_short, c_nayin_short):
+    return f"""<td class="small-text fine-text">{m_nayin_short}</td>
+<td class="small-text fine-text">{c_nayin_short}</td>
+"""
+
+# 六神起點 -> 由上爻至初爻的六神格
+GOD_CELLS = tuple(
+    tuple(_god_cell_html(LIU_SHEN_ORDER[(start + i) % 6]) for i in range(5, -1, -1))
+    for start in range(6)
+)
+
+# 判讀欄 (生剋沖合，見 liuyao_analysis)：表頭格、各爻判讀格與表尾的爻間沖合列
+NOTE_HEAD_HTML = """<td class="small-text note-text">判讀</td>
+</tr>"""
+
+def _note_cell_html(tags):
+    return f"""<td class="small-text note-text">{"<br>".join(tags)}</td>
+</tr>"""
+
+def _links_row_html(links):
+    if not links:
+        return "</table>"
+    return f"""<tr><td colspan="8" class="small-text note-text">爻間：{"；".join(links)}</td></tr>
+</table>"""
+
+# 模板：[表頭主卦, 表頭變卦, 表頭結尾, (六神格, 主卦格, 動爻格, 變卦格, 納音格, 列結尾) × 6, "</table>"]
+# 不加判讀時表頭結尾、列結尾為 "</tr>"；加判讀時換成判讀格，表尾換成爻間沖合列
+_GOD_SLOTS = slice(3, 39, 6)
+_ROW_END_SLOTS = slice(8, 39, 6)
+_TABLE_TEMPLATES = [None] * 4096
+
+def _build_table_template(idx):
+    m_name, c_name, palace, lines, p_el, m_attrs, c_attrs, c_palace = CAST_TABLE[idx]
+    has_moving = any(move for _, _, _, move in lines)
+
+    template = [
+        _fragment("head_main", (palace, m_name, m_attrs), lambda: _head_main_html(palace, m_name, m_attrs)),
+        _fragment("head_change", (c_palace, c_name, c_attrs, has_moving), lambda: _head_change_html(c_palace, c_name, c_attrs, has_moving)),
+        "</tr>",
+    ]
+    # 爻字典為 CAST_TABLE 內的常駐共用物件，可直接以 id() 作為片段 key
+    for hidden, m, c, move in reversed(lines):
+        yang = m["type"] == "yang"
+        c_shown = c if has_moving else None
+        m_nayin_short = m["nayin"][-3:] if m["nayin"] else ""
+        c_nayin_short = c["nayin"][-3:] if has_moving and c["nayin"] else ""
+        template += [
+            None,
+            _fragment("main", (hidden, id(m)), lambda: _main_cells_html(hidden, m)),
+            _fragment("move", (move, yang), lambda: _move_cell_html(move, yang)),
+            _fragment("change", id(c_shown), lambda: _change_cell_html(c_shown)),
+            _fragment("nayin", (m_nayin_short, c_nayin_short), lambda: _nayin_cells_html(m_nayin_short, c_nayin_short)),
+            "</tr>",
+        ]
+    template.append("</table>")
+    return template
+
+def _table_parts(values, god_start, judgements=None, links=()):
+    # judgements：初爻至上爻的 LineJudgement，有值時加上判讀欄
+    # 回傳片段清單 (長度固定 40)，同一位置的片段即同一個格子，liuyao_view 據此只送出有變動的片段
+    idx = cast_index(values)
+    template = _TABLE_TEMPLATES[idx]
+    if template is None:
+        template = _TABLE_TEMPLATES[idx] = _build_table_template(idx)
+    parts = template.copy()
+    parts[_GOD_SLOTS] = GOD_CELLS[god_start]
+    if judgements is not None:
+        parts[2] = NOTE_HEAD_HTML
+        parts[_ROW_END_SLOTS] = [_note_cell_html(j.tags) for j in reversed(judgements)]
+        parts[-1] = _links_row_html(links)
+    return parts
+
+# ==============================================================================
+# 4. 複製用文字資料 (AI 判讀輔助)：以產生器逐段輸出，join 後即為完整文字
+# ==============================================================================
+
+# 提示詞表頭為常駐字串，每次直接 yield 同一物件，不重新組字串
+COPY_TEXT_HEADER = sys.intern(COPY_TEXT_HEADER)
+
+def format_copy_date(date_mode, west_date_str, gz_year, gz_month, gz_day, gz_hour):
+    if date_mode == "指定西曆":
+        return f"{west_date_str}。{gz_year}年 {gz_month}月 {gz_day}日 {gz_hour}時"
+    # 指定干支曆
+    c_parts = []
+    if gz_year.strip(): c_parts.append(f"{gz_year}年")
+    c_parts.append(f"{gz_month}月")
+    c_parts.append(f"{gz_day}日")
+    if gz_hour.strip(): c_parts.append(f"{gz_hour}時")
+    return " ".join(c_parts)
+
+def _copy_line_text(i, line, has_moving, judgement=None):
+    # 1. 爻位與六神
+    row_str = f"[{LINE_LABELS[i]}] 六神：{line['god']} | "
+
+    # 2. 藏伏
+    row_str += f"藏伏：{line['hidden'] or '無'} | "
+
+    # 3. 主卦
+    m = line['main']
+    m_yy = "陽爻" if m['type'] == 'yang' else "陰爻"
+    m_sy = ""
+    if m['shiying'] == "世": m_sy = ", 世爻"
+    elif m['shiying'] == "應": m_sy = ", 應爻"
+    row_str += f"主卦：{m['rel']}{m['branch']}{m['el']} ({m_yy}{m_sy}) | "
+
+    # 7. 生剋沖合判讀 (有傳入時附於行尾)
+    note_str = ""
+    if judgement is not None:
+        note_str = f" | 長生：{format_stages(judgement)} | 判讀：{format_tags(judgement)}"
+
+    m_ny = m['nayin'][-3:] if m['nayin'] else "無"
+    if not has_moving:
+        # [無動變] 簡化欄位：僅顯示主卦納音
+        return row_str + f"納音：{m_ny}{note_str}\n"
+
+    # 4. 動變 (有動變：動爻-> / 無動變：靜爻)
+    row_str += "有動變：動爻-> | " if line['move'] else "無動變：靜爻 | "
+
+    # 5. 變卦
+    c = line['change']
+    c_yy = "陽爻" if c['type'] == 'yang' else "陰爻"
+    row_str += f"變卦：{c['rel']}{c['branch']}{c['el']} ({c_yy}) | "
+
+    # 6. 納音 (強制顯示 主->變)
+    c_ny = c['nayin'][-3:] if c['nayin'] else "無"
+    return row_str + f"納音：{m_ny} -> {c_ny}{note_str}\n"
+
+def iter_copy_text(question_input, date_mode, west_date_str, gz_year, gz_month, gz_day, gz_hour, voids_formatted, all_stars, chart, header=True, stars_text=None, judgements=None, links=()):
+    # stars_text：已連接好的星煞文字 (DayContext.stars_text)，省略時由 all_stars 連接
+    # judgements / links：liuyao_analysis.judge_chart 的結果，有值時每爻附上判讀並列出爻間沖合
+    m_name, c_name, palace, lines_data, p_el, m_attrs, c_attrs, c_palace = chart
+    has_moving = any(line["move"] for line in lines_data)
+
+    if header:
+        yield COPY_TEXT_HEADER
+    yield f"【問題】：{question_input if question_input else '未輸入'}\n"
+    yield f"【日期】：{format_copy_date(date_mode, west_date_str, gz_year, gz_month, gz_day, gz_hour)}\n"
+    yield f"【旬空】：{voids_formatted}\n"
+    yield f"【星煞】：{'，'.join(all_stars) if stars_text is None else stars_text}\n\n"
+
+    yield f"【主卦】：{palace}宮-{m_name}" + (f" ({','.join(m_attrs)})" if m_attrs else "") + "\n"
+    if has_moving:
+        yield f"【變卦】：{c_palace}宮-{c_name}" + (f" ({','.join(c_attrs)})" if c_attrs else "") + "\n"
+    yield "\n" # 間距
+
+    for i in range(5, -1, -1):
+        yield _copy_line_text(i, lines_data[i], has_moving, None if judgements is None else judgements[i])
+    if links:
+        yield f"\n【爻間】：{'；'.join(links)}\n"
+
+# ==============================================================================
+# 5. 整張盤面 (排盤結果與輸出片段皆有快取，回傳值請視為唯讀)
+# ==============================================================================
+# render_table_parts / render_copy_parts 回傳片段 tuple，供 liuyao_view 比對差異 (串接後即完整內容)。
+
+calculate_chart = memoize(maxsize=1024)(calculate_hexagram)
+
+@memoize(maxsize=512, ttl=3600)
+def render_table_parts(values, date_mode, west_date_str, gz_year, gz_month, gz_day, gz_hour):
+    # (日期資訊, 表格片段 × 40)，與問題無關，改問題時直接命中快取
+    with span("voids_stars"):
+        ctx = day_context(gz_month, gz_day)
+    with span("analysis"):
+        judgements, links = judge_chart(values, gz_month, gz_day)
+    with span("html"):
+        info_html = _info_html(date_mode, west_date_str, gz_year, gz_month, gz_day, gz_hour, ctx.voids, ctx.stars_row1_html, ctx.stars_row2_html)
+        return (info_html, *_table_parts(values, ctx.god_start, judgements, links))
+
+@memoize(maxsize=512, ttl=3600)
+def render_copy_parts(values, date_mode, west_date_str, gz_year, gz_month, gz_day, gz_hour, question_input):
+    # iter_copy_text 逐段輸出的 tuple (提示詞表頭、問題、日期、旬空、星煞、卦名、各爻…)
+    with span("voids_stars"):
+        ctx = day_context(gz_month, gz_day)
+    with span("hexagram"):
+        chart = calculate_chart(values, ctx.day_stem, ctx.day_branch)
+    with span("analysis"):
+        judgements, links = judge_chart(values, gz_month, gz_day)
+    with span("copy_text"):
+        return tuple(iter_copy_text(
+            question_input, date_mode, west_date_str, gz_year, gz_month, gz_day, gz_hour,
+            ctx.voids, ctx.all_stars, chart, stars_text=ctx.stars_text, judgements=judgements, links=links,
+        ))
+
+def cache_stats():
+    return {
+        "chart": calculate_chart.cache.stats(),
+        "table": render_table_parts.cache.stats(),
+        "copy_text": render_copy_parts.cache.stats(),
+    }
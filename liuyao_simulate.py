@@ -0,0 +1,121 @@
+# ==============================================================================
+# 蒙地卡羅擲錢模擬：NumPy 一次產生 (N, 6) 爻值，經批次排盤彙總卦象與動爻分布
+# ==============================================================================
+# 用法：
+#   python liuyao_simulate.py -n 10000000 --seed 42
+#   python liuyao_simulate.py -n 1000000 --model uniform --json
+#
+# 三錢法以每爻一個 0~7 的亂數代表三枚錢幣 (每個位元一枚，1 為反)，查表得 6~9，
+# 機率與 liuyao_casting 相同；依 chunk 分段產生並彙總，記憶體用量與 N 無關。
+# 同一個種子與 chunk 大小得到相同結果。
+
+import argparse
+import json
+import math
+import sys
+import time
+
+import numpy as np
+
+from liuyao_casting import CAST_MODELS, CAST_MODEL_LABELS, DEFAULT_CAST_MODEL, LINE_PROBABILITIES, THREE_COIN_VALUES
+from liuyao_analytics import analyze, empty_aggregates, merge_aggregates, hexagram_frequency, moving_line_distribution
+
+_THREE_COIN_LUT = np.array(THREE_COIN_VALUES, dtype=np.int8)
+
+# ==============================================================================
+# 1. 產生爻值
+# ==============================================================================
+
+def simulate_casts(n, rng, model=DEFAULT_CAST_MODEL):
+    # 回傳 (n, 6) int8 爻值 (初爻至上爻)；rng 為 numpy.random.Generator
+    if model == "three_coin":
+        return _THREE_COIN_LUT[rng.integers(0, 8, size=(n, 6), dtype=np.uint8)]
+    if model == "uniform":
+        return rng.integers(6, 10, size=(n, 6), dtype=np.int8)
+    raise ValueError(f"不支援的起卦模型：{model}")
+
+# ==============================================================================
+# 2. 模擬與彙總
+# ==============================================================================
+
+def simulate(n, seed=None, model=DEFAULT_CAST_MODEL, chunk_size=1_000_000):
+    # 回傳 (liuyao_analytics 次數表, 各爻值次數 {6: .., 7: .., 8: .., 9: ..})
+    rng = np.random.default_rng(seed)
+    aggs = empty_aggregates()
+    value_counts = np.zeros(4, dtype=np.int64)
+    remaining = n
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        values = simulate_casts(size, rng, model)
+        value_counts += np.bincount(values.ravel() - 6, minlength=4)
+        aggs = merge_aggregates(aggs, analyze(values))
+        remaining -= size
+    return aggs, {6 + i: int(c) for i, c in enumerate(value_counts)}
+
+def expected_moving_distribution(model):
+    # 每爻獨立，動爻 (6 或 9) 機率為 p，動爻數服從二項分布 B(6, p)
+    probs = LINE_PROBABILITIES[model]
+    p = probs[6] + probs[9]
+    return [math.comb(6, k) * p ** k * (1 - p) ** (6 - k) for k in range(7)]
+
+def report(aggs, value_counts, model):
+    total_lines = sum(value_counts.values())
+    moving = moving_line_distribution(aggs)
+    hexagrams = hexagram_frequency(aggs)
+    expected_moving = expected_moving_distribution(model)
+    return {
+        "model": model,
+        "casts": int(aggs["charts"]),
+        "line_values": {
+            str(v): {"count": c, "share": c / total_lines if total_lines else 0.0, "expected": LINE_PROBABILITIES[model][v]}
+            for v, c in value_counts.items()
+        },
+        "moving_lines": {
+            str(k): {"count": int(row["次數"]), "share": float(row["比例"]), "expected": expected_moving[k]}
+            for k, row in moving.iterrows()
+        },
+        # 主卦每爻陰陽各半 (兩種模型皆然)，64 卦期望值皆為 1/64
+        "hexagram_share": {
+            "expected": 1 / 64,
+            "min": float(hexagrams["比例"].min()),
+            "max": float(hexagrams["比例"].max()),
+            "most_common": hexagrams.index[0],
+            "least_common": hexagrams.index[-1],
+        },
+    }
+
+def _print_report(result, elapsed):
+    print(f"模型：{CAST_MODEL_LABELS[result['model']]}")
+    print(f"模擬 {result['casts']:,} 卦，{elapsed:.2f} 秒 ({result['casts'] / elapsed:,.0f} 卦/秒)\n")
+    print("爻值   次數            比例      期望")
+    for v, row in result["line_values"].items():
+        print(f"{v:>4}  {row['count']:>14,}  {row['share']:8.4%}  {row['expected']:8.4%}")
+    print("\n動爻數 次數            比例      期望")
+    for k, row in result["moving_lines"].items():
+        print(f"{k:>4}  {row['count']:>14,}  {row['share']:8.4%}  {row['expected']:8.4%}")
+    share = result["hexagram_share"]
+    print(f"\n主卦比例：最少 {share['least_common']} {share['min']:.4%}，最多 {share['most_common']} {share['max']:.4%}，期望 {share['expected']:.4%}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="六爻擲錢蒙地卡羅模擬")
+    parser.add_argument("-n", type=int, default=1_000_000, help="模擬卦數")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--model", choices=CAST_MODELS, default=DEFAULT_CAST_MODEL)
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument("--json", action="store_true", help="以 JSON 輸出")
+    args = parser.parse_args(argv)
+
+    t = time.perf_counter()
+    aggs, value_counts = simulate(args.n, args.seed, args.model, args.chunk_size)
+    elapsed = time.perf_counter() - t
+    result = report(aggs, value_counts, args.model)
+    if args.json:
+        result["seconds"] = elapsed
+        json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    else:
+        _print_report(result, elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# ==============================================================================
+# 排盤檢視元件：表格與複製文字改在瀏覽器端組裝，重跑時只送出有變動的片段
+# ==============================================================================
+# 原本每次重跑都以 st.markdown / st.code 重送整段表格 HTML (約 7.5 KB) 與複製文字 (約 3.2 KB)。
+# 改用 st.components.v2 元件 (不開 iframe，直接掛在頁面 DOM，樣式沿用 static/liuyao.css)：
+#   - 前端程式 static/liuyao_view.js 走靜態檔服務、由瀏覽器快取；元件本身只帶一行載入程式
+#   - 內容為片段 tuple (liuyao_render.render_table_parts / render_copy_parts)。
+#     每個元件在 session_state 記住上次送出的片段，之後只送出 [索引, 片段] 差異；
+#     改一爻通常只有該爻的幾個格子、判讀與表頭卦名，提示詞表頭只在第一次送出
+#   - 前端基準序號對不上時 (如訊息遺失) 以觸發值要求重送，伺服器清掉紀錄後改送完整內容
+# make_patch / apply_patch 為伺服器與前端兩端的差異邏輯 (apply_patch 同 liuyao_view.js，供基準測試還原內容)。
+
+import functools
+import hashlib
+import json
+import os
+
+import streamlit as st
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+@functools.lru_cache(maxsize=None)
+def static_url(filename):
+    # 靜態檔網址 (相對於頁面) 加上內容雜湊，檔案更新後瀏覽器快取自動失效
+    with open(os.path.join(STATIC_DIR, filename), "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()[:10]
+    return f"app/static/{filename}?v={digest}"
+
+# ==============================================================================
+# 1. 差異格式
+# ==============================================================================
+# {"t": "html" | "text", "s": 序號, "b": 基準序號 (None = 完整內容), "n": 片段數, "p": [[索引, 片段], ...]}
+# 以 UTF-8 JSON bytes 傳給元件 (dict 會經過 dataframe 偵測而載入 pandas，bytes 直接放進 proto)
+
+def encode_patch(patch):
+    return json.dumps(patch, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def decode_patch(payload):
+    return json.loads(payload)
+
+def make_patch(prev, parts, seq, mode):
+    # prev：上次送出的片段 tuple (None 表示前端尚無內容)；片段多為快取內的同一物件，先比 identity
+    if prev is None:
+        return {"t": mode, "s": seq, "b": None, "n": len(parts), "p": [[i, part] for i, part in enumerate(parts)]}
+    changed = [
+        [i, part] for i, part in enumerate(parts)
+        if i >= len(prev) or (prev[i] is not part and prev[i] != part)
+    ]
+    return {"t": mode, "s": seq, "b": seq - 1, "n": len(parts), "p": changed}
+
+def apply_patch(view, patch):
+    # view：{"seq", "base", "parts"}，就地更新；基準不符時回傳 False (前端此時會要求重送)
+    if patch["s"] == view.get("seq") and patch["b"] == view.get("base"):
+        return True  # 重複收到同一則訊息
+    if patch["b"] is not None and patch["b"] != view.get("seq"):
+        return False
+    parts = [] if patch["b"] is None else view["parts"]
+    del parts[patch["n"]:]
+    parts.extend([""] * (patch["n"] - len(parts)))
+    for i, part in patch["p"]:
+        parts[i] = part
+    view["seq"] = patch["s"]
+    view["base"] = patch["b"]
+    view["parts"] = parts
+    return True
+
+# ==============================================================================
+# 2. Streamlit 元件
+# ==============================================================================
+
+_view_component = st.components.v2.component(
+    "liuyao_view",
+    # 多行字串才會被當成內嵌程式 (單行含 "/" 會被視為 asset_dir 內的檔案路徑)
+    js=f'export default (c) =>\n  import(new URL("{static_url("liuyao_view.js")}", document.baseURI)).then((m) => m.default(c));',
+    isolate_styles=False,
+)
+
+def _resync(state_key):
+    st.session_state.pop(state_key, None)
+
+def chart_view(parts, mode, key):
+    # parts：片段 tuple；mode："html" (innerHTML) 或 "text" (<pre> + 複製按鈕)
+    state_key = f"_view_{key}"
+    last = st.session_state.get(state_key)
+    # 內容沒變時也送出新序號的空差異 (約 40 bytes)，整頁重跑不必重送完整內容
+    seq = last[1] + 1 if last else 1
+    payload = encode_patch(make_patch(last[0] if last else None, parts, seq, mode))
+    _view_component(key=key, data=payload, on_resync_change=functools.partial(_resync, state_key))
+    st.session_state[state_key] = (parts, seq)
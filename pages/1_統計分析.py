@@ -0,0 +1,64 @@
+import datetime
+
+import streamlit as st
+
+from liuyao_analytics import (
+    get_analytics, hexagram_frequency, moving_line_distribution, shi_relative_by_palace, month_attribute_rates,
+    judgement_rates,
+)
+from liuyao_export import TZ_TAIPEI
+
+# ==============================================================================
+# 統計分析頁：占卜紀錄的卦象頻率、動爻數、世爻六親、月建與卦屬性、逐爻判讀
+# ==============================================================================
+# 次數表由 liuyao_analytics 在行程內共用並增量更新，每次重跑只讀取新增的紀錄。
+
+st.set_page_config(page_title="六爻排盤 - 統計分析", layout="wide")
+st.title("📊 統計分析")
+
+analytics = get_analytics()
+if analytics is None:
+    st.info("未啟用占卜紀錄 (環境變數 LIUYAO_HISTORY_DB 為空)，沒有可統計的資料。")
+    st.stop()
+
+top_col, refresh_col = st.columns([4, 1])
+refresh_col.button("重新整理")
+added = analytics.refresh()
+aggs = analytics.snapshot()
+
+updated = datetime.datetime.fromtimestamp(analytics.updated_at, TZ_TAIPEI).strftime("%Y/%m/%d %H:%M:%S")
+top_col.caption(f"共 {aggs['charts']:,} 張盤 (本次新增 {added:,})，更新於 {updated}")
+if not aggs["charts"]:
+    st.info("尚無紀錄")
+    st.stop()
+
+percent = {"比例": "{:.2%}"}
+
+hex_col, change_col = st.columns(2)
+with hex_col:
+    st.subheader("主卦頻率")
+    st.dataframe(hexagram_frequency(aggs).style.format(percent), height=300)
+with change_col:
+    st.subheader("變卦頻率 (有動爻者)")
+    st.dataframe(hexagram_frequency(aggs, change=True).style.format(percent), height=300)
+
+moving_col, shi_col = st.columns(2)
+with moving_col:
+    st.subheader("動爻數分布")
+    moving = moving_line_distribution(aggs)
+    st.bar_chart(moving["次數"])
+    st.dataframe(moving.style.format(percent))
+with shi_col:
+    st.subheader("各宮世爻六親")
+    normalize = st.toggle("以各宮比例顯示", value=False)
+    table = shi_relative_by_palace(aggs, normalize)
+    st.dataframe(table.style.format("{:.1%}") if normalize else table)
+
+st.subheader("各月建 六沖 / 六合 / 遊魂 / 歸魂 比例")
+rates = month_attribute_rates(aggs)
+st.line_chart(rates.drop(columns="盤數"))
+st.dataframe(rates.style.format({name: "{:.2%}" for name in rates.columns if name != "盤數"}))
+
+st.subheader("逐爻判讀比例")
+st.caption("月破、旬空以全部爻計；日沖、回頭生剋以動爻計；暗動、日破以靜爻計。月柱或日柱不明的紀錄不列入。")
+st.dataframe(judgement_rates(aggs).style.format(percent))
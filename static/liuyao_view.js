@@ -0,0 +1,76 @@
+// ==============================================================================
+// 排盤檢視元件的前端 (由 liuyao_view.py 的 st.components.v2 元件載入)：保留片段清單，只套用差異
+// ==============================================================================
+// data 為 UTF-8 JSON bytes：{t: "html" | "text", s: 序號, b: 基準序號 (null = 完整內容), n: 片段數, p: [[索引, 片段], ...]}
+//   html  片段串接後以 innerHTML 顯示 (問題、日期資訊、排盤表格)
+//   text  片段串接後放進 <pre>，右上角附複製按鈕 (複製用文字)
+// 片段清單存在模組層 (以元件 key 區分)，React 重建 DOM 時直接以現有片段重繪。
+// 基準序號與手上的不符時送出 resync 觸發值，伺服器下一輪改送完整內容。
+
+const views = new Map();
+
+const COPY_LABEL = "📋 複製";
+
+function copyText(text, button) {
+  const done = () => {
+    button.textContent = "✓ 已複製";
+    setTimeout(() => { button.textContent = COPY_LABEL; }, 1500);
+  };
+  if (navigator.clipboard && window.isSecureContext) {
+    navigator.clipboard.writeText(text).then(done);
+    return;
+  }
+  // 非 https 連線沒有 clipboard API，退回選取文字 + execCommand
+  const area = document.createElement("textarea");
+  area.value = text;
+  document.body.appendChild(area);
+  area.select();
+  document.execCommand("copy");
+  area.remove();
+  done();
+}
+
+function mount(parentElement, mode) {
+  let root = parentElement.querySelector(".liuyao-view");
+  if (!root) {
+    root = document.createElement("div");
+    root.className = "liuyao-view";
+    if (mode === "text") {
+      root.innerHTML = `<div class="copy-box"><button type="button">${COPY_LABEL}</button><pre></pre></div>`;
+      root.querySelector("button").onclick = (e) => copyText(root.querySelector("pre").textContent, e.currentTarget);
+    }
+    parentElement.appendChild(root);
+  }
+  return mode === "text" ? root.querySelector("pre") : root;
+}
+
+const decoder = new TextDecoder();
+
+export default function ({ data: payload, key, parentElement, setTriggerValue }) {
+  const data = JSON.parse(decoder.decode(payload));
+  let view = views.get(key);
+  if (!view) {
+    view = { seq: null, base: null, parts: [] };
+    views.set(key, view);
+  }
+  // 同一則訊息重複呼叫 (如重新掛載) 時不再套用
+  if (data.s !== view.seq || data.b !== view.base) {
+    if (data.b !== null && data.b !== view.seq) {
+      setTriggerValue("resync", data.s);
+      return;
+    }
+    if (data.b === null) view.parts = [];
+    view.parts.length = data.n;
+    for (const [i, part] of data.p) view.parts[i] = part;
+    view.seq = data.s;
+    view.base = data.b;
+  }
+
+  const target = mount(parentElement, data.t);
+  const content = view.parts.join("");
+  if (target.liuyaoContent !== content) {
+    if (data.t === "text") target.textContent = content;
+    else target.innerHTML = content;
+    target.liuyaoContent = content;
+  }
+}
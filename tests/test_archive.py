@@ -0,0 +1,70 @@
+# ==============================================================================
+# 盤面封存檔：占卜紀錄 -> 封存檔 -> chart_record() 的往返，與中斷、略過、時間順序
+# ==============================================================================
+# 用法：python -m pytest -q tests
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from liuyao_archive import ArchiveWriter, ChartArchive, archive_history
+from liuyao_export import chart_record
+from liuyao_history import HistoryStore, reading_row
+
+RECORDS = [
+    chart_record([7, 8, 9, 6, 7, 8], "指定干支曆", "(手動輸入)", "乙巳", "己丑", "丁酉", "己酉", "問工作"),
+    chart_record([6, 6, 6, 9, 9, 9], "指定西曆", "2025-01-20 10:30", "甲辰", "丁丑", "庚午", "", ""),
+    chart_record([8, 8, 7, 7, 9, 6], "指定干支曆", "(手動輸入)", "", "戊寅", "癸亥", "壬子", "問感情"),
+]
+# 舊版介面允許的自由輸入年柱、時柱，無法寫入封存檔
+FREE_TEXT = chart_record([7, 7, 7, 8, 8, 8], "指定干支曆", "(手動輸入)", "甲丑", "己丑", "丁酉", "乙子", "")
+
+
+def _store(tmp_path, records):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    for i, record in enumerate(records):
+        store.record_row(reading_row(record, "app", created_at=1000.0 + i))
+    store.flush()
+    return store
+
+
+def test_history_round_trip_skips_free_text_pillars(tmp_path):
+    store = _store(tmp_path, RECORDS[:2] + [FREE_TEXT] + RECORDS[2:])
+    path = str(tmp_path / "archive")
+    assert archive_history(store, path) == (3, 1)
+    archive = ChartArchive(path)
+    assert list(archive.iter_records()) == RECORDS
+    assert archive.column("created_at").tolist() == [1000.0, 1001.0, 1003.0]
+    # 重跑不重複，也不會再卡在同一筆
+    assert archive_history(store, path) == (0, 0)
+    assert len(ChartArchive(path)) == 3
+    store.close()
+
+
+def test_interrupted_write_keeps_rows_and_info_in_step(tmp_path):
+    path = str(tmp_path / "archive")
+    with pytest.raises(RuntimeError):
+        with ArchiveWriter(path) as writer:
+            writer.append(RECORDS[0], created_at=1.0)
+            writer.info["history_id"] = 1
+            raise RuntimeError
+    writer = ArchiveWriter(path)
+    assert (writer.rows, writer.info) == (0, {})
+    writer.close()
+
+
+def test_created_at_must_not_decrease(tmp_path):
+    path = str(tmp_path / "archive")
+    with ArchiveWriter(path) as writer:
+        writer.append(RECORDS[0], created_at=10.0)
+        writer.append(RECORDS[1], created_at=10.0)
+    with ArchiveWriter(path) as writer:
+        with pytest.raises(ValueError):
+            writer.append(RECORDS[2], created_at=9.0)
+        writer.append(RECORDS[2], created_at=20.0)
+    archive = ChartArchive(path)
+    assert len(archive) == 3
+    assert archive.time_range(10.0, 20.0) == (0, 2)
@@ -0,0 +1,35 @@
+# ==============================================================================
+# 批次判讀的輸入檢查：超出範圍的編號不得在轉成 int8 後繞回有效值
+# ==============================================================================
+# 用法：python -m pytest -q tests
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from liuyao_batch import judge_batch, stems_to_ids
+
+VALUES = np.array([[7, 8, 9, 6, 7, 8]])
+
+
+@pytest.mark.parametrize("months, days", [([256], [0]), ([0], [316]), ([-1], [0]), ([12], [0]), ([0], [60])])
+def test_judge_batch_rejects_out_of_range_ids(months, days):
+    with pytest.raises(ValueError):
+        judge_batch(VALUES, np.array(months, dtype=np.int64), np.array(days, dtype=np.int64))
+
+
+def test_judge_batch_accepts_wide_integer_input():
+    wide = judge_batch(VALUES, np.array([11], dtype=np.int64), np.array([59], dtype=np.int64))
+    narrow = judge_batch(VALUES, np.array([11], dtype=np.int8), np.array([59], dtype=np.int8))
+    for name in wide:
+        assert np.array_equal(wide[name], narrow[name])
+
+
+@pytest.mark.parametrize("stems", [[10], [-1], [266], ["子"]])
+def test_stems_to_ids_rejects_invalid_stems(stems):
+    with pytest.raises(ValueError):
+        stems_to_ids(stems)
@@ -0,0 +1,36 @@
+# ==============================================================================
+# 盤面 HTML 的跳脫：使用者輸入 (問題、西曆字串) 不得以原始 HTML 進入頁面
+# ==============================================================================
+# 頁面以 innerHTML 顯示表格片段 (liuyao_view)，問題也可能來自他人給的永久連結 (?r=)。
+# 用法：python -m pytest -q tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from liuyao_permalink import decode_token, encode_token
+from liuyao_render import build_question_html, render_table_parts
+
+PAYLOAD = "<img src=x onerror=alert(1)>"
+ESCAPED = "&lt;img src=x onerror=alert(1)&gt;"
+
+
+def test_question_is_escaped():
+    page = build_question_html(PAYLOAD)
+    assert "<img" not in page
+    assert ESCAPED in page
+
+
+def test_date_fields_are_escaped():
+    # 四柱須為六十甲子 (介面與 API 皆以 parse_pillars 檢查)，西曆字串來自永久連結，為自由文字
+    info_html = render_table_parts([7, 8, 9, 6, 7, 8], "指定西曆", PAYLOAD, "乙巳", "己丑", "丁酉", "己酉")[0]
+    assert "<img" not in info_html
+    assert info_html.count(ESCAPED) == 1
+
+
+def test_permalink_question_is_escaped():
+    token = encode_token([7, 8, 9, 6, 7, 8], "指定干支曆", "(手動輸入)", "乙巳", "己丑", "丁酉", "己酉", PAYLOAD)
+    question = decode_token(token).question
+    assert question == PAYLOAD
+    assert "<img" not in build_question_html(question)
@@ -0,0 +1,72 @@
+# ==============================================================================
+# 每次重跑送出的位元組：以 liuyao_view 建立差異並檢查預算
+# ==============================================================================
+# 與 chart_view 相同的流程 (make_patch -> encode_patch)，不需啟動 Streamlit。
+# 實際連線的逐步量測見 benchmarks/bench_payload.py。
+# 用法：python -m pytest -q tests
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from liuyao_render import render_copy_parts, render_table_parts
+from liuyao_view import apply_patch, encode_patch, make_patch
+
+DATE = ("指定干支曆", "(手動輸入)", "乙巳", "己丑", "丁酉", "己酉")
+BASES = ([7, 8, 9, 6, 7, 8], [7, 7, 7, 7, 7, 7], [8, 6, 8, 9, 7, 6])
+
+# 位元組預算 (改一爻的最壞情況約為表格 4.1 KB、複製文字 1.9 KB；完整內容分別約 6 KB、3.5 KB)
+EMPTY_BUDGET = 64
+QUESTION_BUDGET = 200
+LINE_BUDGET = {"html": 4500, "text": 2000}
+VIEWS = {
+    "html": lambda values, question: render_table_parts(values, *DATE),
+    "text": lambda values, question: render_copy_parts(values, *DATE, question),
+}
+
+
+def _sent(prev, parts, mode):
+    # 回傳 (差異, 編碼後位元組數)，序號 2 接在完整內容 (序號 1) 之後
+    patch = make_patch(prev, parts, 2, mode)
+    return patch, len(encode_patch(patch))
+
+
+@pytest.mark.parametrize("mode", VIEWS)
+def test_unchanged_rerun_sends_empty_patch(mode):
+    for values in BASES:
+        patch, size = _sent(VIEWS[mode](values, "問工作"), VIEWS[mode](list(values), "問工作"), mode)
+        assert patch["p"] == []
+        assert size <= EMPTY_BUDGET
+
+
+def test_question_change_sends_only_question_fragment():
+    prev = VIEWS["text"](BASES[0], "問工作")
+    patch, size = _sent(prev, VIEWS["text"](BASES[0], "問感情"), "text")
+    assert len(patch["p"]) == 1
+    assert size <= QUESTION_BUDGET
+    # 表格不含問題，完全不用重送
+    assert _sent(VIEWS["html"](BASES[0], "問工作"), VIEWS["html"](BASES[0], "問感情"), "html")[0]["p"] == []
+
+
+@pytest.mark.parametrize("mode", VIEWS)
+def test_one_line_change_patches_only_affected_fragments(mode):
+    for values in BASES:
+        prev = VIEWS[mode](values, "問工作")
+        full = len(encode_patch(make_patch(None, prev, 1, mode)))
+        for i in range(6):
+            for v in (6, 7, 8, 9):
+                if v == values[i]:
+                    continue
+                changed = values[:i] + [v] + values[i + 1:]
+                parts = VIEWS[mode](changed, "問工作")
+                patch, size = _sent(prev, parts, mode)
+                assert 0 < len(patch["p"]) < patch["n"]
+                assert size <= LINE_BUDGET[mode]
+                assert size < full
+                # 前端套用差異後的內容與完整重送相同
+                view = {"seq": 1, "base": None, "parts": list(prev)}
+                assert apply_patch(view, patch)
+                assert view["parts"] == list(parts)
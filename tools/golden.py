@@ -0,0 +1,336 @@
+# ==============================================================================
+# 引擎黃金表：窮舉所有輸入存下目前的輸出，並以差異比對檢查替代實作
+# ==============================================================================
+# 用法：
+#   python tools/golden.py generate                     # 以目前的引擎產生 data/engine_golden.json.gz
+#   python tools/golden.py check                        # 比對 liuyao_engine (預設)
+#   python tools/golden.py check --engine batch         # 比對 NumPy 批次排盤
+#   python tools/golden.py check --engine mymod:calc    # 比對任意 (values, day_stem, day_branch) 函式
+#   python tools/golden.py check --day-context          # 旬空、星煞比對 day_context 查表
+#   python tools/golden.py check --all                  # 不在第一個差異停下，統計全部差異
+#
+# 三個區段，輸入空間皆可完整列舉：
+#   hexagram  calculate_hexagram：4096 種起卦 × 10 日干 (日支不影響排盤，固定為子)
+#   name      get_code_from_name：全名、簡稱、上下卦組合、異體/簡體字、含空白與查無的寫法
+#   day       旬空、星煞 (format_voids / get_star_lists)：60 日柱 × 12 月建
+# 每筆輸出攤平成 (欄位路徑, repr(值)) 序列 (純量 list / tuple 整串為一個值)，值以字串表編號存成 uint16 陣列 (zlib + base64)，
+# 整份 JSON 再以 gzip 壓縮。比對時回報第一個不同的區段、輸入、欄位、預期值與實際值。
+
+import argparse
+import base64
+import gzip
+import importlib
+import json
+import os
+import sys
+import time
+import zlib
+from array import array
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from liuyao_engine import (
+    HEAVENLY_STEMS, EARTHLY_BRANCHES, SEXAGENARY_CYCLE, FULL_TO_SHORT_MAP, NAME_INDEX, VARIANT_CHARS,
+    cast_values,
+)
+
+DEFAULT_PATH = os.path.join(ROOT, "data", "engine_golden.json.gz")
+VERSION = 1
+
+# ==============================================================================
+# 1. 輸入列舉
+# ==============================================================================
+
+# 繁 -> 簡/異體 (VARIANT_CHARS 的反向)，用來產生異體字寫法
+_VARIANT_OF = {}
+for _variant, _canonical in VARIANT_CHARS.items():
+    _VARIANT_OF.setdefault(_canonical, chr(_variant))
+
+def hexagram_inputs():
+    return [[cast_values(idx), stem] for idx in range(4096) for stem in HEAVENLY_STEMS]
+
+def name_inputs():
+    names = list(NAME_INDEX)
+    for full_name, short_name in FULL_TO_SHORT_MAP.items():
+        for name in (full_name, short_name):
+            names.append("".join(_VARIANT_OF.get(ch, ch) for ch in name))
+            names.append(" ".join(name))
+    names += ["", " ", "未知", "天天", "乾為", "為天", "XYZ", "乾為天卦"]
+    return list(dict.fromkeys(names))
+
+def day_inputs():
+    return [[gz_day, month_branch] for gz_day in SEXAGENARY_CYCLE for month_branch in EARTHLY_BRANCHES]
+
+# ==============================================================================
+# 2. 受測函式 (可替換為任何相容的實作)
+# ==============================================================================
+
+def _flatten(value, path, out):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(item, f"{path}.{key}" if path else str(key), out)
+    elif isinstance(value, (list, tuple)) and any(isinstance(item, (dict, list, tuple)) for item in value):
+        for i, item in enumerate(value):
+            _flatten(item, f"{path}[{i}]", out)
+    elif isinstance(value, (list, tuple)):
+        # 純量序列 (卦屬性、星煞) 長度不固定，整串視為一個值
+        out.append((path, repr(list(value))))
+    else:
+        out.append((path, repr(value)))
+    return out
+
+def flatten(value):
+    return _flatten(value, "", [])
+
+def _hexagram_output(calculate):
+    labels = ("main_name", "change_name", "palace", "lines", "palace_element", "attributes", "change_attributes", "change_palace")
+    def run(inputs):
+        for values, stem in inputs:
+            yield flatten(dict(zip(labels, calculate(values, stem, "子"))))
+    return run
+
+def _name_output(get_code):
+    def run(inputs):
+        for name in inputs:
+            yield [("code", repr(get_code(name)))]
+    return run
+
+def _day_output(format_voids, get_star_lists):
+    def run(inputs):
+        for gz_day, month_branch in inputs:
+            row1, row2 = get_star_lists(month_branch, gz_day[0], gz_day[1])
+            yield flatten({"voids": format_voids(gz_day[0], gz_day[1]), "stars1": list(row1), "stars2": list(row2)})
+    return run
+
+def _day_context_output(inputs):
+    # 預先算好的 720 種日辰表 (liuyao_render.day_context)；月柱取任一地支相符的干支
+    from liuyao_render import day_context
+    month_pillars = {gz[1]: gz for gz in SEXAGENARY_CYCLE}
+    for gz_day, month_branch in inputs:
+        ctx = day_context(month_pillars[month_branch], gz_day)
+        yield flatten({"voids": ctx.voids, "stars1": list(ctx.star_row1), "stars2": list(ctx.star_row2)})
+
+def _batch_hexagram_output(inputs):
+    # NumPy 批次排盤 (liuyao_batch) 一次算完，再把編號轉回 calculate_hexagram 的結構
+    import numpy as np
+    from liuyao_engine import LIU_SHEN_ORDER, FIVE_ELEMENTS, SIX_RELATIVES, NAYIN_NAMES, TRIGRAM_NAMES, TRIGRAMS, SHIYING_MARKS, BRANCH_ELEMENTS
+    from liuyao_batch import HEX_NAME_BY_CODE, calculate_hexagram_batch
+
+    result = calculate_hexagram_batch(np.array([values for values, _ in inputs]), [stem for _, stem in inputs])
+    columns = {key: value.tolist() for key, value in result.items()}
+
+    def line_dict(k, i, prefix, yang):
+        branch = EARTHLY_BRANCHES[columns[f"{prefix}_branch"][k][i]]
+        nayin = columns[f"{prefix}_nayin"][k][i]
+        return {
+            "stem": HEAVENLY_STEMS[columns[f"{prefix}_stem"][k][i]], "branch": branch,
+            "el": FIVE_ELEMENTS[columns[f"{prefix}_el"][k][i]], "nayin": NAYIN_NAMES[nayin] if nayin >= 0 else "",
+            "rel": SIX_RELATIVES[columns[f"{prefix}_rel"][k][i]],
+            **({"shiying": SHIYING_MARKS[(i == columns["shi"][k]) + 2 * (i == columns["ying"][k])]} if prefix == "m" else {}),
+            "type": "yang" if yang else "yin",
+        }
+
+    def attributes(k, prefix):
+        flags = (("clash", "六沖"), ("harmony", "六合"), ("wandering", "遊魂"), ("returning", "歸魂"))
+        return [label for key, label in flags if columns[f"{prefix}_{key}"][k]]
+
+    for k in range(len(inputs)):
+        lines = []
+        for i in range(6):
+            h_branch = columns["h_branch"][k][i]
+            hidden = ""
+            if h_branch >= 0:
+                b = EARTHLY_BRANCHES[h_branch]
+                hidden = f"{SIX_RELATIVES[columns['h_rel'][k][i]]}{b}{BRANCH_ELEMENTS[b]}"
+            main = line_dict(k, i, "m", columns["main_yang"][k][i])
+            change = line_dict(k, i, "c", columns["change_yang"][k][i])
+            lines.append({"god": LIU_SHEN_ORDER[columns["god"][k][i]], "hidden": hidden, "main": main, "change": change, "move": columns["moving"][k][i]})
+        palace = TRIGRAM_NAMES[columns["palace"][k]]
+        yield flatten({
+            "main_name": HEX_NAME_BY_CODE[columns["main_code"][k]],
+            "change_name": HEX_NAME_BY_CODE[columns["change_code"][k]],
+            "palace": palace,
+            "lines": lines,
+            "palace_element": TRIGRAMS[palace]["element"],
+            "attributes": attributes(k, "main"),
+            "change_attributes": attributes(k, "change"),
+            "change_palace": TRIGRAM_NAMES[columns["change_palace"][k]],
+        })
+
+def _compact_calculate(values, day_stem, day_branch):
+    from liuyao_compact import CompactChart
+    return CompactChart.from_values(values, day_stem).to_result()
+
+def _cached_calculate(values, day_stem, day_branch):
+    from liuyao_render import calculate_chart
+    return calculate_chart(values, day_stem, day_branch)
+
+# --engine 預設名稱
+ENGINES = {
+    "engine": lambda: _hexagram_output(importlib.import_module("liuyao_engine").calculate_hexagram),
+    "cached": lambda: _hexagram_output(_cached_calculate),
+    "compact": lambda: _hexagram_output(_compact_calculate),
+    "batch": lambda: _batch_hexagram_output,
+}
+
+def load_function(spec):
+    # "module:function" -> 函式
+    module, _, name = spec.partition(":")
+    if not name:
+        raise ValueError(f"請以 module:function 指定函式，收到 {spec!r}")
+    return getattr(importlib.import_module(module), name)
+
+def default_runners():
+    from liuyao_engine import get_code_from_name
+    from liuyao_render import format_voids, get_star_lists
+    return {
+        "hexagram": ENGINES["engine"](),
+        "name": _name_output(get_code_from_name),
+        "day": _day_output(format_voids, get_star_lists),
+    }
+
+SECTION_INPUTS = {"hexagram": hexagram_inputs, "name": name_inputs, "day": day_inputs}
+
+# ==============================================================================
+# 3. 產生與讀取黃金表
+# ==============================================================================
+
+def generate(runners=None):
+    runners = runners or default_runners()
+    strings, string_ids = [], {}
+    def intern(s):
+        sid = string_ids.get(s)
+        if sid is None:
+            sid = string_ids[s] = len(strings)
+            strings.append(s)
+        return sid
+
+    sections = {}
+    for name, make_inputs in SECTION_INPUTS.items():
+        inputs = make_inputs()
+        fields, values = None, array("H")
+        for flat in runners[name](inputs):
+            paths = [path for path, _ in flat]
+            if fields is None:
+                fields = paths
+            elif paths != fields:
+                raise ValueError(f"區段 {name} 的輸出欄位不一致")
+            values.extend(intern(v) for _, v in flat)
+        if sys.byteorder != "little":
+            values.byteswap()
+        sections[name] = {
+            "inputs": inputs,
+            "fields": fields,
+            "values": base64.b64encode(zlib.compress(values.tobytes(), 9)).decode("ascii"),
+        }
+    if len(strings) > 0xFFFF:
+        raise ValueError("字串表超過 uint16 範圍")
+    return {"version": VERSION, "strings": strings, "sections": sections}
+
+def save(golden, path=DEFAULT_PATH):
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=9) as fp:
+        json.dump(golden, fp, ensure_ascii=False, separators=(",", ":"))
+
+def load(path=DEFAULT_PATH):
+    with gzip.open(path, "rt", encoding="utf-8") as fp:
+        golden = json.load(fp)
+    if golden.get("version") != VERSION:
+        raise ValueError(f"黃金表版本不符：{golden.get('version')}")
+    for section in golden["sections"].values():
+        values = array("H")
+        values.frombytes(zlib.decompress(base64.b64decode(section["values"])))
+        if sys.byteorder != "little":
+            values.byteswap()
+        section["values"] = values
+    return golden
+
+# ==============================================================================
+# 4. 差異比對
+# ==============================================================================
+
+def check(golden, runners, stop_at_first=True):
+    # 回傳差異 list：(區段, 輸入, 欄位, 預期, 實際)；stop_at_first 時最多一筆
+    string_ids = {s: i for i, s in enumerate(golden["strings"])}
+    strings = golden["strings"]
+    diffs = []
+    for name, runner in runners.items():
+        section = golden["sections"][name]
+        inputs, fields, values = section["inputs"], section["fields"], section["values"]
+        width = len(fields)
+        for row, (inp, flat) in enumerate(zip(inputs, runner(inputs))):
+            expected = values[row * width:(row + 1) * width]
+            actual = [string_ids.get(v, -1) for _, v in flat]
+            if actual == list(expected) and len(flat) == width and all(p == f for (p, _), f in zip(flat, fields)):
+                continue
+            # 找出第一個不同的欄位 (含欄位缺少或多出)
+            for i in range(max(width, len(flat))):
+                field = fields[i] if i < width else None
+                exp = strings[expected[i]] if i < width else "(無此欄位)"
+                path, act = flat[i] if i < len(flat) else (None, "(缺少欄位)")
+                if path != field or act != exp:
+                    diffs.append((name, inp, field or path, exp, act if path == field or path is None else f"{path} = {act}"))
+                    break
+            if stop_at_first:
+                return diffs
+    return diffs
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="六爻引擎黃金表：產生與差異比對")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gen = sub.add_parser("generate", help="以目前的引擎產生黃金表")
+    gen.add_argument("--out", default=DEFAULT_PATH)
+    chk = sub.add_parser("check", help="比對實作與黃金表")
+    chk.add_argument("--golden", default=DEFAULT_PATH)
+    chk.add_argument("--engine", default="engine", help=f"排盤實作：{' / '.join(ENGINES)} 或 module:function")
+    chk.add_argument("--names", default=None, help="卦名查詢實作 module:function (預設 liuyao_engine.get_code_from_name)")
+    chk.add_argument("--voids", default=None, help="旬空實作 module:function (預設 liuyao_render.format_voids)")
+    chk.add_argument("--stars", default=None, help="星煞實作 module:function (預設 liuyao_render.get_star_lists)")
+    chk.add_argument("--day-context", action="store_true", help="旬空、星煞改比對 liuyao_render.day_context 查表")
+    chk.add_argument("--section", action="append", choices=list(SECTION_INPUTS), help="只比對指定區段 (可重複)")
+    chk.add_argument("--all", action="store_true", help="列出全部差異，不在第一個停下")
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        t = time.perf_counter()
+        golden = generate()
+        save(golden, args.out)
+        rows = {name: len(section["inputs"]) for name, section in golden["sections"].items()}
+        print(f"已寫入 {args.out} ({os.path.getsize(args.out) / 1024:.0f} KB，{time.perf_counter() - t:.1f} 秒)：{rows}")
+        return 0
+
+    golden = load(args.golden)
+    runners = default_runners()
+    if args.engine in ENGINES:
+        runners["hexagram"] = ENGINES[args.engine]()
+    else:
+        runners["hexagram"] = _hexagram_output(load_function(args.engine))
+    if args.names:
+        runners["name"] = _name_output(load_function(args.names))
+    if args.day_context:
+        runners["day"] = _day_context_output
+    elif args.voids or args.stars:
+        from liuyao_render import format_voids, get_star_lists
+        runners["day"] = _day_output(
+            load_function(args.voids) if args.voids else format_voids,
+            load_function(args.stars) if args.stars else get_star_lists,
+        )
+    if args.section:
+        runners = {name: runners[name] for name in args.section}
+
+    t = time.perf_counter()
+    diffs = check(golden, runners, stop_at_first=not args.all)
+    elapsed = time.perf_counter() - t
+    checked = sum(len(golden["sections"][name]["inputs"]) for name in runners)
+    if not diffs:
+        print(f"一致：{checked:,} 筆輸入 ({elapsed:.2f} 秒)")
+        return 0
+    for section, inp, field, expected, actual in diffs[:20]:
+        print(f"[{section}] 輸入 {inp!r} 欄位 {field}：預期 {expected}，實際 {actual}")
+    if len(diffs) > 20:
+        print(f"…共 {len(diffs):,} 筆輸入不一致")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+# ==============================================================================
+# 產生自託管字型子集：Noto Serif TC -> static/fonts/*.woff2
+# ==============================================================================
+# 用法：
+#   pip install fonttools brotli
+#   python tools/subset_font.py NotoSerifTC-Regular.otf --bold NotoSerifTC-Bold.otf
+#   python tools/subset_font.py NotoSerifCJKsc-Regular.otf      # 泛 CJK 字型：以 ZHT locl 換成繁中字形
+# 原始字型請由 https://github.com/notofonts/noto-cjk (Serif/SubsetOTF/TC) 下載；
+# 離線環境可用 PyPI 套件 mplfonts 內附的 NotoSerifCJKsc-Regular.otf (同字族，含繁中字形，僅 Regular)。
+# 泛 CJK 字型 (Noto Serif CJK SC/JP…) 的預設字形依地區而異，--lang (預設 ZHT) 會把 hani 文字的
+# locl 單一替換直接寫進 cmap，子集與 Noto Serif TC 字形相同；TC 字型本身沒有這組 locl，不受影響。
+# 子集只收錄專案原始碼中出現過的字元 (主頁、pages/ 分頁與 static/ 前端的卦名、干支、六親、介面文字…)
+# 加上 ASCII，使用者自行輸入的問題若有其他字元，瀏覽器會自動退回系統字型。
+# 只給 Regular 時不產生粗體檔，頁面的粗體字由瀏覽器以 Regular 合成。
+
+import argparse
+import glob
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUT_DIR = os.path.join(ROOT, "static", "fonts")
+OUTPUT_NAMES = {400: "NotoSerifTC-Regular-subset.woff2", 700: "NotoSerifTC-Bold-subset.woff2"}
+# 收集字元的原始檔 (相對於 ROOT)
+TEXT_SOURCES = ("*.py", os.path.join("pages", "*.py"), os.path.join("static", "*.js"))
+
+
+def collect_text():
+    chars = set(chr(c) for c in range(0x20, 0x7F))
+    chars.update("　，。：；、！？「」『』（）【】《》…—")
+    for pattern in TEXT_SOURCES:
+        for path in glob.glob(os.path.join(ROOT, pattern)):
+            with open(path, encoding="utf-8") as f:
+                chars.update(ch for ch in f.read() if ord(ch) > 0x7F)
+    return "".join(sorted(chars))
+
+
+def _single_substitutions(lookup):
+    for sub in lookup.SubTable:
+        if lookup.LookupType == 7:  # Extension
+            sub = sub.ExtSubTable
+        if sub.LookupType == 1:
+            yield sub.mapping
+
+def bake_locl(font, lang):
+    # 把 hani 文字在 lang 語系下的 locl 單一替換寫進 cmap；回傳換掉的字元數
+    if "GSUB" not in font:
+        return 0
+    gsub = font["GSUB"].table
+    lang_sys = None
+    for script in gsub.ScriptList.ScriptRecord:
+        if script.ScriptTag == "hani":
+            for record in script.Script.LangSysRecord:
+                if record.LangSysTag.strip() == lang:
+                    lang_sys = record.LangSys
+    if lang_sys is None:
+        return 0
+    mapping = {}
+    for index in lang_sys.FeatureIndex:
+        feature = gsub.FeatureList.FeatureRecord[index]
+        if feature.FeatureTag == "locl":
+            for lookup_index in feature.Feature.LookupListIndex:
+                for sub in _single_substitutions(gsub.LookupList.Lookup[lookup_index]):
+                    mapping.update(sub)
+    changed = set()
+    for table in font["cmap"].tables:
+        if table.isUnicode():
+            for code, glyph in table.cmap.items():
+                if glyph in mapping:
+                    table.cmap[code] = mapping[glyph]
+                    changed.add(code)
+    return len(changed)
+
+def subset(src, dst, text, lang):
+    from fontTools import subset as ft_subset
+
+    options = ft_subset.Options()
+    options.flavor = "woff2"
+    options.name_IDs = ["*"]
+    options.notdef_outline = True
+    font = ft_subset.load_font(src, options)
+    baked = bake_locl(font, lang) if lang else 0
+    if baked:
+        # locl 已寫進 cmap，不再保留其他語系的替代字形
+        options.layout_features = [tag for tag in options.layout_features if tag != "locl"]
+    subsetter = ft_subset.Subsetter(options)
+    subsetter.populate(text=text)
+    subsetter.subset(font)
+    ft_subset.save_font(font, dst, options)
+    return baked
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="產生 Noto Serif TC 的 woff2 子集")
+    parser.add_argument("regular", help="NotoSerifTC-Regular.otf (字重 400)")
+    parser.add_argument("--bold", default=None, help="NotoSerifTC-Bold.otf (字重 700，省略時由瀏覽器合成粗體)")
+    parser.add_argument("--lang", default="ZHT", help="套用此語系的 locl 字形 (OpenType 語系標記，空字串表示不套用)")
+    args = parser.parse_args(argv)
+
+    try:
+        import fontTools  # noqa: F401
+    except ImportError:
+        sys.exit("需要 fonttools 與 brotli：pip install fonttools brotli")
+
+    text = collect_text()
+    os.makedirs(OUT_DIR, exist_ok=True)
+    for weight, src in ((400, args.regular), (700, args.bold)):
+        if src is None:
+            continue
+        dst = os.path.join(OUT_DIR, OUTPUT_NAMES[weight])
+        baked = subset(src, dst, text, args.lang)
+        print(f"{dst}: {len(text)} 字元，{os.path.getsize(dst) / 1024:.1f} KB (locl {args.lang or '-'}：{baked} 字)")
+
+if __name__ == "__main__":
+    main()